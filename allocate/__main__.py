@@ -3,20 +3,27 @@ A script to allocate items to reach the desired distribution.
 """
 import networkx as nx
 import pandas as pd
+import concurrent.futures
+import contextlib
 import argparse
 import logging
 import os
 
+import allocate.instrument
 import allocate.configure
 import allocate.utilities
 import allocate.load_inputs
 import allocate.network.visualize
 import allocate.network.algorithms
 
+import allocate.solvers.recorder
 import allocate.solvers.montecarlo
 import allocate.solvers.graphsolver
+import allocate.solvers.treesolver
 import allocate.solvers.constrained
 import allocate.solvers.unconstrained
+import allocate.solvers.withdrawal
+import allocate.solvers.bounded
 
 from allocate.network.attributes import node_attrs
 
@@ -32,17 +39,70 @@ def get_arguments(args=None) -> argparse.Namespace:
                         help='The config file to load and process')
     parser.add_argument('--constrained', dest='constrained', action='store_true',
                         help='do not allow values to be removed from bins')
+    parser.add_argument('--bounded', dest='bounded', action='store_true',
+                        help='do not allow values to be removed from bins, and keep bins within their bounds')
+    parser.add_argument('--withdraw', dest='withdraw', action='store_true',
+                        help='the amounts to add are negative, only take values out of overweight bins')
     parser.add_argument('--monte-carlo', dest='monte_carlo', action='store_true',
                         help='use the Monte Carlo based constrained solver')
+    parser.add_argument('--global', dest='whole_tree', action='store_true',
+                        help='solve all leaves at once within their bounds, instead of the children of each parent')
     parser.add_argument('--step-size', dest='step_size', type=float, default=0.01,
                         help='The Monte Carlo step size to use')
-    return parser.parse_args(args=args)
-
-
-def main(config: str, constrained: bool, monte_carlo: bool, step_size: float):
+    parser.add_argument('--seed', dest='seed', type=int, default=None,
+                        help='The Monte Carlo random seed, for reproducible runs')
+    parser.add_argument('--chains', dest='chains', type=int, default=1,
+                        help='The number of independent Monte Carlo chains to run in parallel')
+    parser.add_argument('--adaptive', dest='adaptive', action='store_true',
+                        help='Use Monte Carlo steps that shrink geometrically down to the step size')
+    parser.add_argument('--tolerance', dest='tolerance', type=float, default=None,
+                        help='Stop refining adaptive Monte Carlo steps when the ratio error improves less than this')
+    parser.add_argument('--time-budget', dest='time_budget', type=float, default=None,
+                        help='The number of seconds the solve may take before returning its best answer so far')
+    parser.add_argument('--profile', default=None, type=os.path.abspath,
+                        help='Run under cProfile and dump the stats to this .prof file')
+    parser.add_argument('--record', default=None, type=os.path.abspath,
+                        help='Record every bucket problem solved to this .npz or .jsonl capture file')
+    opts = parser.parse_args(args=args)
+    if opts.withdraw and opts.monte_carlo:
+        parser.error('--withdraw can not be used with --monte-carlo')
+    # the global solve is an exact projection that keeps the leaf bounds, with no bucket problems to time or record
+    if opts.whole_tree:
+        for flag, used in [('--constrained', opts.constrained), ('--bounded', opts.bounded),
+                           ('--withdraw', opts.withdraw), ('--monte-carlo', opts.monte_carlo),
+                           ('--time-budget', opts.time_budget is not None), ('--record', opts.record is not None)]:
+            if used:
+                parser.error(f'--global can not be used with {flag}')
+    return opts
+
+
+def main(config: str, constrained: bool, monte_carlo: bool, step_size: float, whole_tree: bool = False,
+         bounded: bool = False, withdraw: bool = False,
+         seed: int = None, chains: int = 1, adaptive: bool = False, tolerance: float = None,
+         time_budget: float = None, profile: str = None, record: str = None):
     """
     The main logic of the script.
     """
+    recorder = allocate.solvers.recorder.Recorder() if record is not None else None
+    allocate.instrument.metrics.reset()
+    with allocate.instrument.profile(profile):
+        run(config=config, constrained=constrained, monte_carlo=monte_carlo, step_size=step_size,
+            whole_tree=whole_tree, bounded=bounded, withdraw=withdraw, seed=seed, chains=chains, adaptive=adaptive,
+            tolerance=tolerance, time_budget=time_budget, recorder=recorder)
+    logging.debug('metrics:\n%s', allocate.instrument.metrics.summary())
+
+    if recorder is not None:
+        recorder.save(record)
+        logging.debug('record: %s (%d calls)', record, len(recorder.calls))
+
+
+def run(config: str, constrained: bool, monte_carlo: bool, step_size: float, whole_tree: bool = False,
+        bounded: bool = False, withdraw: bool = False,
+        seed: int = None, chains: int = 1, adaptive: bool = False, tolerance: float = None,
+        time_budget: float = None, recorder: allocate.solvers.recorder.Recorder = None):
+    """
+    Load, solve, and display the allocation problem.
+    """
     logging.debug('input: %s', config)
 
     frame: pd.DataFrame = allocate.load_inputs.load(path=config)
@@ -52,8 +112,14 @@ def main(config: str, constrained: bool, monte_carlo: bool, step_size: float):
     logging.debug('graph:\n%s', allocate.network.visualize.text(graph, **allocate.network.visualize.formats_inp))
 
     if monte_carlo:
-        kwargs = dict(step_size=step_size)
+        kwargs = dict(step_size=step_size, seed=seed, chains=chains, adaptive=adaptive, tolerance=tolerance)
         solver = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo
+    elif withdraw:
+        kwargs = dict()
+        solver = allocate.solvers.withdrawal.BucketSolverWithdrawal
+    elif bounded:
+        kwargs = dict()
+        solver = allocate.solvers.bounded.BucketSolverBounded
     elif constrained:
         kwargs = dict()
         solver = allocate.solvers.constrained.BucketSolverConstrained
@@ -61,8 +127,16 @@ def main(config: str, constrained: bool, monte_carlo: bool, step_size: float):
         kwargs = dict()
         solver = allocate.solvers.constrained.BucketSolverSimple
 
-    # noinspection PyTypeChecker
-    solve: nx.DiGraph = allocate.solvers.graphsolver.solve(graph, inplace=False, solver=solver, **kwargs)
+    if whole_tree:
+        solve: nx.DiGraph = allocate.solvers.treesolver.solve(graph, inplace=False)
+    else:
+        with contextlib.ExitStack() as stack:
+            # the worker processes for the chains are started once, and not for every parent
+            if monte_carlo and chains > 1:
+                kwargs.update(executor=stack.enter_context(concurrent.futures.ProcessPoolExecutor()))
+            # noinspection PyTypeChecker
+            solve: nx.DiGraph = allocate.solvers.graphsolver.solve(
+                graph, inplace=False, solver=solver, recorder=recorder, time_budget=time_budget, **kwargs)
     logging.debug('solved:\n%s', allocate.network.visualize.text(solve, **allocate.network.visualize.formats_out))
     display_results(solve, kvfmt='%-{}s: %s'.format(max(15, max(len(n) for n in solve.nodes))))
 
@@ -80,6 +154,11 @@ def display_results(graph: nx.DiGraph, kvfmt: str = '%-20s: %s'):
         graph, key=node_attrs.results_ratio.column, leaves=True)
     logging.debug(kvfmt, 'results_ratio', allocate.utilities.moneyfmt(results_ratio, decimals=10))
 
+    if graph.graph.get(allocate.solvers.graphsolver.TRUNCATED, False):
+        logging.debug(kvfmt, 'truncated', 'solve ran out of time, results are the best found so far')
+    if allocate.solvers.graphsolver.RESIDUAL in graph.graph:
+        logging.debug(kvfmt, 'residual', '%.3e' % graph.graph[allocate.solvers.graphsolver.RESIDUAL])
+
     logging.debug('')
     for node in graph:
         # noinspection PyCallingNonCallable
@@ -0,0 +1,300 @@
+"""
+Write and follow the results of batch allocations, one record per account.
+
+A batch run writes its results into a directory as it goes, and a monitor follows the directory
+without ever holding the results in memory::
+
+    with ResultsWriter('results') as writer:
+        writer.write('account-1', deltas={'VIGAX': 25.0}, elapsed=0.002)
+        writer.write('account-2', error='invalid network')
+
+    tailer = ResultsTailer('results')
+    tailer.poll()               # reads only what was appended since the last poll
+    tailer.totals, tailer.throughput
+    tailer.load('account-1')    # reads the single record back from disk
+
+A .jsonl file holds one JSON record per line, with the keys account, status, error, elapsed, and deltas.
+A .parquet file holds the same columns, with one column per fund in place of deltas, and should be moved
+into the directory when it is complete. It is read a row group at a time, at most max_lines rows per poll.
+Only complete lines of a .jsonl file are read, so a file that is being written can be followed.
+
+The index of where each account is stored keeps two 64 bit integers per record, a hash of the account
+and its location, so a monitor of millions of accounts does not keep their names or records in memory.
+"""
+import numpy as np
+import pandas as pd
+import collections
+import dataclasses
+import threading
+import hashlib
+import logging
+import typing
+import json
+import time
+import os
+
+
+OK: str = 'ok'
+ERROR: str = 'error'
+RESERVED: typing.Tuple[str, ...] = ('account', 'status', 'error', 'elapsed')
+
+
+class ResultsWriter:
+    """
+    Append the results of a batch run to a .jsonl file, one account at a time.
+    """
+    def __init__(self, directory: str, name: str = 'results'):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{name}.jsonl')
+        self.stream = open(self.path, 'a', encoding='utf-8')
+
+    def __enter__(self) -> 'ResultsWriter':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, account: str, deltas: typing.Optional[typing.Dict[str, float]] = None,
+              elapsed: float = 0.0, error: typing.Optional[str] = None):
+        """
+        Write the result of a single account.
+
+        Parameters:
+            account: The name of the account.
+            deltas: The amount added to each fund of the account.
+            elapsed: The wall time spent solving the account (seconds).
+            error: The error raised while solving the account, if any.
+        """
+        self.stream.write(json.dumps(dict(
+            account=account, status=ERROR if error is not None else OK, error=error, elapsed=elapsed,
+            deltas=deltas or {})) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+@dataclasses.dataclass()
+class Location:
+    """
+    Where the record of an account is stored.
+    """
+    # The path to the file with the record
+    path: str
+    # The byte offset of the line in a .jsonl file, or the row in a .parquet file
+    offset: int
+
+
+class AccountIndex:
+    """
+    Where the record of each account is stored, as arrays of account hashes and packed locations.
+    A lookup gives the locations with the hash of the account, newest first, which are checked against
+    the account of the record read back, since different accounts can share a hash.
+    """
+    # The bits of a packed location holding the offset, the rest hold the position of the path
+    OFFSET_BITS: int = 40
+
+    def __init__(self):
+        # The paths of the files with records, in the order they were first seen
+        self.paths: typing.List[str] = []
+        self._path_ids: typing.Dict[str, int] = {}
+        self._hashes = np.empty(1024, dtype=np.uint64)
+        self._locations = np.empty(1024, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the arrays of the index in bytes."""
+        return self._hashes.nbytes + self._locations.nbytes
+
+    def add(self, account: str, path: str, offset: int):
+        """
+        Add the location of the record of an account.
+        """
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = self._path_ids[path] = len(self.paths)
+            self.paths.append(path)
+        if self._size == len(self._hashes):
+            self._hashes = np.resize(self._hashes, 2 * self._size)
+            self._locations = np.resize(self._locations, 2 * self._size)
+        self._hashes[self._size] = self._hash(account)
+        self._locations[self._size] = (path_id << self.OFFSET_BITS) | offset
+        self._size += 1
+
+    def find(self, account: str) -> typing.Generator[Location, None, None]:
+        """
+        The locations that may hold the record of an account, newest first.
+        """
+        matches = np.flatnonzero(self._hashes[:self._size] == self._hash(account))
+        for location in self._locations[matches[::-1]].tolist():
+            yield Location(path=self.paths[location >> self.OFFSET_BITS],
+                           offset=location & ((1 << self.OFFSET_BITS) - 1))
+
+    @staticmethod
+    def _hash(account: str) -> np.uint64:
+        return np.uint64(int.from_bytes(hashlib.blake2b(account.encode(), digest_size=8).digest(), 'little'))
+
+
+class ResultsTailer:
+    """
+    Follow a directory of batch results, keeping running totals and an index of where each account is stored.
+    """
+    def __init__(self, directory: str, max_errors: int = 100, max_lines: int = 100000, window: float = 10.0):
+        """
+        Parameters:
+            directory: The directory with the .jsonl and .parquet results.
+            max_errors: The number of the most recent errors to keep.
+            max_lines: The largest number of records to read in a single poll.
+            window: The seconds over which the throughput is measured.
+        """
+        self.directory = directory
+        self.max_lines = max_lines
+        self.window = window
+        # The number of accounts that were solved, and that failed
+        self.counts: typing.Dict[str, int] = {OK: 0, ERROR: 0}
+        # The wall time spent solving over all accounts
+        self.elapsed = 0.0
+        # The amount added to each fund over all accounts
+        self.totals: typing.Dict[str, float] = collections.defaultdict(float)
+        # The most recent errors, as (account, error) pairs
+        self.errors: typing.Deque[typing.Tuple[str, str]] = collections.deque(maxlen=max_errors)
+        # Where the record of each account is stored
+        self.index = AccountIndex()
+
+        self._offsets: typing.Dict[str, int] = {}
+        # The first row of each row group of a .parquet file, and its number of rows at the end
+        self._row_groups: typing.Dict[str, np.array] = {}
+        self._history: typing.Deque[typing.Tuple[float, int]] = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        """The number of records read."""
+        return self.counts[OK] + self.counts[ERROR]
+
+    @property
+    def throughput(self) -> float:
+        """The records read per second over the last window."""
+        if len(self._history) < 2:
+            return 0.0
+        (t0, n0), (t1, n1) = self._history[0], self._history[-1]
+        return (n1 - n0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def poll(self) -> int:
+        """
+        Read the records appended to the directory since the last poll.
+
+        Returns:
+            The number of records read.
+        """
+        with self._lock:
+            n_records = 0
+            for name in sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []:
+                if n_records >= self.max_lines:
+                    break
+                path = os.path.join(self.directory, name)
+                ext = os.path.splitext(name)[-1].lower()
+                if ext in ['.jsonl']:
+                    n_records += self._poll_jsonl(path, self.max_lines - n_records)
+                elif ext in ['.parquet']:
+                    n_records += self._poll_parquet(path, self.max_lines - n_records)
+
+            now = time.monotonic()
+            self._history.append((now, self.total))
+            while len(self._history) > 2 and now - self._history[0][0] > self.window:
+                self._history.popleft()
+            return n_records
+
+    def load(self, account: str) -> typing.Optional[dict]:
+        """
+        Read the record of a single account from disk, or None for an unknown account.
+        """
+        for location in self.index.find(account):
+            if location.path.lower().endswith('.jsonl'):
+                with open(location.path, 'rb') as stream:
+                    stream.seek(location.offset)
+                    record = json.loads(stream.readline())
+            else:
+                record = self._load_parquet(location)
+            if str(record.get('account')) == account:
+                return record
+        return None
+
+    def _poll_jsonl(self, path: str, max_lines: int) -> int:
+        n_records = 0
+        offset = self._offsets.get(path, 0)
+        with open(path, 'rb') as stream:
+            stream.seek(offset)
+            while n_records < max_lines:
+                line = stream.readline()
+                # a line without its end is still being written, and is read on a later poll
+                if not line.endswith(b'\n'):
+                    break
+                if line.strip():
+                    try:
+                        self._add(json.loads(line), path, offset)
+                        n_records += 1
+                    except ValueError:
+                        logging.warning('can not parse result! %s:%d', path, offset)
+                offset += len(line)
+        self._offsets[path] = offset
+        return n_records
+
+    def _poll_parquet(self, path: str, max_lines: int) -> int:
+        import pyarrow.parquet
+
+        offset = self._offsets.get(path, 0)
+        starts = self._row_groups.get(path)
+        if starts is not None and offset >= starts[-1]:
+            return 0
+
+        parquet = pyarrow.parquet.ParquetFile(path)
+        if starts is None:
+            metadata = parquet.metadata
+            starts = np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+            self._row_groups[path] = starts
+
+        # read the row groups from the one with the next row, until enough rows are read
+        n_records = 0
+        group = int(np.searchsorted(starts, offset, side='right')) - 1
+        while n_records < max_lines and group < len(starts) - 1:
+            table = parquet.read_row_group(group)
+            rows = table.slice(offset - starts[group], max_lines - n_records).to_pylist()
+            for row in rows:
+                self._add(self._parquet_record(row), path, offset)
+                offset += 1
+            n_records += len(rows)
+            group += 1
+        self._offsets[path] = offset
+        return n_records
+
+    def _load_parquet(self, location: Location) -> dict:
+        import pyarrow.parquet
+
+        parquet = pyarrow.parquet.ParquetFile(location.path)
+        starts = self._row_groups[location.path]
+        group = int(np.searchsorted(starts, location.offset, side='right')) - 1
+        row, = parquet.read_row_group(group).slice(location.offset - starts[group], 1).to_pylist()
+        return self._parquet_record(row)
+
+    @staticmethod
+    def _parquet_record(row: dict) -> dict:
+        record = {k: row[k] for k in RESERVED if k in row}
+        record['deltas'] = {k: float(v) for k, v in row.items() if k not in RESERVED and pd.notna(v)}
+        return record
+
+    def _add(self, record: dict, path: str, offset: int):
+        account = str(record.get('account'))
+        self.index.add(account, path, offset)
+        self.elapsed += float(record.get('elapsed') or 0.0)
+        if record.get('status', OK) == ERROR or record.get('error'):
+            self.counts[ERROR] += 1
+            self.errors.append((account, str(record.get('error'))))
+        else:
+            self.counts[OK] += 1
+            for fund, amount in (record.get('deltas') or {}).items():
+                self.totals[fund] += amount
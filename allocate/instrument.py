@@ -0,0 +1,210 @@
+"""
+Timers, counters, and hooks for instrumenting the allocation pipeline.
+
+Stages are timed with a context manager (or decorator) and nest, so a stage entered
+while another stage is running is recorded under a dotted path such as ``solve.pass``::
+
+    with allocate.instrument.metrics.stage('solve'):
+        ...
+
+    print(allocate.instrument.metrics.summary())
+
+A host service can collect the same metrics without patching the code by registering a hook,
+which is called as ``hook(kind, name, value)`` where kind is one of ``'stage'`` or ``'count'``.
+"""
+import contextlib
+import dataclasses
+import functools
+import threading
+import cProfile
+import logging
+import pstats
+import typing
+import time
+import io
+
+
+# hook event kinds
+STAGE: str = 'stage'
+COUNT: str = 'count'
+
+
+@dataclasses.dataclass()
+class Timer:
+    """
+    The accumulated wall time spent inside a stage.
+    """
+    # The dotted path of the stage
+    name: str
+    # The number of times the stage was entered
+    calls: int = 0
+    # The total wall time spent in the stage (seconds)
+    total: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+@dataclasses.dataclass()
+class Metrics:
+    """
+    A registry of nested stage timers and named counters.
+    """
+    # The timers, keyed by the dotted stage path
+    timers: typing.Dict[str, Timer] = dataclasses.field(default_factory=dict)
+    # The counters, keyed by name
+    counters: typing.Dict[str, float] = dataclasses.field(default_factory=dict)
+    # Functions called as hook(kind, name, value) for every stage exit and count
+    hooks: typing.List[typing.Callable] = dataclasses.field(default_factory=list)
+    # Per-thread stacks of the stages currently entered
+    _local: threading.local = dataclasses.field(default_factory=threading.local, repr=False)
+    # Guards the timers and counters when used from multiple threads
+    _lock: threading.Lock = dataclasses.field(default_factory=threading.Lock, repr=False)
+
+    def _stack(self) -> typing.List[str]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _notify(self, kind: str, name: str, value: float):
+        for hook in list(self.hooks):
+            # noinspection PyBroadException
+            try:
+                hook(kind, name, value)
+            except Exception:
+                logging.exception('caught exception in metrics hook!')
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Generator[None, None, None]:
+        """
+        Time the code inside the context, nested under any stage that is already running.
+
+        Parameters:
+            name: The name of the stage.
+        """
+        stack = self._stack()
+        stack.append(name)
+        path = '.'.join(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                timer = self.timers.get(path)
+                if timer is None:
+                    timer = self.timers[path] = Timer(name=path)
+                timer.calls += 1
+                timer.total += elapsed
+            self._notify(STAGE, path, elapsed)
+
+    def timed(self, name: str) -> typing.Callable:
+        """
+        A decorator that times every call to the function as a stage.
+
+        Parameters:
+            name: The name of the stage.
+        """
+        def decorator(func: typing.Callable) -> typing.Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: float = 1):
+        """
+        Increment a counter.
+
+        Parameters:
+            name: The name of the counter.
+            value: The amount to increment the counter by.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self._notify(COUNT, name, value)
+
+    def add_hook(self, hook: typing.Callable):
+        """
+        Register a function called as hook(kind, name, value) for every stage exit and count.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: typing.Callable):
+        """
+        Unregister a hook added with add_hook.
+        """
+        self.hooks.remove(hook)
+
+    def reset(self):
+        """
+        Clear all timers and counters, but keep the hooks.
+        """
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Get a plain copy of the timers and counters.
+        """
+        with self._lock:
+            return dict(
+                timers={k: dataclasses.asdict(v) for k, v in self.timers.items()},
+                counters=dict(self.counters))
+
+    def summary(self) -> str:
+        """
+        Format the timers and counters as a table.
+        """
+        with self._lock:
+            timers = sorted(self.timers.values(), key=lambda t: t.name)
+            counters = sorted(self.counters.items())
+        width = max([len(t.name) for t in timers] + [len(k) for k, _ in counters] + [5])
+        stream = io.StringIO()
+        stream.write(f'{"stage":<{width}} {"calls":>8} {"total":>12} {"mean":>12}\n')
+        for timer in timers:
+            stream.write(f'{timer.name:<{width}} {timer.calls:>8} {timer.total:>12.6f} {timer.mean:>12.6f}\n')
+        if counters:
+            stream.write(f'\n{"count":<{width}} {"value":>8}\n')
+            for name, value in counters:
+                stream.write(f'{name:<{width}} {value:>8,}\n')
+        return stream.getvalue()
+
+
+@contextlib.contextmanager
+def profile(path: typing.Optional[str], sort: str = 'cumulative', limit: int = 25) \
+        -> typing.Generator[typing.Optional[cProfile.Profile], None, None]:
+    """
+    Run the code inside the context under cProfile.
+
+    Parameters:
+        path: Where to dump the .prof stats, or None to skip profiling.
+        sort: The pstats key used to sort the logged summary.
+        limit: The number of rows in the logged summary.
+
+    Yields:
+        The profiler, or None if profiling is disabled.
+    """
+    if path is None:
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        logging.debug('profile: %s\n%s', path, stream.getvalue())
+
+
+metrics: Metrics = Metrics()
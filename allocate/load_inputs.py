@@ -9,9 +9,12 @@ import os
 import re
 
 from allocate.network.attributes import node_attrs
+from allocate.network.attributes import INPUT_OPTIONAL
 from allocate.network.attributes import INPUT_VALUE
+from allocate.instrument import metrics
 
 
+@metrics.timed('load')
 def load(path: str) -> pd.DataFrame:
     """
     Load the configuration.
@@ -51,8 +54,9 @@ def _reformat_input(data: typing.Union[list, pd.DataFrame]) -> pd.DataFrame:
         data: pd.DataFrame = pd.DataFrame(data)
 
     valid = True
+    columns = set(node_attrs.columns(filters=INPUT_VALUE))
     for col in data.columns:
-        if col not in ['children'] and col not in node_attrs.columns(filters=INPUT_VALUE):
+        if col not in ['children'] and col not in columns:
             logging.error('unknown column in input! %s', col)
             valid = False
 
@@ -62,7 +66,14 @@ def _reformat_input(data: typing.Union[list, pd.DataFrame]) -> pd.DataFrame:
     data['children'] = data['children'].apply(_tokenize_children)
     # noinspection PyTypeChecker
     data['children'] = data.apply(_expand_regex_patterns, frame=data, axis=1)
-    data = data.astype(node_attrs.dtypes(filters=INPUT_VALUE))
+    for f in node_attrs.subset(filters=INPUT_OPTIONAL):
+        if f.column in data.columns:
+            data[f.column] = data[f.column].fillna(f.value)
+
+    data = data.astype({
+        f.column: f.dtype for f in node_attrs.subset(filters=INPUT_VALUE)
+        if f.column in data.columns or not f.filters & INPUT_OPTIONAL
+    })
 
     return data
 
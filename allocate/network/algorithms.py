@@ -4,6 +4,7 @@ Methods for creating a graph representation of the problem.
 import networkx.exception
 import networkx as nx
 import pandas as pd
+import numpy as np
 import functools
 import operator
 import logging
@@ -14,6 +15,8 @@ import copy
 import allocate.network.attributes
 import allocate.network.validate
 
+from allocate.instrument import metrics
+
 
 def get_graph_root(graph: nx.DiGraph) -> typing.Any:
     """
@@ -23,6 +26,7 @@ def get_graph_root(graph: nx.DiGraph) -> typing.Any:
         return n
 
 
+@metrics.timed('create')
 def create(frame: pd.DataFrame) -> nx.DiGraph:
     """
     Transform the input data into a graph object.
@@ -34,21 +38,24 @@ def create(frame: pd.DataFrame) -> nx.DiGraph:
         The graph that was constructed.
     """
     attrs = [
-        f for f in allocate.network.attributes.node_attrs.subset() if f.column not in [
+        f for f in allocate.network.attributes.node_attrs.schema.fields if f.column not in [
             allocate.network.attributes.node_attrs.label.column,
         ]
     ]
 
+    # build the nodes a column at a time, with the default value for missing columns
+    labels = frame[allocate.network.attributes.node_attrs.label.column].tolist()
+    values = [
+        frame[attr.column].tolist() if attr.column in frame.columns else [attr.value] * len(frame) for attr in attrs
+    ]
+    columns = [attr.column for attr in attrs]
+
     graph = nx.DiGraph()
-    for index, data in frame.iterrows():
-        label = data[allocate.network.attributes.node_attrs.label.column]
-        graph.add_node(label, **{
-            attr.column: data.get(attr.column, default=attr.value) for attr in attrs
-        })
-
-    for index, data in frame.iterrows():
-        label = data[allocate.network.attributes.node_attrs.label.column]
-        for child in data.get('children', default=()):
+    graph.add_nodes_from((label, dict(zip(columns, row))) for label, *row in zip(labels, *values))
+
+    children = frame['children'].tolist() if 'children' in frame.columns else [()] * len(frame)
+    for label, nodes in zip(labels, children):
+        for child in nodes:
             if label not in graph or child not in graph:
                 raise ValueError(f'can not create edge with missing nodes! {label} -> {child}')
             else:
@@ -76,6 +83,34 @@ def create(frame: pd.DataFrame) -> nx.DiGraph:
         key=allocate.network.attributes.node_attrs.optimal_ratio.column,
         out=allocate.network.attributes.node_attrs.optimal_ratio.column)
 
+    graph = derive(graph, inplace=True)
+
+    if not allocate.network.validate.validate(
+            graph,
+            lambda g: allocate.network.validate.network_sums_to_100_percent_at_each_level(
+                g, allocate.network.attributes.node_attrs.optimal_ratio.column, 1.0),
+            lambda g: allocate.network.validate.network_sums_to_100_percent_at_each_level(
+                g, allocate.network.attributes.node_attrs.current_ratio.column, 1.0)
+    ):
+        raise ValueError('invalid network')
+
+    return graph
+
+
+def derive(graph: nx.DiGraph, inplace: bool = False) -> nx.DiGraph:
+    """
+    Compute the current ratio, the product ratio, and the optimal value of each node from the inputs.
+
+    Parameters:
+        graph: The DAG to process, with normalized optimal ratios.
+        inplace: Should the operation happen in place or on a copy?
+
+    Returns:
+        The processed DAG.
+    """
+    if not inplace:
+        graph = copy.deepcopy(graph)
+
     # calculate current ratio
     graph = normalize(
         graph, inplace=True,
@@ -89,6 +124,7 @@ def create(frame: pd.DataFrame) -> nx.DiGraph:
         out=allocate.network.attributes.node_attrs.product_ratio.column)
 
     # compute the optimal values
+    source = get_graph_root(graph)
     total = aggregate_quantity(graph, key=allocate.network.attributes.node_attrs.amount_to_add.column) + \
         graph.nodes[source][allocate.network.attributes.node_attrs.current_value.column]
 
@@ -97,15 +133,6 @@ def create(frame: pd.DataFrame) -> nx.DiGraph:
         func=lambda product_ratio: total * product_ratio,
         out=allocate.network.attributes.node_attrs.optimal_value.column)
 
-    if not allocate.network.validate.validate(
-            graph,
-            lambda g: allocate.network.validate.network_sums_to_100_percent_at_each_level(
-                g, allocate.network.attributes.node_attrs.optimal_ratio.column, 1.0),
-            lambda g: allocate.network.validate.network_sums_to_100_percent_at_each_level(
-                g, allocate.network.attributes.node_attrs.current_ratio.column, 1.0)
-    ):
-        raise ValueError('invalid network')
-
     return graph
 
 
@@ -254,3 +281,13 @@ def is_leaf_node(graph: nx.DiGraph, node: str):
     """
     # noinspection PyCallingNonCallable
     return graph.out_degree(node) == 0 and graph.in_degree(node) == 1
+
+
+def leaf_mask(graph: nx.DiGraph, nodes: typing.Iterable[str]) -> np.array:
+    """
+    A vectorized version of is_leaf_node, checking if each of the nodes is a leaf node.
+    """
+    nodes = list(nodes)
+    # noinspection PyCallingNonCallable
+    out_degree, in_degree = graph.out_degree(nodes), graph.in_degree(nodes)
+    return np.fromiter((out_degree[n] == 0 and in_degree[n] == 1 for n in nodes), dtype=bool, count=len(nodes))
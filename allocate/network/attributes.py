@@ -1,7 +1,16 @@
 """
 The data associated with each node or column when representing the problem.
+
+The fields of an Attributes are compiled once into a Schema, so that selecting fields by filter, the
+dtypes, and the position of each column are lookups, and typed arrays can be allocated directly::
+
+    node_attrs.schema.subset(DISPLAY_OUT)           # a tuple of fields
+    node_attrs.schema.array(len(graph))             # a structured array with the default values
 """
+import numpy as np
 import dataclasses
+import functools
+import types
 import typing
 
 # common formats
@@ -13,6 +22,8 @@ INPUT_VALUE: int = 1 << 0
 DISPLAY_ALL: int = 1 << 1
 DISPLAY_INP: int = 1 << 2
 DISPLAY_OUT: int = 1 << 3
+INPUT_OPTIONAL: int = 1 << 4
+ALL_FILTERS: int = INPUT_VALUE | DISPLAY_ALL | DISPLAY_INP | DISPLAY_OUT | INPUT_OPTIONAL
 
 
 @dataclasses.dataclass()
@@ -37,6 +48,66 @@ class Attribute:
         return dataclasses.field(default_factory=lambda: cls(*args, **kwargs))
 
 
+@dataclasses.dataclass(frozen=True)
+class Schema:
+    """
+    The fields of an Attributes, compiled into tables for lookups.
+    """
+    # The fields, in the order they were declared
+    fields: typing.Tuple[Attribute, ...]
+    # The field with each name
+    names: typing.Mapping[str, Attribute]
+    # The position of each column in the fields
+    positions: typing.Mapping[str, int]
+    # The fields that pass each bitfield mask of filters
+    tables: typing.Mapping[int, typing.Tuple[Attribute, ...]]
+    # A structured dtype with a field per column, where strings are objects
+    dtype: np.dtype
+
+    @classmethod
+    def compile(cls, attributes: 'Attributes') -> 'Schema':
+        """
+        Compile the fields of an Attributes, which should not be changed afterwards.
+        """
+        names = {f.name: getattr(attributes, f.name) for f in dataclasses.fields(attributes)}
+        fields = tuple(names.values())
+        tables = {
+            mask: tuple(f for f in fields if f.filters & mask) for mask in range(ALL_FILTERS + 1)
+        }
+        dtype = np.dtype([(f.column, np.dtype(f.dtype) if f.dtype in (int, float, bool) else object) for f in fields])
+        return cls(
+            fields=fields, names=types.MappingProxyType(names),
+            positions=types.MappingProxyType({f.column: i for i, f in enumerate(fields)}),
+            tables=types.MappingProxyType(tables), dtype=dtype)
+
+    def subset(self, filters: typing.Optional[int] = None) -> typing.Tuple[Attribute, ...]:
+        """
+        The fields that pass a bitfield mask of filters, or all fields.
+        """
+        if filters is None:
+            return self.fields
+        try:
+            return self.tables[filters]
+        except KeyError:
+            return tuple(f for f in self.fields if f.filters & filters)
+
+    def array(self, size: int, *columns: str) -> np.array:
+        """
+        Allocate a structured array filled with the default values.
+
+        Parameters:
+            size: The number of rows.
+            columns: The columns of the array, or all columns.
+
+        Returns:
+            The structured array.
+        """
+        array = np.empty(size, dtype=[(c, self.dtype.fields[c][0]) for c in columns or self.dtype.names])
+        for column in array.dtype.names:
+            array[column] = self.fields[self.positions[column]].value
+        return array
+
+
 @dataclasses.dataclass()
 class Attributes:
     # The label for the node
@@ -67,6 +138,12 @@ class Attributes:
     # For example, given the path 1->2->3, the ratio at 3 would be ratio_1 * ratio_2 * ratio_3
     product_ratio: Attribute = Attribute.make(
         'product_ratio', float, 0.0, FORMAT_RATIO, DISPLAY_ALL)
+    # The smallest amount allowed in this bucket after the solve (optional input)
+    min_value: Attribute = Attribute.make(
+        'min_value', float, 0.0, FORMAT_VALUE, INPUT_VALUE | INPUT_OPTIONAL)
+    # The largest amount allowed in this bucket after the solve (optional input)
+    max_value: Attribute = Attribute.make(
+        'max_value', float, float('inf'), FORMAT_VALUE, INPUT_VALUE | INPUT_OPTIONAL)
     # The amount to distribute at this source over the descendents
     amount_to_add: Attribute = Attribute.make(
         'amount_to_add', float, 0.0, FORMAT_VALUE, DISPLAY_ALL | INPUT_VALUE | DISPLAY_INP | DISPLAY_OUT)
@@ -85,33 +162,31 @@ class Attributes:
         Yields:
             The fields or field.name attribute with the given name.
         """
-        fields = {
-            f.name: getattr(self, f.name) for f in dataclasses.fields(self)
-        }
+        if not columns:
+            for f in self.schema.subset(filters):
+                yield getattr(f, name) if name is not None else f
+            return
 
+        fields = self.schema.names
         if filters is not None:
             fields = {
                 n: f for n, f in fields.items() if f.filters & filters
             }
 
-        if columns:
-            for label in columns:
-                try:
-                    if name is not None:
-                        yield getattr(fields[label], name)
-                    else:
-                        yield fields[label]
-                except KeyError:
-                    if strict:
-                        raise ValueError(label) from None
-                    else:
-                        pass
-        else:
-            for f in fields.values():
+        for label in columns:
+            try:
                 if name is not None:
-                    yield getattr(f, name)
+                    yield getattr(fields[label], name)
                 else:
-                    yield f
+                    yield fields[label]
+            except KeyError:
+                if strict:
+                    raise ValueError(label) from None
+
+    @functools.cached_property
+    def schema(self) -> Schema:
+        """The fields compiled into a schema, once."""
+        return Schema.compile(self)
 
     def dtypes(self, *columns, **kwargs):
         """
@@ -0,0 +1,138 @@
+"""
+Screen many accounts sharing a model hierarchy for drift, without solving any of them.
+
+Before a rebalance only the accounts that drifted out of their tolerance band need a solve.
+The drift of a leaf is its current ratio of the account total minus its product ratio, and the
+drift of an account is the largest absolute drift over its leaves::
+
+    template = Template.compile(graph)
+    report = screen(template, current_values)       # accounts x leaves
+    report.flagged(0.05)                            # accounts with a leaf more than 5% off its target
+    report.top_accounts(10)
+
+Everything is computed over the value matrix at once, so screening costs a few passes over memory.
+"""
+import networkx as nx
+import numpy as np
+import dataclasses
+import typing
+
+from allocate.network.attributes import node_attrs
+from allocate.network.template import Template
+from allocate.instrument import metrics
+
+
+@dataclasses.dataclass()
+class DriftReport:
+    """
+    The drift of every leaf of many accounts sharing a model hierarchy.
+    """
+    # The template that was screened
+    template: Template
+    # The current value in each leaf of each account, accounts by leaves
+    values: np.array
+    # The current ratio minus the product ratio of each leaf of each account, accounts by leaves
+    deviations: np.array
+
+    def __len__(self) -> int:
+        return len(self.deviations)
+
+    @property
+    def drifts(self) -> np.array:
+        """The largest absolute deviation over the leaves of each account."""
+        if self.deviations.shape[1] == 0:
+            return np.zeros(len(self))
+        return np.max(np.abs(self.deviations), axis=1)
+
+    @property
+    def distances(self) -> np.array:
+        """The distance between the leaf ratios and the product ratios of each account."""
+        return np.linalg.norm(self.deviations, axis=1)
+
+    def flagged(self, threshold: float) -> np.array:
+        """
+        The indices of the accounts whose drift is more than the threshold, in increasing order.
+        """
+        return np.flatnonzero(self.drifts > threshold)
+
+    def top_accounts(self, k: int) -> np.array:
+        """
+        The indices of the k accounts with the largest drift, the most drifted first.
+        """
+        return _top_k(self.drifts, k)
+
+    def top_leaves(self, k: int) -> typing.List[typing.Tuple[int, typing.Any, float]]:
+        """
+        The k leaves with the largest absolute deviation over all accounts, the most drifted first.
+
+        Returns:
+            The index of the account, the label of the leaf, and its deviation, for each of the k leaves.
+        """
+        flat = self.deviations.reshape(-1)
+        labels = self.template.leaf_labels
+        n_leaves = self.deviations.shape[1]
+        return [(int(i // n_leaves), labels[i % n_leaves], float(flat[i])) for i in _top_k(np.abs(flat), k)]
+
+    def sibling_deviations(self) -> np.array:
+        """
+        The current ratio of each node over its parent minus its optimal ratio, accounts by nodes.
+        The root and the children of an empty parent have no deviation.
+        """
+        node_values = self.template.node_values(self.values)
+        deviations = np.zeros_like(node_values)
+        for parent, children in self.template.parents:
+            totals = node_values[:, parent, np.newaxis]
+            ratios = np.divide(
+                node_values[:, children], totals, out=np.zeros((len(totals), len(children))), where=totals > 0)
+            deviations[:, children] = np.where(totals > 0, ratios - self.template.optimal_ratios[children], 0.0)
+        return deviations
+
+
+@metrics.timed('drift')
+def screen(template: Template, current_values: np.array) -> DriftReport:
+    """
+    Find the drift of every leaf of many accounts sharing a model hierarchy.
+
+    Parameters:
+        template: The compiled model hierarchy.
+        current_values: The current value in each leaf of each account, accounts by leaves.
+
+    Returns:
+        The drift of every leaf of every account, an empty account has the negated product ratios.
+    """
+    current_values = np.atleast_2d(np.asanyarray(current_values, dtype=float))
+    deviations = template.leaf_ratios(current_values) - template.product_ratios[template.leaves]
+    metrics.count('drift.accounts', len(current_values))
+    return DriftReport(template=template, values=current_values, deviations=deviations)
+
+
+def stack(template: Template, graphs: typing.Iterable[nx.DiGraph]) -> np.array:
+    """
+    Collect the current values of the leaves of many graphs that share the template's hierarchy.
+
+    Parameters:
+        template: The compiled model hierarchy.
+        graphs: The graphs of the accounts, made by algorithms.create.
+
+    Returns:
+        A matrix of current values, accounts by leaves.
+    """
+    labels = template.leaf_labels
+    rows = []
+    for graph in graphs:
+        try:
+            rows.append([graph.nodes[n][node_attrs.current_value.column] for n in labels])
+        except KeyError:
+            raise ValueError('graph does not match the template!')
+    return np.array(rows, dtype=float).reshape(-1, len(labels))
+
+
+def _top_k(values: np.array, k: int) -> np.array:
+    """
+    The indices of the k largest values, the largest first, in O(n + k log k).
+    """
+    k = max(0, min(k, len(values)))
+    if k == 0:
+        return np.zeros(0, dtype=int)
+    index = np.argpartition(-values, k - 1)[:k]
+    return index[np.argsort(-values[index], kind='stable')]
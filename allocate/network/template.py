@@ -0,0 +1,122 @@
+"""
+Compile a model hierarchy into a reusable plan for solving it across many accounts.
+
+Many accounts share one model tree, with the same labels, edges, and optimal ratios, and differ only in
+their current values and amounts to add. A Template keeps everything that depends on the tree alone::
+
+    template = Template.compile(allocate.network.algorithms.create(frame))
+    values = template.node_values(current_values)   # accounts x leaves -> accounts x nodes
+
+so that the accounts can be handled as rows of a matrix, instead of as a graph each.
+"""
+import scipy.sparse
+import networkx as nx
+import numpy as np
+import dataclasses
+import typing
+
+from allocate.network.attributes import node_attrs
+
+import allocate.network.algorithms
+
+
+@dataclasses.dataclass(frozen=True)
+class Template:
+    """
+    The structure of a model hierarchy, with the nodes numbered in breadth first order from the root.
+    """
+    # The labels of every node, in breadth first order from the root
+    labels: list
+    # The index of each leaf, in the order of the columns of the value matrices
+    leaves: np.array
+    # The index of each parent, in breadth first order from the root, with the indices of its children
+    parents: typing.List[typing.Tuple[int, np.array]]
+    # The optimal ratio of each node over its siblings, normalized to sum to one
+    optimal_ratios: np.array
+    # The product of the optimal ratios from the root to each node
+    product_ratios: np.array
+    # A sparse matrix that sums the leaf values into the value of each node, nodes by leaves
+    aggregate: scipy.sparse.csr_matrix
+
+    @classmethod
+    def compile(cls, graph: nx.DiGraph) -> 'Template':
+        """
+        Compile a graph made by algorithms.create.
+
+        Parameters:
+            graph: The DAG of the model hierarchy, the values and amounts in it are ignored.
+
+        Returns:
+            The compiled template.
+        """
+        source = allocate.network.algorithms.get_graph_root(graph)
+        successors = list(nx.bfs_successors(graph, source))
+        labels = [source] + [child for _, children in successors for child in children]
+        index = {label: i for i, label in enumerate(labels)}
+
+        # noinspection PyCallingNonCallable
+        leaves = np.array([index[n] for n in labels if graph.out_degree(n) == 0], dtype=int)
+        parents = [(index[parent], np.array([index[c] for c in children], dtype=int))
+                   for parent, children in successors]
+
+        rows, cols = [], []
+        for column, leaf in enumerate(leaves):
+            for node in [labels[leaf]] + list(nx.ancestors(graph, labels[leaf])):
+                rows.append(index[node])
+                cols.append(column)
+        aggregate = scipy.sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(labels), len(leaves)))
+
+        # normalize the ratios over each set of siblings, as the bucket problem for each parent does
+        optimal_ratios = np.array([graph.nodes[n][node_attrs.optimal_ratio.column] for n in labels], dtype=float)
+        optimal_ratios[0] = 1.0
+        product_ratios = np.ones(len(labels))
+        for parent, children in parents:
+            total = np.sum(optimal_ratios[children])
+            optimal_ratios[children] = optimal_ratios[children] / total if total > 0 else 0.0
+            product_ratios[children] = product_ratios[parent] * optimal_ratios[children]
+
+        return cls(
+            labels=labels, leaves=leaves, parents=parents,
+            optimal_ratios=optimal_ratios, product_ratios=product_ratios, aggregate=aggregate)
+
+    @property
+    def root(self) -> int:
+        """The index of the root node."""
+        return 0
+
+    @property
+    def leaf_labels(self) -> list:
+        """The labels of the leaves, in the order of the columns of the value matrices."""
+        return [self.labels[i] for i in self.leaves]
+
+    def node_values(self, leaf_values: np.array) -> np.array:
+        """
+        Sum the values of the leaves into the value of every node.
+
+        Parameters:
+            leaf_values: A matrix of values, accounts by leaves.
+
+        Returns:
+            A matrix of values, accounts by nodes.
+        """
+        leaf_values = np.atleast_2d(np.asanyarray(leaf_values, dtype=float))
+        if leaf_values.shape[-1] != len(self.leaves):
+            raise ValueError('shape mismatch between values and template!')
+        return np.asarray(self.aggregate.dot(leaf_values.T).T)
+
+    def leaf_ratios(self, leaf_values: np.array) -> np.array:
+        """
+        The value of each leaf over the total value of its account, or zero for an empty account.
+
+        Parameters:
+            leaf_values: A matrix of values, accounts by leaves.
+
+        Returns:
+            A matrix of ratios, accounts by leaves.
+        """
+        leaf_values = np.atleast_2d(np.asanyarray(leaf_values, dtype=float))
+        if leaf_values.shape[-1] != len(self.leaves):
+            raise ValueError('shape mismatch between values and template!')
+        totals = np.sum(leaf_values, axis=1, keepdims=True)
+        return np.divide(leaf_values, totals, out=np.zeros_like(leaf_values), where=totals > 0)
@@ -9,7 +9,10 @@ import logging
 
 import allocate.network.algorithms
 
+from allocate.instrument import metrics
 
+
+@metrics.timed('validate')
 def validate(graph: nx.DiGraph, *checks) -> bool:
     """
     Check each check in turn.
@@ -15,100 +15,174 @@ from allocate.network.attributes import DISPLAY_INP
 from allocate.network.attributes import DISPLAY_OUT
 
 
-formats_all = {f.column: f.display for f in node_attrs.subset(filters=DISPLAY_ALL)}
-formats_inp = {f.column: f.display for f in node_attrs.subset(filters=DISPLAY_INP)}
-formats_out = {f.column: f.display for f in node_attrs.subset(filters=DISPLAY_OUT)}
+formats_all = {f.column: f.display for f in node_attrs.schema.subset(DISPLAY_ALL)}
+formats_inp = {f.column: f.display for f in node_attrs.schema.subset(DISPLAY_INP)}
+formats_out = {f.column: f.display for f in node_attrs.schema.subset(DISPLAY_OUT)}
 
 
-def text(graph: nx.DiGraph, attrs: bool = False, **kwargs) -> str:
+def text(graph: nx.DiGraph, attrs: bool = False, max_depth: typing.Optional[int] = None,
+         max_children: typing.Optional[int] = None, leaves_only: bool = False, **kwargs) -> str:
     """
     Display the graph using ASCII art.
 
     Parameters:
         graph: The DAG to display with ASCII art.
         attrs: Display all node attributes for nodes?
+        max_depth: Do not display nodes deeper than this below the root.
+        max_children: Display at most this many children of each node, and collapse the rest.
+        leaves_only: Display only the leaves, without the branches of the tree.
         kwargs: Node attributes to display and their format strings.
 
     Returns:
         The graph formatted as an ASCII string.
     """
+    stream = io.StringIO()
+    write(graph, stream, attrs=attrs, max_depth=max_depth, max_children=max_children, leaves_only=leaves_only,
+          **kwargs)
+    return stream.getvalue()
+
+
+def write(graph: nx.DiGraph, stream: typing.TextIO, attrs: bool = False, max_depth: typing.Optional[int] = None,
+          max_children: typing.Optional[int] = None, leaves_only: bool = False, **kwargs):
+    """
+    Write the graph using ASCII art to a stream, one line at a time.
+
+    Parameters:
+        graph: The DAG to display with ASCII art.
+        stream: The file like object to write to.
+        attrs: Display all node attributes for nodes?
+        max_depth: Do not display nodes deeper than this below the root.
+        max_children: Display at most this many children of each node, and collapse the rest.
+        leaves_only: Display only the leaves, without the branches of the tree.
+        kwargs: Node attributes to display and their format strings.
+    """
     source = allocate.network.algorithms.get_graph_root(graph)
-    if attrs:
-        return TextDisplayer(graph=graph, attrs=True)(source)
-    else:
-        return TextDisplayer(graph=graph, attrs=kwargs)(source)
+    displayer = TextDisplayer(
+        graph=graph, attrs=True if attrs else kwargs,
+        max_depth=max_depth, max_children=max_children, leaves_only=leaves_only)
+    displayer.write(stream, source)
 
 
 @dataclasses.dataclass()
 class TextDisplayer:
     """
     Helper class to display DAG as ASCII Art.
+
+    The tree is walked with an explicit stack, so deep trees do not reach the recursion limit, and each
+    line is written to the stream as soon as it is formatted. The level of a node is its depth on the walk.
     """
     graph: nx.DiGraph
     CROSS: str = ' ├─'
     FINAL: str = ' └─'
     SPACE: str = '   '
     VLINE: str = ' │ '
+    MORE: str = '… {} more'
     attrs: typing.Union[dict, bool] = dataclasses.field(default_factory=dict)
-    stream: io.StringIO = dataclasses.field(default_factory=io.StringIO)
+    stream: typing.TextIO = dataclasses.field(default_factory=io.StringIO)
     depth: int = None
     width: int = None
     source: str = None
+    max_depth: typing.Optional[int] = None
+    max_children: typing.Optional[int] = None
+    leaves_only: bool = False
 
     def __call__(self, *sources) -> str:
-        self.stream = io.StringIO()
-        self.depth = networkx.dag_longest_path_length(self.graph)
-        self.width = max(len(str(n)) for n in self.graph.nodes)
+        stream = io.StringIO()
+        self.write(stream, *sources)
+        return stream.getvalue()
+
+    def write(self, stream: typing.TextIO, *sources):
+        """
+        Write each source node and the nodes below it to the stream.
+        """
+        self.stream = stream
+        self.width = max((len(str(n)) for n in self.graph.nodes), default=0)
+        if self.attrs and not self.leaves_only:
+            # each generation holds the nodes whose longest path from a root has the same length
+            self.depth = max(0, sum(1 for _ in nx.topological_generations(self.graph)) - 1)
+            if self.max_depth is not None:
+                self.depth = min(self.depth, self.max_depth)
         for source in sources:
             self.source = source
-            self._write_node(source, "")
-        return self.stream.getvalue()
-
-    def _write_node(self, label: str, indent: str):
-        if label in self.graph:
-            self._write_name(label)
-            children = list(self.graph.successors(label))
-            for i, child in enumerate(self.graph.successors(label)):
-                self._write_child_node(child, indent, i == len(children) - 1)
-        else:
-            label = label if label is not None else '?'
-            self.stream.write(f'{label} [missing]\n')
-
-    def _write_name(self, label):
-        if self.attrs:
-            level = len(nx.shortest_path(self.graph, self.source, label))
-            width = 3 * (self.depth + 1) + 1 - 3 * level + self.width
-            self.stream.write(f'{label:<{width}}')
-            for key, fmt in self._get_node_attrs(label):
+            if source not in self.graph:
+                source = source if source is not None else '?'
+                self.stream.write(f'{source} [missing]\n')
+            elif self.leaves_only:
+                self._write_leaves(source)
+            else:
+                self._write_tree(source)
+
+    def _write_tree(self, source: str):
+        self.stream.write(self._format_node(source, '', 1))
+
+        # each frame is the indent below its node, the children shown, the next child, and the hidden count,
+        # only the last part of the indent is kept in each frame so the stack grows linearly with the depth
+        indents = []
+        stack = [self._make_frame(source, '')] if self._expand(1) else []
+        while stack:
+            frame = stack[-1]
+            _, children, index, hidden = frame
+            if index == len(children):
+                stack.pop()
+                indent = ''.join(indents)
+                if indents:
+                    indents.pop()
+                if hidden:
+                    self.stream.write(f'{indent}{self.FINAL}{self.MORE.format(hidden)}\n')
+                continue
+
+            frame[2] = index + 1
+            label = children[index]
+            last = index == len(children) - 1 and not hidden
+            level = len(stack) + 1
+            indent = ''.join(indents)
+            self.stream.write(self._format_node(label, indent + (self.FINAL if last else self.CROSS), level))
+            if self._expand(level):
+                frame = self._make_frame(label, self.SPACE if last else self.VLINE)
+                if frame[1] or frame[3]:
+                    indents.append(frame[0])
+                    stack.append(frame)
+
+    def _write_leaves(self, source: str):
+        # noinspection PyCallingNonCallable
+        for label in nx.dfs_preorder_nodes(self.graph, source, depth_limit=self.max_depth):
+            if self.graph.out_degree(label) == 0:
+                self.stream.write(self._format_name(label, self.width + 1))
+
+    def _expand(self, level: int) -> bool:
+        return self.max_depth is None or level <= self.max_depth
+
+    def _make_frame(self, label: str, indent: str) -> list:
+        children = list(self.graph.succ[label])
+        if self.max_children is not None and len(children) > self.max_children:
+            return [indent, children[:self.max_children], 0, len(children) - self.max_children]
+        return [indent, children, 0, 0]
+
+    def _format_node(self, label: str, prefix: str, level: int) -> str:
+        width = 3 * (self.depth + 1) + 1 - 3 * level + self.width if self.attrs else 0
+        return prefix + self._format_name(label, width)
+
+    def _format_name(self, label: str, width: int) -> str:
+        if not self.attrs:
+            return f'{label}\n'
+
+        data = self.graph.nodes[label]
+        parts = [f'{label:<{width}}']
+        for key, fmt in self._get_node_attrs(label):
+            try:
+                val = fmt.format(data[key])
+            except KeyError:
+                # noinspection PyBroadException
                 try:
-                    val = fmt.format(self.graph.nodes[label][key])
-                except KeyError:
-                    # noinspection PyBroadException
-                    try:
-                        val = '[%s]' % ((len(fmt.format(0)) - 2) * '?')
-                    except Exception:
-                        val = '?'
-                self.stream.write(f' {key}={val}')
-            self.stream.write('\n')
-        else:
-            self.stream.write(f'{label}\n')
+                    val = '[%s]' % ((len(fmt.format(0)) - 2) * '?')
+                except Exception:
+                    val = '?'
+            parts.append(f' {key}={val}')
+        parts.append('\n')
+        return ''.join(parts)
 
     def _get_node_attrs(self, label):
         if isinstance(self.attrs, dict):
-            for n, f in self.attrs.items():
-                yield n, f if f is not None else '{}'
+            return [(n, f if f is not None else '{}') for n, f in self.attrs.items()]
         else:
-            for n in self.graph.nodes[label].keys():
-                yield n, '{}'
-
-    def _write_child_node(self, label: str, indent: str, last: bool):
-        self.stream.write(indent)
-
-        if last:
-            self.stream.write(self.FINAL)
-            indent += self.SPACE
-        else:
-            self.stream.write(self.CROSS)
-            indent += self.VLINE
-
-        self._write_node(label, indent)
+            return [(n, '{}') for n in self.graph.nodes[label].keys()]
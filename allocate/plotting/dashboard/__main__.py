@@ -1,9 +1,12 @@
 """
 Serve the main dashboard for debugging.
+
+    python -m allocate.plotting.dashboard [allocate.yaml] [results directory]
 """
 import panel as pn
 import traceback
 import pathlib
+import sys
 import io
 
 from .dashboard import Dashboard
@@ -13,7 +16,9 @@ if __name__ == '__main__':
     ROOT = str(pathlib.Path(__file__).parent.parent.parent.parent.absolute())
     # noinspection PyBroadException
     try:
-        dashboard = Dashboard(parent=None)
+        config = sys.argv[1] if len(sys.argv) > 1 else str(pathlib.Path(ROOT) / 'allocate.yaml')
+        results = sys.argv[2] if len(sys.argv) > 2 else None
+        dashboard = Dashboard(parent=None, config=config, results=results)
         dashboard.connect()
         dashboard.serve()
     except Exception:
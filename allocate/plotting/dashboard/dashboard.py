@@ -1,24 +1,232 @@
 """
 A dashboard composed of widgets.
+
+The dashboard loads a config, and solves it again as the amount to add at the root and the optimal
+ratio of any node are edited with sliders, showing the current and the results values as bar plots.
+
+Solves run in a background thread pool, so the event loop never blocks. A solve starts only once
+the sliders have been still for the debounce time: a waiting solve gives up as soon as another edit
+comes in, and the result is dropped if one came in during the solve. Solved graphs are kept in a least
+recently used cache keyed by the edited values, so going back to values seen before updates the plots
+at once, without a solve.
+
+The solved graph can be browsed as a collapsible tree on a second tab, and given a results directory,
+the dashboard also follows the results of a batch run on a third tab.
 """
+import concurrent.futures
 import panel.viewable
+import networkx as nx
+import pandas as pd
 import panel as pn
+import collections
 import dataclasses
+import functools
+import threading
+import typing
 
+from .widgets.results import ResultsMonitor
+from .widgets.tree import TreeView
 from .widgets.base import Widget
 
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.network.attributes import node_attrs
+
+import allocate.plotting.node_attr_bar_plot
+import allocate.plotting.node_attr_table
+import allocate.solvers.graphsolver
+import allocate.network.algorithms
+import allocate.load_inputs
+
 
 @dataclasses.dataclass()
 class Dashboard(Widget):
     """The top-level widget."""
+    #: The path to the config to load, or None for an empty dashboard
+    config: typing.Optional[str] = None
+    #: The seconds to wait after the last edit before solving
+    debounce: float = 0.25
+    #: The number of solved graphs to keep
+    cache_size: int = 64
+    #: The number of background threads for solving
+    max_workers: int = 1
+    #: The directory with the results of a batch run to follow, or None
+    results: typing.Optional[str] = None
+
     def __setup__(self):
         """Setup the model and view for the widget."""
-        pass
+        self.model['cache'] = collections.OrderedDict()
+        self.model['lock'] = threading.Lock()
+        self.model['edited'] = threading.Condition(self.model['lock'])
+        self.model['generation'] = 0
+        self.model['ratios'] = {}
+        self.model['hits'] = 0
+        self.model['solves'] = 0
+        self.model['executor'] = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        self.model['monitor'] = ResultsMonitor(parent=self, directory=self.results) if self.results else None
+
+        if self.config is None:
+            return
+
+        frame: pd.DataFrame = allocate.load_inputs.load(path=self.config)
+        graph: nx.DiGraph = allocate.network.algorithms.create(frame)
+        root = allocate.network.algorithms.get_graph_root(graph)
+        self.model['frame'] = frame
+        self.model['graph'] = graph
+        self.model['root'] = root
+        self.model['tree'] = TreeView(parent=self, graph=graph)
+
+        amount = float(graph.nodes[root][node_attrs.amount_to_add.column])
+        total = float(graph.nodes[root][node_attrs.current_value.column])
+        ratios = frame.set_index(node_attrs.label.column)[node_attrs.optimal_ratio.column]
+        nodes = [n for n in frame[node_attrs.label.column] if n != root]
+
+        self.view['amount'] = pn.widgets.FloatSlider(
+            label=node_attrs.amount_to_add.column, start=0.0, end=max(2.0 * amount, total, 1.0),
+            step=max(2.0 * amount, total, 1.0) / 1000, value=amount)
+        self.view['node'] = pn.widgets.Select(label=node_attrs.label.column, options=nodes)
+        self.view['ratio'] = pn.widgets.FloatSlider(
+            label=node_attrs.optimal_ratio.column, start=0.0, end=2.0 * float(ratios.max()),
+            step=2.0 * float(ratios.max()) / 1000, value=float(ratios[nodes[0]]) if nodes else 0.0,
+            disabled=not nodes)
+        self.view['status'] = pn.pane.Markdown('')
+        self.view['inputs'] = pn.pane.HoloViews(
+            self._make_plot(graph, node_attrs.current_value.column), sizing_mode='stretch_width')
+        self.view['outputs'] = pn.pane.HoloViews(None, sizing_mode='stretch_width')
 
     def __layout__(self) -> panel.viewable.Viewable:
         """Layout the objects in the view."""
-        return pn.pane.Markdown(f'{self.__class__.__name__}: NotImplemented')
+        monitor = self.model['monitor']
+        if self.config is None:
+            return monitor.layout if monitor else pn.pane.Markdown(f'{self.__class__.__name__}: no config')
+        layout = pn.Column(
+            pn.Row(self.view['amount'], self.view['node'], self.view['ratio']),
+            self.view['status'],
+            pn.Row(self.view['inputs'], self.view['outputs'], sizing_mode='stretch_width'),
+            sizing_mode='stretch_width')
+        tabs = [('allocation', layout), ('tree', self.model['tree'].layout)]
+        if monitor:
+            tabs.append(('batch', monitor.layout))
+        return pn.Tabs(*tabs, sizing_mode='stretch_width')
 
     def __connect__(self):
         """Connect widgets together in the view."""
-        pass
+        if self.config is None:
+            return
+        self.view['amount'].param.watch(lambda event: self.request(), 'value')
+        self.view['ratio'].param.watch(self._on_ratio, 'value')
+        self.view['node'].param.watch(self._on_node, 'value')
+        self.request()
+
+    @property
+    def parameters(self) -> tuple:
+        """The edited values, the amount to add at the root and the changed optimal ratios."""
+        return float(self.view['amount'].value), tuple(sorted(self.model['ratios'].items()))
+
+    def request(self) -> typing.Optional[concurrent.futures.Future]:
+        """
+        Show the results for the edited values, at once if they were solved before, or else after a debounced solve.
+
+        Returns:
+            The future of the background solve, or None if the results were cached.
+        """
+        parameters = self.parameters
+        doc = pn.state.curdoc
+        with self.model['lock']:
+            self.model['generation'] += 1
+            generation = self.model['generation']
+            self.model['edited'].notify_all()
+            solved = self._cache_get(parameters)
+
+        if solved is not None:
+            self._schedule(doc, parameters, solved)
+            return None
+        return self.model['executor'].submit(self._solve_later, doc, generation, parameters)
+
+    def solve(self, parameters: tuple) -> nx.DiGraph:
+        """
+        Solve the config for the edited values, using the cache.
+        """
+        with self.model['lock']:
+            solved = self._cache_get(parameters)
+        if solved is not None:
+            return solved
+
+        amount, ratios = parameters
+        frame = self.model['frame'].copy()
+        labels = frame[node_attrs.label.column]
+        frame.loc[labels == self.model['root'], node_attrs.amount_to_add.column] = amount
+        for label, ratio in ratios:
+            frame.loc[labels == label, node_attrs.optimal_ratio.column] = ratio
+        solved = allocate.solvers.graphsolver.solve(
+            allocate.network.algorithms.create(frame), solver=BucketSolverBounded, inplace=True)
+
+        with self.model['lock']:
+            self.model['solves'] += 1
+            cache = self.model['cache']
+            cache[parameters] = solved
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return solved
+
+    def close(self):
+        """Stop the background threads."""
+        self.model['executor'].shutdown(wait=True)
+        if self.model['monitor']:
+            self.model['monitor'].close()
+
+    def _solve_later(self, doc, generation: int, parameters: tuple) -> typing.Optional[nx.DiGraph]:
+        # wake up as soon as a newer edit comes in, so a burst of edits waits out a single debounce
+        with self.model['edited']:
+            if self.model['edited'].wait_for(lambda: generation != self.model['generation'], self.debounce):
+                return None
+        solved = self.solve(parameters)
+        if generation != self.model['generation']:
+            return None
+        self._schedule(doc, parameters, solved)
+        return solved
+
+    def _schedule(self, doc, parameters: tuple, solved: nx.DiGraph):
+        # bokeh models may only be changed from the thread of the document's event loop
+        callback = functools.partial(self._show, parameters, solved)
+        if doc is not None and doc.session_context is not None:
+            doc.add_next_tick_callback(callback)
+        else:
+            callback()
+
+    def _show(self, parameters: tuple, solved: nx.DiGraph):
+        self.view['outputs'].object = self._make_plot(solved, node_attrs.results_value.column)
+        self.model['tree'].update(solved)
+        residual = solved.graph.get(allocate.solvers.graphsolver.RESIDUAL, float('nan'))
+        self.view['status'].object = \
+            f'amount_to_add: {parameters[0]:,.2f} | residual: {residual:.3e} | ' \
+            f'solves: {self.model["solves"]} | cache hits: {self.model["hits"]}'
+
+    def _cache_get(self, parameters: tuple) -> typing.Optional[nx.DiGraph]:
+        cache = self.model['cache']
+        if parameters in cache:
+            cache.move_to_end(parameters)
+            self.model['hits'] += 1
+            return cache[parameters]
+        return None
+
+    def _on_ratio(self, event):
+        node = self.view['node'].value
+        if node is None or self.model.get('selecting', False):
+            return
+        self.model['ratios'][node] = float(event.new)
+        self.request()
+
+    def _on_node(self, event):
+        # show the ratio of the selected node without treating it as an edit
+        ratios = self.model['frame'].set_index(node_attrs.label.column)[node_attrs.optimal_ratio.column]
+        self.model['selecting'] = True
+        try:
+            self.view['ratio'].value = self.model['ratios'].get(event.new, float(ratios[event.new]))
+        finally:
+            self.model['selecting'] = False
+
+    @staticmethod
+    def _make_plot(graph: nx.DiGraph, vdim: str):
+        return allocate.plotting.node_attr_bar_plot.get_plot_object(
+            graph, kdims=allocate.plotting.node_attr_table.NODE, vdims=vdim,
+            mask=allocate.network.algorithms.leaf_mask)
@@ -0,0 +1,136 @@
+"""
+A widget that follows the results of a batch run as they are written.
+
+The results directory is polled from a background thread, so reading files never blocks the event loop.
+Each poll reads only the records appended since the last one, and updates the counters, the recent
+errors, and the totals per fund, on the thread of the document's event loop. A poll that fails, such as
+on a file that is still being copied, is logged and tried again on the next one. The record of an account
+is read from disk only when it is selected.
+"""
+import panel.viewable
+import holoviews as hv
+import pandas as pd
+import panel as pn
+import dataclasses
+import functools
+import threading
+import logging
+import typing
+
+from .base import Widget
+
+import allocate.plotting.node_attr_bar_plot
+import allocate.batch
+
+from allocate.plotting.node_attr_table import NODE
+
+
+FUND: str = 'fund'
+AMOUNT: str = 'amount'
+
+
+@dataclasses.dataclass()
+class ResultsMonitor(Widget):
+    """Follow a directory of batch results."""
+    #: The directory with the .jsonl and .parquet results
+    directory: typing.Optional[str] = None
+    #: The seconds between polls of the directory
+    period: float = 1.0
+    #: The largest number of funds to show, the rest are summed into an other bar
+    max_funds: int = 32
+
+    def __setup__(self):
+        """Setup the model and view for the widget."""
+        self.model['tailer'] = allocate.batch.ResultsTailer(self.directory or '')
+        self.model['stop'] = threading.Event()
+        self.model['thread'] = None
+        self.model['doc'] = None
+        self.view['counters'] = pn.pane.Markdown('')
+        self.view['errors'] = pn.pane.DataFrame(pd.DataFrame(columns=['account', 'error']), max_rows=20)
+        self.view['totals'] = pn.pane.HoloViews(self._make_plot({}), sizing_mode='stretch_width')
+        self.view['account'] = pn.widgets.TextInput(placeholder='account')
+        self.view['record'] = pn.pane.JSON({}, depth=2)
+
+    def __layout__(self) -> panel.viewable.Viewable:
+        """Layout the objects in the view."""
+        return pn.Column(
+            self.view['counters'],
+            pn.Row(self.view['totals'], self.view['errors'], sizing_mode='stretch_width'),
+            pn.Row(self.view['account'], self.view['record']),
+            sizing_mode='stretch_width')
+
+    def __connect__(self):
+        """Connect widgets together in the view."""
+        self.view['account'].param.watch(lambda event: self.select(event.new), 'value')
+        self.start()
+
+    def start(self):
+        """Start polling the directory in a background thread."""
+        if self.model['thread'] is None and self.directory is not None:
+            self.model['doc'] = pn.state.curdoc
+            self.model['stop'].clear()
+            self.model['thread'] = threading.Thread(target=self._run, daemon=True)
+            self.model['thread'].start()
+
+    def close(self):
+        """Stop polling the directory."""
+        self.model['stop'].set()
+        if self.model['thread'] is not None:
+            self.model['thread'].join()
+            self.model['thread'] = None
+
+    def update(self) -> int:
+        """
+        Read the new results, and update the view if there were any.
+
+        Returns:
+            The number of records read.
+        """
+        tailer: allocate.batch.ResultsTailer = self.model['tailer']
+        n_records = tailer.poll()
+        # the new objects are made here, and only set on the view from the thread of the document
+        objects = dict(counters=self._format_counters(tailer))
+        if n_records:
+            objects.update(errors=pd.DataFrame(list(tailer.errors)[::-1], columns=['account', 'error']),
+                           totals=self._make_plot(tailer.totals))
+        self._schedule(functools.partial(self._show, objects))
+        return n_records
+
+    def select(self, account: str) -> typing.Optional[dict]:
+        """
+        Show the record of a single account, read from disk.
+        """
+        record = self.model['tailer'].load(account) if account else None
+        self.view['record'].object = record if record is not None else {}
+        return record
+
+    def _run(self):
+        while not self.model['stop'].is_set():
+            try:
+                self.update()
+            except Exception:
+                logging.exception('can not poll results! %s', self.directory)
+            self.model['stop'].wait(self.period)
+
+    def _schedule(self, callback: typing.Callable[[], None]):
+        # bokeh models may only be changed from the thread of the document's event loop
+        doc = self.model['doc']
+        if doc is not None and doc.session_context is not None:
+            doc.add_next_tick_callback(callback)
+        else:
+            callback()
+
+    def _show(self, objects: typing.Dict[str, typing.Any]):
+        for name, obj in objects.items():
+            self.view[name].object = obj
+
+    @staticmethod
+    def _format_counters(tailer: allocate.batch.ResultsTailer) -> str:
+        return f'accounts: {tailer.total:,} | ok: {tailer.counts[allocate.batch.OK]:,} | ' \
+               f'errors: {tailer.counts[allocate.batch.ERROR]:,} | throughput: {tailer.throughput:,.1f}/s'
+
+    def _make_plot(self, totals: typing.Dict[str, float]) -> hv.Element:
+        data = pd.DataFrame({NODE: list(totals.keys()), AMOUNT: list(totals.values())}, columns=[NODE, AMOUNT])
+        data = allocate.plotting.node_attr_bar_plot.aggregate(data, [AMOUNT], top_k=self.max_funds)
+        return hv.Bars(data.rename(columns={NODE: FUND}), FUND, AMOUNT).opts(
+            fontscale=2, max_width=1024, tools=['hover'], fill_alpha=0.75, line_width=0)
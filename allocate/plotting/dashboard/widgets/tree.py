@@ -0,0 +1,288 @@
+"""
+A widget that browses a solved graph as a collapsible tree.
+
+Only the page of rows on screen is ever built. The rows are walked from the root through the expanded
+nodes, and an expanded node shows its children a chunk at a time, with a row for the children not
+loaded yet, so neither the size of the graph nor the number of children of a node changes the cost of
+showing a page. Labels are searched by prefix through a sorted index, and a match is revealed by
+expanding its ancestors, without loading the siblings along its path.
+"""
+import panel.viewable
+import networkx as nx
+import pandas as pd
+import panel as pn
+import dataclasses
+import itertools
+import bisect
+import typing
+import html
+
+from .base import Widget
+
+from allocate.network.attributes import node_attrs
+
+import allocate.network.algorithms
+
+
+LABEL: str = 'label'
+NODE: str = 'node'
+MORE: str = '… {} more'
+BADGES: typing.Dict[str, str] = {
+    node_attrs.optimal_ratio.column: '{:.3f}',
+    node_attrs.results_ratio.column: '{:.3f}',
+    node_attrs.amount_to_add.column: '{:,.2f}',
+}
+
+
+class LabelIndex:
+    """
+    A sorted index of the labels of a graph, for searching by case insensitive prefix in O(log n).
+    """
+    def __init__(self, labels: typing.Iterable[typing.Any]):
+        pairs = sorted((str(label).casefold(), label) for label in labels)
+        self.keys: typing.List[str] = [k for k, _ in pairs]
+        self.labels: list = [v for _, v in pairs]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, prefix: str, limit: int = 20) -> list:
+        """
+        The labels starting with the prefix, in sorted order.
+
+        Parameters:
+            prefix: The start of the labels to find, ignoring case.
+            limit: The largest number of labels to return.
+
+        Returns:
+            At most limit labels.
+        """
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = start
+        while stop < len(self.keys) and stop - start < limit and self.keys[stop].startswith(prefix):
+            stop += 1
+        return self.labels[start:stop]
+
+
+@dataclasses.dataclass(frozen=True)
+class Row:
+    """
+    A row of the tree, a node, or the children of a node that are not loaded yet.
+    """
+    # The label of the node, or of the parent for the row of children not loaded yet
+    label: typing.Any
+    # The number of edges from the root
+    depth: int
+    # The number of children not loaded yet, or None for the row of a node
+    hidden: typing.Optional[int] = None
+
+
+@dataclasses.dataclass()
+class TreeView(Widget):
+    """Browse a graph as a collapsible tree."""
+    #: The graph to browse, or None for an empty tree
+    graph: typing.Optional[nx.DiGraph] = None
+    #: The number of rows on a page
+    page_size: int = 50
+    #: The number of children loaded at a time when expanding a node
+    chunk: int = 100
+    #: The largest number of search results to show
+    max_matches: int = 20
+
+    def __setup__(self):
+        """Setup the model and view for the widget."""
+        self.view['search'] = pn.widgets.TextInput(placeholder='search labels')
+        self.view['matches'] = pn.widgets.Select(options=[], size=1)
+        self.view['previous'] = pn.widgets.Button(label='◀', width=40)
+        self.view['next'] = pn.widgets.Button(label='▶', width=40)
+        self.view['page'] = pn.pane.Markdown('')
+        self.view['table'] = pn.widgets.Tabulator(
+            pd.DataFrame(columns=[NODE]), formatters={NODE: {'type': 'html'}}, show_index=False,
+            selectable=False, disabled=True, header_filters=False, sizing_mode='stretch_width')
+        self.load(self.graph)
+
+    def __layout__(self) -> panel.viewable.Viewable:
+        """Layout the objects in the view."""
+        return pn.Column(
+            pn.Row(self.view['search'], self.view['matches']),
+            pn.Row(self.view['previous'], self.view['page'], self.view['next']),
+            self.view['table'],
+            sizing_mode='stretch_width')
+
+    def __connect__(self):
+        """Connect widgets together in the view."""
+        self.view['search'].param.watch(lambda event: self._on_search(event.new), 'value_input')
+        self.view['matches'].param.watch(lambda event: self.reveal(event.new), 'value')
+        self.view['previous'].on_click(lambda event: self.scroll(-self.page_size))
+        self.view['next'].on_click(lambda event: self.scroll(+self.page_size))
+        self.view['table'].on_click(self._on_click)
+
+    def load(self, graph: typing.Optional[nx.DiGraph]):
+        """
+        Browse a new graph, indexing its labels and collapsing every node but the root.
+        """
+        self.graph = graph
+        self.model['index'] = LabelIndex(graph if graph is not None else [])
+        self.model['root'] = allocate.network.algorithms.get_graph_root(graph) if graph else None
+        self.model['expanded'] = {}
+        self.model['pinned'] = {}
+        self.model['offset'] = 0
+        if self.model['root'] is not None:
+            self.expand(self.model['root'])
+        self.render()
+
+    def update(self, graph: nx.DiGraph):
+        """
+        Browse a graph with the same nodes as the current one, such as a new solve, keeping the index and the
+        expanded nodes.
+        """
+        self.graph = graph
+        self.render()
+
+    def rows(self, start: int = 0, stop: typing.Optional[int] = None) -> typing.List[Row]:
+        """
+        The rows of the tree from start to stop, walking only the rows before stop.
+        """
+        return list(itertools.islice(self._walk(), start, stop))
+
+    def expand(self, label: typing.Any):
+        """
+        Show the first chunk of the children of a node.
+        """
+        self.model['expanded'].setdefault(label, self.chunk)
+        self.render()
+
+    def collapse(self, label: typing.Any):
+        """
+        Hide the children of a node.
+        """
+        self.model['expanded'].pop(label, None)
+        self.model['pinned'].pop(label, None)
+        self.render()
+
+    def toggle(self, label: typing.Any):
+        """
+        Expand a collapsed node, or collapse an expanded one.
+        """
+        if label in self.model['expanded']:
+            self.collapse(label)
+        else:
+            self.expand(label)
+
+    def more(self, label: typing.Any):
+        """
+        Show the next chunk of the children of an expanded node.
+        """
+        self.model['expanded'][label] = self.model['expanded'].get(label, 0) + self.chunk
+        self.render()
+
+    def search(self, prefix: str) -> list:
+        """
+        The labels starting with the prefix, ignoring case.
+        """
+        return self.model['index'].search(prefix, self.max_matches) if prefix else []
+
+    def reveal(self, label: typing.Any) -> typing.Optional[int]:
+        """
+        Expand the ancestors of a node, and scroll to the page with the node.
+
+        Returns:
+            The position of the node's row, or None if the node is not in the graph.
+        """
+        if self.graph is None or label not in self.graph:
+            return None
+        # the node is shown under its parent even if it is not in a loaded chunk
+        child = label
+        for parent in self._ancestors(label):
+            self.model['expanded'].setdefault(parent, self.chunk)
+            pinned = self.model['pinned'].setdefault(parent, [])
+            if child not in pinned:
+                pinned.append(child)
+            child = parent
+
+        position = next(i for i, row in enumerate(self._walk()) if row.hidden is None and row.label == label)
+        self.model['offset'] = position - position % self.page_size
+        self.render()
+        return position
+
+    def scroll(self, rows: int):
+        """
+        Move the page by a number of rows, stopping at the first row.
+        """
+        self.model['offset'] = max(0, self.model['offset'] + rows)
+        self.render()
+
+    def render(self):
+        """
+        Show the rows of the current page.
+        """
+        offset = self.model['offset']
+        page = self.rows(offset, offset + self.page_size)
+        if not page and offset > 0:
+            # past the last row, show the last page
+            n_rows = sum(1 for _ in itertools.islice(self._walk(), offset))
+            self.model['offset'] = offset = max(0, n_rows - 1) // self.page_size * self.page_size
+            page = self.rows(offset, offset + self.page_size)
+        self.model['page'] = page
+        self.view['table'].value = pd.DataFrame({NODE: [self._format_row(row) for row in page]}, columns=[NODE])
+        self.view['page'].object = f'rows {offset + 1 if page else 0:,} to {offset + len(page):,}'
+
+    def _walk(self) -> typing.Generator[Row, None, None]:
+        root = self.model['root']
+        if root is None:
+            return
+        stack = [iter([Row(root, 0)])]
+        while stack:
+            row = next(stack[-1], None)
+            if row is None:
+                stack.pop()
+                continue
+            yield row
+            if row.hidden is None and row.label in self.model['expanded']:
+                stack.append(self._children(row.label, row.depth + 1))
+
+    def _children(self, label: typing.Any, depth: int) -> typing.Generator[Row, None, None]:
+        children = list(itertools.islice(self.graph.successors(label), self.model['expanded'][label]))
+        loaded = set(children)
+        children.extend(c for c in self.model['pinned'].get(label, []) if c not in loaded)
+        for child in children:
+            yield Row(child, depth)
+        # noinspection PyCallingNonCallable
+        hidden = self.graph.out_degree(label) - len(children)
+        if hidden > 0:
+            yield Row(label, depth, hidden)
+
+    def _ancestors(self, label: typing.Any) -> typing.Generator[typing.Any, None, None]:
+        parent = next(iter(self.graph.predecessors(label)), None)
+        while parent is not None:
+            yield parent
+            parent = next(iter(self.graph.predecessors(parent)), None)
+
+    def _format_row(self, row: Row) -> str:
+        indent = '&nbsp;' * 4 * row.depth
+        if row.hidden is not None:
+            return f'{indent}<i>{html.escape(MORE.format(row.hidden))}</i>'
+
+        # noinspection PyCallingNonCallable
+        if self.graph.out_degree(row.label) == 0:
+            caret = '&nbsp;'
+        else:
+            caret = '▾' if row.label in self.model['expanded'] else '▸'
+
+        data = self.graph.nodes[row.label]
+        badges = ''.join(
+            f' <span style="border-radius:4px;padding:0 4px;background:#eee" title="{k}">{f.format(data[k])}</span>'
+            for k, f in BADGES.items() if data.get(k) is not None)
+        return f'{indent}{caret} {html.escape(str(row.label))}{badges}'
+
+    def _on_search(self, prefix: str):
+        self.view['matches'].options = self.search(prefix)
+
+    def _on_click(self, event):
+        if 0 <= event.row < len(self.model['page']):
+            row = self.model['page'][event.row]
+            if row.hidden is not None:
+                self.more(row.label)
+            else:
+                self.toggle(row.label)
@@ -1,8 +1,16 @@
 """
 Create a bar plot of a single node attribute.
+
+Large trees are reduced in pandas before they are plotted, so the plot stays under a fixed number of bars.
+The nodes can be rolled up to a level of the tree, summing the values of the leaves under each node, and
+only the top k nodes ranked by their value, or by the spread of their value over the graphs, are kept with
+the rest summed into a single other bar per graph.
 """
 import holoviews as hv
 import networkx as nx
+import pandas as pd
+import numpy as np
+import functools
 import typing
 
 import allocate.network.algorithms
@@ -15,9 +23,15 @@ from allocate.network.attributes import node_attrs
 hv.extension('bokeh')
 
 
+OTHER: str = 'other'
+MAX_BARS: int = 1024
+
+
 def get_plot_object(graph: nx.DiGraph, *graphs: nx.DiGraph,
                     kdims: typing.Union[typing.Iterable[str], str] = (NODE, G_ID),
                     vdims: typing.Union[typing.Iterable[str], str] = node_attrs.current_value.column,
+                    level: typing.Optional[int] = None, top_k: typing.Optional[int] = None,
+                    rank_by: str = 'value', max_bars: typing.Optional[int] = MAX_BARS,
                     **kwargs) -> hv.Element:
     """
     Create the plot object.
@@ -26,6 +40,11 @@ def get_plot_object(graph: nx.DiGraph, *graphs: nx.DiGraph,
         graph: The graph to extract data from.
         kdims: The node attributes to use for bins.
         vdims: The node attributes to use for bars.
+        level: Roll the tree up to the nodes at this level, keeping shallower leaves, with the float
+            attributes of each node summed over the leaves under it.
+        top_k: Keep the top k nodes, and sum the rest into an other bar for each graph.
+        rank_by: Rank the nodes by their total value, or by the deviation of their value between graphs.
+        max_bars: Keep fewer nodes if needed so that there are no more than this many bars.
         **kwargs: Additional parameters of node_attr_table.create method.
 
     Returns:
@@ -40,8 +59,131 @@ def get_plot_object(graph: nx.DiGraph, *graphs: nx.DiGraph,
     kdims = list(kdims)
     vdims = list(vdims)
 
-    data = allocate.plotting.node_attr_table.create(graph, *graphs, vdims=vdims, **kwargs)
+    if level is not None:
+        mask = kwargs.get('mask', None)
+        kwargs['mask'] = level_mask(level) if mask is None else _combine_masks(mask, level_mask(level))
+        # the float attributes of the nodes at the level are the sums over the leaves under them
+        rolled = [v for v in vdims if v not in kdims and _is_float(v)]
+        kwargs['columns'] = {**{v: leaf_sum(v) for v in rolled}, **(kwargs.get('columns', None) or {})}
+        kwargs['vdims'] = [v for v in vdims if v not in rolled]
+    else:
+        kwargs['vdims'] = vdims
+
+    data = allocate.plotting.node_attr_table.create(graph, *graphs, **kwargs)
+    data = aggregate(data, [v for v in vdims if v not in kdims], top_k=top_k, rank_by=rank_by, max_bars=max_bars)
     plot = hv.Bars(data, kdims, [v for v in vdims if v not in kdims])
     plot = plot.opts(fontscale=2, max_width=1024, tools=['hover'], fill_color=hv.dim(kdims[0]),
                      cmap='Colorblind', fill_alpha=0.75, line_width=0, show_legend=True)
     return plot
+
+
+def aggregate(data: pd.DataFrame, vdims: typing.List[str], top_k: typing.Optional[int] = None,
+              rank_by: str = 'value', max_bars: typing.Optional[int] = MAX_BARS) -> pd.DataFrame:
+    """
+    Keep the top k nodes of a node attribute table, and sum the rest into an other row for each graph.
+
+    Parameters:
+        data: The table made by node_attr_table.create.
+        vdims: The node attributes to rank and to sum, ranked by the first one.
+        top_k: The number of nodes to keep, or None to keep them all.
+        rank_by: Rank the nodes by their total value ('value'), or by their max minus min over graphs ('deviation').
+        max_bars: Keep fewer nodes if needed so that there are no more than this many rows.
+
+    Returns:
+        The reduced table, with the kept nodes in their original order and then the other rows.
+    """
+    if rank_by not in ['value', 'deviation']:
+        raise ValueError(f'unknown rank! {rank_by}')
+
+    if data.empty or not vdims or NODE not in data:
+        return data
+
+    # the graphs with rows, a graph without any nodes has no bars
+    g_ids = pd.unique(data[G_ID]) if G_ID in data else [0]
+    if max_bars is not None and len(data) > max_bars:
+        if G_ID in data and len(g_ids) > max_bars:
+            # not even an other bar fits for every graph, so only the first graphs are shown
+            g_ids = g_ids[:max_bars]
+            data = data[data[G_ID].isin(g_ids).to_numpy()]
+        # one bar for each graph is left for the other node
+        k = max(0, max_bars // max(1, len(g_ids)) - 1)
+        top_k = k if top_k is None else min(top_k, k)
+
+    nodes = pd.unique(data[NODE])
+    if top_k is None or top_k >= len(nodes):
+        return data
+
+    values = pd.to_numeric(data[vdims[0]], errors='coerce').fillna(0.0)
+    if rank_by == 'value':
+        scores = values.groupby(data[NODE].values, sort=False).sum()
+    else:
+        table = pd.crosstab(data[NODE].values, data[G_ID].values if G_ID in data else 0, values=values,
+                            aggfunc='sum').reindex(columns=g_ids).fillna(0.0)
+        scores = table.max(axis=1) - table.min(axis=1)
+
+    kept = scores.index[np.argsort(-scores.to_numpy(), kind='stable')[:top_k]]
+    keep = data[NODE].isin(kept).to_numpy()
+    rest = data[~keep]
+
+    numeric = [v for v in vdims if pd.api.types.is_numeric_dtype(rest[v])]
+    if G_ID in data:
+        other = rest.groupby(G_ID, observed=True)[numeric].sum().reset_index()
+    else:
+        other = rest[numeric].sum().to_frame().T
+    other.insert(1 if G_ID in data else 0, NODE, OTHER)
+    return pd.concat([data[keep], other], ignore_index=True)
+
+
+@functools.lru_cache(maxsize=None)
+def level_mask(level: int) -> typing.Callable[[nx.DiGraph, list], np.array]:
+    """
+    A node_attr_table mask for the nodes at a level of the tree, and the leaves above it.
+    The same mask is returned for the same level, so that it can be part of a table cache key.
+    """
+    def mask(graph: nx.DiGraph, nodes: list) -> np.array:
+        levels = nx.get_node_attributes(graph, node_attrs.level.column)
+        if len(levels) < len(graph):
+            levels = nx.single_source_shortest_path_length(graph, allocate.network.algorithms.get_graph_root(graph))
+        # noinspection PyCallingNonCallable
+        out_degree = graph.out_degree(nodes)
+        return np.fromiter(
+            (levels[n] == level or (levels[n] < level and out_degree[n] == 0) for n in nodes),
+            dtype=bool, count=len(nodes))
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def leaf_sum(key: str) -> typing.Callable[[nx.DiGraph, list], np.array]:
+    """
+    A node_attr_table column with the sum of a node attribute over the leaves under each node.
+    The same column is returned for the same attribute, so that it can be part of a table cache key.
+    """
+    def column(graph: nx.DiGraph, nodes: list) -> np.array:
+        totals = {}
+        source = allocate.network.algorithms.get_graph_root(graph)
+        # the children of each node are summed before the node itself
+        for node in reversed(list(nx.dfs_preorder_nodes(graph, source))):
+            children = list(graph.successors(node))
+            if children:
+                totals[node] = sum(totals[c] for c in children)
+            else:
+                value = graph.nodes[node].get(key, None)
+                totals[node] = 0.0 if value is None else float(value)
+        return np.fromiter((totals[n] for n in nodes), dtype=float, count=len(nodes))
+    return column
+
+
+def _is_float(key: str) -> bool:
+    schema = node_attrs.schema
+    return key in schema.positions and schema.dtype[key] == np.float64
+
+
+@functools.lru_cache(maxsize=None)
+def _combine_masks(*masks: typing.Optional[typing.Callable]) -> typing.Callable[[nx.DiGraph, list], np.array]:
+    def mask(graph: nx.DiGraph, nodes: list) -> np.array:
+        keep = np.ones(len(nodes), dtype=bool)
+        for m in masks:
+            if m is not None:
+                keep &= np.asarray(m(graph, nodes), dtype=bool)
+        return keep
+    return mask
@@ -1,19 +1,91 @@
 """
 Create a data frame for plotting node attributes of a graph.
+
+The frame is built a column at a time for each graph, and the graphs are stacked with the graph index
+in a categorical g_id column. Filters and properties can be evaluated once per graph over all its nodes::
+
+    create(*graphs, vdims='current_value', mask=allocate.network.algorithms.leaf_mask)
+
+while should_extract and add_properties are still evaluated once per node. The frame of each graph
+can be kept in a TableCache, keyed by the identity of the graph and its version (see touch).
 """
 import networkx as nx
 import pandas as pd
+import numpy as np
+import collections
+import weakref
 import typing
 
+from allocate.network.attributes import node_attrs
+
 
 G_ID: str = 'g_id'
 NODE: str = 'node'
+VERSION: str = 'version'
+
+
+class TableCache:
+    """
+    A least recently used cache of the frame extracted from each graph.
+    A graph must be touched after it is changed, so that its old frame is not used.
+    """
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._frames: typing.OrderedDict[tuple, typing.Tuple[weakref.ref, pd.DataFrame]] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, graph: nx.DiGraph, key: tuple) -> typing.Optional[pd.DataFrame]:
+        """
+        The cached frame of a graph, or None.
+        """
+        key = (id(graph), graph.graph.get(VERSION, 0)) + key
+        if key in self._frames:
+            ref, frame = self._frames[key]
+            # the id of a graph can be reused once it is garbage collected
+            if ref() is graph:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            del self._frames[key]
+        self.misses += 1
+        return None
+
+    def put(self, graph: nx.DiGraph, key: tuple, frame: pd.DataFrame):
+        """
+        Cache the frame of a graph, dropping the least recently used frame when full.
+        """
+        key = (id(graph), graph.graph.get(VERSION, 0)) + key
+        self._frames[key] = (weakref.ref(graph), frame)
+        self._frames.move_to_end(key)
+        while len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every cached frame.
+        """
+        self._frames.clear()
+
+
+def touch(graph: nx.DiGraph) -> nx.DiGraph:
+    """
+    Increase the version of a graph after changing it, so that cached frames of the graph are not used.
+    """
+    graph.graph[VERSION] = graph.graph.get(VERSION, 0) + 1
+    return graph
 
 
 def create(*graphs: nx.DiGraph,
            vdims: typing.Union[typing.Iterable[str], str] = None,
-           should_extract: typing.Callable = lambda g, n: True,
-           add_properties: typing.Dict[str, typing.Callable] = None) -> pd.DataFrame:
+           should_extract: typing.Callable = None,
+           add_properties: typing.Dict[str, typing.Callable] = None,
+           mask: typing.Callable = None,
+           columns: typing.Dict[str, typing.Callable] = None,
+           cache: typing.Optional[TableCache] = None) -> pd.DataFrame:
     """
     Create a data frame for plotting node attributes of a graph.
 
@@ -22,6 +94,9 @@ def create(*graphs: nx.DiGraph,
         vdims: The names of the node attributes to extract.
         should_extract: A filter function taking the graph and node as input.
         add_properties: A mapping from names to functions that can extract node properties.
+        mask: A filter function taking the graph and its nodes as input, returning a boolean per node.
+        columns: A mapping from names to functions taking the graph and its nodes, returning a value per node.
+        cache: A cache for the frame extracted from each graph.
 
     Returns:
         A data frame node attributes for plotting.
@@ -29,23 +104,57 @@ def create(*graphs: nx.DiGraph,
     if vdims is not None and isinstance(vdims, str):
         vdims = [vdims]
 
-    def iterrows():
-        for g_id, graph in enumerate(graphs):
-            for node in graph:
-                if should_extract(graph, node):
-                    data = {
-                        G_ID: g_id,
-                        NODE: node,
-                    }
-                    if vdims:
-                        for vdim in vdims:
-                            data[vdim] = graph.nodes[node].get(vdim, None)
-                    else:
-                        for vdim in graph.nodes[node]:
-                            data[vdim] = graph.nodes[node].get(vdim, None)
-                    if add_properties is not None:
-                        for name, method in add_properties.items():
-                            data[name] = method(graph, node)
-                    yield data
-
-    return pd.DataFrame(iterrows())
+    vdims = list(vdims) if vdims else None
+    key = (tuple(vdims) if vdims else None, should_extract, mask,
+           tuple((add_properties or {}).items()), tuple((columns or {}).items()))
+
+    frames = []
+    for graph in graphs:
+        frame = cache.get(graph, key) if cache is not None else None
+        if frame is None:
+            frame = _extract(graph, vdims, should_extract, add_properties, mask, columns)
+            if cache is not None:
+                cache.put(graph, key, frame)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=[G_ID, NODE])
+
+    g_ids = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+    frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].copy()
+    frame.insert(0, G_ID, pd.Categorical.from_codes(g_ids, categories=range(len(frames))))
+    return frame
+
+
+def _extract(graph: nx.DiGraph, vdims: typing.Optional[list],
+             should_extract: typing.Optional[typing.Callable], add_properties: typing.Optional[dict],
+             mask: typing.Optional[typing.Callable], columns: typing.Optional[dict]) -> pd.DataFrame:
+    """
+    Extract the frame of a single graph, one column at a time.
+    """
+    nodes = list(graph)
+    keep = np.ones(len(nodes), dtype=bool)
+    if mask is not None:
+        keep &= np.asarray(mask(graph, nodes), dtype=bool)
+    if should_extract is not None:
+        keep &= np.fromiter((should_extract(graph, n) for n in nodes), dtype=bool, count=len(nodes))
+    if not np.all(keep):
+        nodes = [n for n, k in zip(nodes, keep.tolist()) if k]
+
+    data = [graph.nodes[n] for n in nodes]
+    schema = node_attrs.schema
+    if vdims is None:
+        vdims = list(dict.fromkeys(k for d in data for k in d))
+
+    table = {NODE: nodes}
+    for vdim in vdims:
+        # the float attributes are read straight into typed arrays, where missing values are nan
+        if vdim in schema.positions and schema.dtype[vdim] == np.float64:
+            table[vdim] = np.fromiter((d.get(vdim, np.nan) for d in data), dtype=float, count=len(data))
+        else:
+            table[vdim] = [d.get(vdim, None) for d in data]
+    for name, method in (add_properties or {}).items():
+        table[name] = [method(graph, n) for n in nodes]
+    for name, method in (columns or {}).items():
+        table[name] = method(graph, nodes)
+    return pd.DataFrame(table)
@@ -0,0 +1,83 @@
+"""
+Replay a capture of recorded bucket problems against a solver and report latency and differences.
+
+    python -m allocate --config allocate.yaml --constrained --record capture.npz
+    python -m allocate.replay --capture capture.npz --solver simple
+"""
+import importlib
+import argparse
+import logging
+import os
+
+import allocate.configure
+import allocate.solvers.recorder
+import allocate.solvers.montecarlo
+import allocate.solvers.constrained
+import allocate.solvers.unconstrained
+import allocate.solvers.withdrawal
+import allocate.solvers.bounded
+
+
+SOLVERS = {
+    'simple': allocate.solvers.unconstrained.BucketSolverSimple,
+    'constrained': allocate.solvers.constrained.BucketSolverConstrained,
+    'bounded': allocate.solvers.bounded.BucketSolverBounded,
+    'withdrawal': allocate.solvers.withdrawal.BucketSolverWithdrawal,
+    'montecarlo': allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo,
+}
+
+
+def get_solver(name: str):
+    """
+    Find a solver class by short name or by dotted path, such as package.module.Class.
+    """
+    try:
+        return SOLVERS[name]
+    except KeyError:
+        pass
+
+    module, _, attr = name.rpartition('.')
+    if not module:
+        raise ValueError(f'unknown solver! {name}')
+    return getattr(importlib.import_module(module), attr)
+
+
+# noinspection DuplicatedCode
+def get_arguments(args=None) -> argparse.Namespace:
+    """
+    Get the command line arguments.
+    """
+    # noinspection PyTypeChecker
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capture', required=True, type=os.path.abspath,
+                        help='The .npz or .jsonl capture file to replay')
+    parser.add_argument('--solver', default='constrained',
+                        help=f'The solver to replay against ({", ".join(SOLVERS)} or a dotted class path)')
+    parser.add_argument('--use-recorded-kwargs', dest='use_recorded_kwargs', action='store_true',
+                        help='Pass the recorded solver kwargs through to the solver')
+    return parser.parse_args(args=args)
+
+
+def main(capture: str, solver: str, use_recorded_kwargs: bool):
+    """
+    The main logic of the script.
+    """
+    recorder = allocate.solvers.recorder.Recorder.load(capture)
+    logging.debug('capture: %s (%d calls)', capture, len(recorder.calls))
+    report = allocate.solvers.recorder.replay(
+        recorder.calls, solver=get_solver(solver), use_recorded_kwargs=use_recorded_kwargs)
+    logging.debug('replay:\n%s', report)
+    return report
+
+
+if __name__ == '__main__':
+    # noinspection PyBroadException
+    try:
+        allocate.configure.pandas()
+        allocate.configure.logging()
+        opts = get_arguments()
+        main(**opts.__dict__)
+    except Exception:
+        logging.exception('caught unhandled exception!')
+        exit(-1)
+    exit(0)
@@ -1,7 +1,10 @@
 """
 A base class for solutions to the bucket problem.
 """
+import numpy as np
 import dataclasses
+import typing
+import time
 
 from allocate.utilities import moneyfmt
 
@@ -20,6 +23,13 @@ class BucketSolver:
     result_delta: BucketData
     # The amounts in each bucket after adding the results
     result_total: BucketData
+    # Did the solver run out of time and return its best answer so far?
+    truncated: bool = False
+    # Does the solver take amounts out of buckets (amount_to_add <= 0) instead of adding them?
+    withdrawal: typing.ClassVar[bool] = False
+    # Do the amounts added move by the optimal ratios times any change in the amount to add? Only read from the
+    # class that sets it, since a subclass that changes the solve is not linear unless it says so
+    linear: typing.ClassVar[bool] = False
 
     @classmethod
     def solve(cls, system: BucketSystem, **kwargs) -> 'BucketSolver':
@@ -28,6 +38,13 @@ class BucketSolver:
         """
         raise NotImplementedError
 
+    @property
+    def residual(self) -> float:
+        """
+        The distance between the ratios of the result and the optimal ratios.
+        """
+        return float(np.linalg.norm(self.result_total.ratios - self.system.optimal.ratios))
+
     def __str__(self):
         return fr"""
 {self.__class__.__name__}
@@ -45,3 +62,16 @@ total.amount   : {moneyfmt(self.result_total.amount)}
 differ.amount  : {moneyfmt(self.result_delta.amount - self.system.amount_to_add)}
 differ.ratios  : {moneyfmt(*(self.result_total.ratios - self.system.optimal.ratios), decimals=5)}
 """[1:]
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised inside a solver to abandon an iterative solve when the deadline passes.
+    """
+
+
+def expired(deadline: typing.Optional[float]) -> bool:
+    """
+    Has the deadline, a time.monotonic() value or None for no deadline, passed?
+    """
+    return deadline is not None and time.monotonic() >= deadline
@@ -0,0 +1,59 @@
+"""
+Solve the bucket problem, but do not allow moving values between buckets, and keep each bucket within bounds.
+In this version of the problem, we can only add to buckets, and the value in each bucket after the solve
+must be between its min_value and max_value, for example to cap a fund or to require a minimum holding.
+"""
+import numpy as np
+import dataclasses
+
+from allocate.solvers.bucketdata import BucketSystem
+from allocate.solvers.bucketdata import BucketData
+
+from allocate.solvers.unconstrained import BucketSolverSimple
+
+import allocate.solvers.projection
+
+
+@dataclasses.dataclass()
+class BucketSolverBounded(BucketSolverSimple):
+    """
+    Solve the bucket problem, but do not allow moving values between buckets, and keep each bucket within bounds.
+
+    Since the problem minimizes ||x - b||^2, the solution is the projection of the unconstrained solution b
+    onto {x : lower <= x <= upper, sum(x) = amount}, found exactly in O(n log n) by a breakpoint search.
+    """
+    # The lower bound on the amount added to each bucket
+    lower: np.array = None
+    # The upper bound on the amount added to each bucket
+    upper: np.array = None
+
+    # noinspection PyUnusedLocal
+    @classmethod
+    def solve(cls, system: BucketSystem, deadline: float = None) -> 'BucketSolverBounded':
+        """
+        Solve the bucket problem.
+        The solution is closed form, so the deadline is accepted for compatibility but never truncates.
+        """
+        a_matrix = cls._make_a_matrix(system)
+        b_vector = cls._make_b_vector(system)
+        lower, upper = cls._make_bounds(system)
+        n_values = allocate.solvers.projection.bounded(b_vector, system.amount_to_add, lower, upper)
+        result_delta = BucketData.from_values(values=np.maximum(n_values, 0.0))
+        result_total = BucketData.from_values(values=system.current.values + result_delta.values)
+        return cls(system=system,
+                   result_delta=result_delta, result_total=result_total,
+                   a_matrix=a_matrix, b_vector=b_vector, lower=lower, upper=upper)
+
+    @staticmethod
+    def _make_bounds(system: BucketSystem) -> (np.array, np.array):
+        """
+        Make the bounds on the amount added to each bucket from the bounds on the values.
+        Nothing is ever removed, so a bucket already above its max_value gets nothing more.
+        """
+        lower = np.zeros_like(system.current.values)
+        upper = np.full_like(system.current.values, np.inf)
+        if system.min_values is not None:
+            lower = np.maximum(system.min_values - system.current.values, 0.0)
+        if system.max_values is not None:
+            upper = np.maximum(system.max_values - system.current.values, lower)
+        return lower, upper
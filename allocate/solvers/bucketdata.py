@@ -2,27 +2,92 @@
 Data structures for solvers for the bucket problem.
 """
 import numpy as np
-import dataclasses
 import logging
 import typing
 
 
+from allocate.utilities import round_cents
 from allocate.utilities import moneyfmt
 
 
-@dataclasses.dataclass(frozen=True)
 class BucketData:
     """
     A container for a set of bucket data, such as the amount in each bucket.
+    The amount, ratios, and labels are computed when first read, as most of them never are.
     """
-    # The total amount in this set of buckets
-    amount: float
-    # The value in each bucket of this set
-    values: np.array
-    # The ratio of values over the bucket set
-    ratios: np.array
-    # The (optional) labels for the buckets
-    labels: list
+    __slots__ = ('_values', '_amount', '_ratios', '_labels', '_cents')
+
+    def __init__(self, values: np.array, amount: float = None, ratios: np.array = None, labels: list = None):
+        """
+        Parameters:
+            values: The value in each bucket of this set, which is not copied.
+            amount: The total amount in this set of buckets, or None for the sum of the values.
+            ratios: The ratio of values over the bucket set, or None to compute them from the values.
+            labels: The (optional) labels for the buckets, or None for their positions.
+        """
+        self._values = values
+        self._amount = amount
+        self._ratios = ratios
+        self._labels = labels
+        self._cents = None
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(amount={self.amount!r}, values={self.values!r}, labels={self.labels!r})'
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def values(self) -> np.array:
+        """The value in each bucket of this set."""
+        return self._values
+
+    @property
+    def amount(self) -> float:
+        """The total amount in this set of buckets."""
+        if self._amount is None:
+            self._amount = float(np.sum(self._values))
+        return self._amount
+
+    @property
+    def ratios(self) -> np.array:
+        """The ratio of values over the bucket set."""
+        if self._ratios is None:
+            amount = self.amount
+            self._ratios = self._values / amount if amount > 0 else np.zeros_like(self._values)
+        return self._ratios
+
+    @property
+    def labels(self) -> list:
+        """The (optional) labels for the buckets."""
+        if self._labels is None:
+            self._labels = list(range(len(self._values)))
+        return self._labels
+
+    def cents(self, total: typing.Optional[int] = None, decimals: int = 2) -> np.array:
+        """
+        The values as int64 cents that sum exactly to a total, see utilities.round_cents.
+
+        Parameters:
+            total: The sum of the cents, or None for the amount rounded to cents.
+            decimals: The number of decimals to round to.
+
+        Returns:
+            The cents in each bucket.
+        """
+        if self._cents is None or self._cents[0] != (total, decimals):
+            self._cents = ((total, decimals), round_cents(self._values, total=total, decimals=decimals))
+        return self._cents[1]
+
+    @classmethod
+    def from_cents(cls, cents: typing.Union[list, np.array], labels: list = None, decimals: int = 2) -> 'BucketData':
+        """
+        Create bucket data set from integer cents, which are kept exactly.
+        """
+        cents = np.asanyarray(cents, dtype=np.int64)
+        data = cls(cents / 10 ** decimals, labels=labels)
+        data._cents = ((None, decimals), cents)
+        return data
 
     @classmethod
     def from_values(cls, values: typing.Union[list, np.array], labels: list = None,
@@ -30,18 +95,12 @@ class BucketData:
         """
         Create bucket data set from list of known values.
         """
-        labels = labels if labels is not None else list(range(len(values)))
         values: np.array = np.asanyarray(values, dtype=float)
 
-        if not allow_negative_values and np.any(values < 0):
+        if not allow_negative_values and len(values) and values.min() < 0:
             raise ValueError('negative values in bucket data!')
 
-        amount = float(np.sum(values))
-        if amount > 0:
-            ratios = values / amount
-        else:
-            ratios = np.zeros_like(values)
-        return cls(amount, values, ratios, labels)
+        return cls(values, labels=labels)
 
     @classmethod
     def from_ratios(cls, ratios: typing.Union[list, np.array], amount: float, labels: list = None) -> 'BucketData':
@@ -52,48 +111,85 @@ class BucketData:
             raise ValueError('negative amount in bucket data!')
 
         ratios = np.asanyarray(ratios)
-        if np.any(ratios < 0):
+        if len(ratios) and ratios.min() < 0:
             raise ValueError('negative ratios in bucket data!')
 
         if amount > 0:
-            if np.all(ratios <= 0):
+            if not np.any(ratios > 0):
                 raise ValueError('all ratios are zero with positive amount!')
 
-        labels = labels if labels is not None else list(range(len(ratios)))
-        ratios = ratios / np.linalg.norm(ratios, 1)
-        ratios[np.isnan(ratios)] = 0.0
+        total = float(np.sum(ratios))
+        ratios = ratios / total if total > 0 else np.zeros(len(ratios))
         values = amount * ratios
-        return cls(amount, values, ratios, labels)
+        return cls(values, amount=amount, ratios=ratios, labels=labels)
 
 
-@dataclasses.dataclass()
 class BucketSystem:
     """
     A container for all the information required to specify the bucket problem.
     """
-    amount_to_add: float
-    current: BucketData
-    optimal: BucketData
+    __slots__ = ('amount_to_add', 'current', 'optimal', 'min_values', 'max_values')
+
+    def __init__(self, amount_to_add: float, current: BucketData, optimal: BucketData,
+                 min_values: np.array = None, max_values: np.array = None):
+        """
+        Parameters:
+            amount_to_add: The amount to distribute over the buckets, negative for a withdrawal.
+            current: The current values in the buckets.
+            optimal: The optimal ratios of the buckets, and the values they give after adding the amount.
+            min_values: The (optional) smallest value allowed in each bucket after the solve.
+            max_values: The (optional) largest value allowed in each bucket after the solve.
+        """
+        self.amount_to_add = amount_to_add
+        self.current = current
+        self.optimal = optimal
+        self.min_values = min_values
+        self.max_values = max_values
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(amount_to_add={self.amount_to_add!r}, current={self.current!r}, ' \
+               f'optimal={self.optimal!r}, min_values={self.min_values!r}, max_values={self.max_values!r})'
 
     @classmethod
     def create(cls, amount_to_add: float,
                current_values: typing.Union[list, np.array],
-               optimal_ratios: typing.Union[list, np.array], labels: list = None) -> 'BucketSystem':
+               optimal_ratios: typing.Union[list, np.array], labels: list = None,
+               min_values: typing.Union[list, np.array] = None,
+               max_values: typing.Union[list, np.array] = None,
+               allow_withdrawal: bool = False) -> 'BucketSystem':
         """
         Create a system to solve from the parameters.
+        The bounds on the values are only used by solvers that support them.
+        A negative amount to add is a withdrawal, and is only allowed when asked for.
         """
-        if amount_to_add < 0:
+        if amount_to_add < 0 and not allow_withdrawal:
             logging.error('amount_to_add: %s', amount_to_add)
             raise ValueError('amount to add is negative or zero')
 
+        if amount_to_add < 0 and -amount_to_add > np.sum(current_values):
+            logging.error('amount_to_add: %s', amount_to_add)
+            raise ValueError('amount to withdraw is more than the current amount')
+
         if len(current_values) != len(optimal_ratios):
             logging.error('current_values: len=%s', len(current_values))
             logging.error('optimal_ratios: len=%s', len(optimal_ratios))
             raise ValueError('length mismatch between values and ratios')
 
+        for bounds in (min_values, max_values):
+            if bounds is not None and len(bounds) != len(current_values):
+                logging.error('current_values: len=%s', len(current_values))
+                logging.error('bounds: len=%s', len(bounds))
+                raise ValueError('length mismatch between values and bounds')
+
+        if min_values is not None:
+            min_values = np.asanyarray(min_values, dtype=float)
+
+        if max_values is not None:
+            max_values = np.asanyarray(max_values, dtype=float)
+
         current = BucketData.from_values(values=current_values, labels=labels)
         optimal = BucketData.from_ratios(ratios=optimal_ratios, amount=current.amount + amount_to_add, labels=labels)
-        return cls(amount_to_add, current, optimal)
+        return cls(amount_to_add, current, optimal, min_values, max_values)
 
     def __str__(self):
         return fr"""
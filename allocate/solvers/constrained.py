@@ -12,6 +12,12 @@ from allocate.solvers.bucketdata import BucketSystem
 from allocate.solvers.bucketdata import BucketData
 
 from allocate.solvers.unconstrained import BucketSolverSimple
+from allocate.solvers.basesolver import DeadlineExceeded
+from allocate.solvers.basesolver import expired
+
+import allocate.solvers.projection
+
+from allocate.instrument import metrics
 
 
 @dataclasses.dataclass()
@@ -21,22 +27,49 @@ class BucketSolverConstrained(BucketSolverSimple):
     In this version of the problem, we can only add to buckets and an optimal solution may not exist.
     """
     @classmethod
-    def solve(cls, system: BucketSystem) -> 'BucketSolverConstrained':
+    def solve(cls, system: BucketSystem, deadline: float = None,
+              analytic: bool = True, warm_start: bool = True) -> 'BucketSolverConstrained':
         """
         Solve the bucket problem.
+        If the deadline (a time.monotonic() value) passes, the unconstrained solution projected onto the
+        constraints is returned instead, and the result is marked as truncated.
+
+        Parameters:
+            system: The bucket problem to solve.
+            deadline: A time.monotonic() value, after which the optimizer is abandoned.
+            analytic: Give SLSQP the analytic gradients, instead of estimating them by finite differences.
+            warm_start: Start from the clipped unconstrained solution, instead of from zeros.
         """
         a_matrix = cls._make_a_matrix(system)
         b_vector = cls._make_b_vector(system)
-        g_vector = cls._make_g_vector(system)
+        if expired(deadline):
+            return cls._solve_projected(system, a_matrix, b_vector)
+
+        if warm_start:
+            g_vector = cls._make_w_vector(system, a_matrix, b_vector)
+        else:
+            g_vector = cls._make_g_vector(system)
         opt_func = cls._make_opt_func(system, a_matrix, b_vector)
+        opt_jac = cls._make_opt_jac(system, a_matrix, b_vector) if analytic else None
         opt_cond = cls._make_opt_cond(system, a_matrix, b_vector)
+        if not analytic:
+            opt_cond = ({k: v for k, v in c.items() if k != 'jac'} for c in opt_cond)
 
-        # noinspection PyTypeChecker
-        opt_data = scipy.optimize.minimize(
-            opt_func, g_vector, method='SLSQP',
-            bounds=[(0.0, None) for _ in range(len(b_vector))],
-            constraints=list(opt_cond),
-            options={'disp': False, 'ftol': 1e-3})
+        if deadline is not None:
+            opt_func = cls._make_deadline_func(opt_func, deadline)
+
+        try:
+            # noinspection PyTypeChecker
+            opt_data = scipy.optimize.minimize(
+                opt_func, g_vector, method='SLSQP', jac=opt_jac,
+                bounds=[(0.0, None) for _ in range(len(b_vector))],
+                constraints=list(opt_cond),
+                options={'disp': False, 'ftol': 1e-3})
+        except DeadlineExceeded:
+            return cls._solve_projected(system, a_matrix, b_vector)
+        metrics.count('slsqp.nit', int(opt_data.get('nit', 0)))
+        metrics.count('slsqp.nfev', int(opt_data.get('nfev', 0)))
+        metrics.count('slsqp.njev', int(opt_data.get('njev', 0)))
 
         if opt_data.success:
             result_delta = BucketData.from_values(values=opt_data.x)
@@ -48,11 +81,43 @@ class BucketSolverConstrained(BucketSolverSimple):
             logging.error('scipy.optimize.minimize\n%s', opt_data)
             raise RuntimeError('can not solve problem!')
 
+    @classmethod
+    def _solve_projected(cls, system: BucketSystem, a_matrix: np.array, b_vector: np.array) \
+            -> 'BucketSolverConstrained':
+        """Project the unconstrained solution onto the constraints, as the best answer when out of time"""
+        n_values = np.linalg.solve(a_matrix, b_vector)
+        result_delta = BucketData.from_values(
+            values=allocate.solvers.projection.simplex(n_values, system.amount_to_add))
+        result_total = BucketData.from_values(values=system.current.values + result_delta.values)
+        return cls(system=system,
+                   result_delta=result_delta, result_total=result_total,
+                   a_matrix=a_matrix, b_vector=b_vector, truncated=True)
+
+    @staticmethod
+    def _make_deadline_func(opt_func: typing.Callable, deadline: float) -> typing.Callable:
+        """Wrap the function to optimize so that the optimizer is abandoned once the deadline passes"""
+        def f(x: np.array):
+            if expired(deadline):
+                raise DeadlineExceeded
+            return opt_func(x)
+        return f
+
     @staticmethod
     def _make_g_vector(system: BucketSystem) -> np.array:
         """Make g, the intial guess for x"""
         return np.zeros_like(system.current.values)
 
+    # noinspection PyUnusedLocal
+    @staticmethod
+    def _make_w_vector(system: BucketSystem, a_matrix: np.array, b_vector: np.array) -> np.array:
+        """Make w, a warm start for x from the unconstrained solution clipped to x >= 0"""
+        w_vector = np.maximum(np.linalg.solve(a_matrix, b_vector), 0.0)
+        w_length = np.sum(w_vector)
+        if w_length > 0:
+            return w_vector * (system.amount_to_add / w_length)
+        else:
+            return w_vector
+
     # noinspection PyUnusedLocal
     @staticmethod
     def _make_opt_func(system: BucketSystem, a_matrix: np.array, b_vector: np.array) -> typing.Callable:
@@ -62,9 +127,19 @@ class BucketSolverConstrained(BucketSolverSimple):
             return np.dot(y, y)
         return f
 
+    # noinspection PyUnusedLocal
+    @staticmethod
+    def _make_opt_jac(system: BucketSystem, a_matrix: np.array, b_vector: np.array) -> typing.Callable:
+        """Make the gradient of the function to optimize, 2 A^T (Ax - b)"""
+        a_matrix_t2 = 2.0 * a_matrix.T
+
+        def j(x: np.array):
+            return np.dot(a_matrix_t2, np.dot(a_matrix, x) - b_vector)
+        return j
+
     # noinspection PyUnusedLocal
     @staticmethod
     def _make_opt_cond(system: BucketSystem, a_matrix: np.array, b_vector: np.array) \
             -> typing.Generator[dict, None, None]:
         """Make functions to enforce the problem constraints"""
-        yield {'type': 'eq', 'fun': lambda x: x.sum() - system.amount_to_add}
+        yield {'type': 'eq', 'fun': lambda x: x.sum() - system.amount_to_add, 'jac': lambda x: np.ones_like(x)}
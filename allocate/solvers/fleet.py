@@ -0,0 +1,95 @@
+"""
+Solve the bucket problem over one model hierarchy for many accounts at once.
+
+The graph solver handles one account at a time, with one call to a bucket solver per parent.
+Here the accounts are the rows of a matrix, and each parent of the template is solved for every
+account in one vectorized step, walking the tree from the root down::
+
+    template = Template.compile(graph)
+    result = solve(template, current_values, amounts)   # accounts x leaves, accounts
+    result.deltas, result.totals
+
+The constrained solution is the projection of the unconstrained solution onto the simplex, which
+is the exact optimum found by BucketSolverBounded (and by BucketSolverConstrained up to its tolerance).
+The unconstrained solution gives every leaf exactly its product ratio of the account total.
+
+Unlike the graph solver with BucketSolverSimple, the unconstrained solve passes the negative amount of an
+overweight parent down to its children. The graph solver drops such an amount in its passes, so its leaves
+do not reach their product ratios and do not add up to the account total, while here they always do.
+"""
+import numpy as np
+import dataclasses
+
+from allocate.network.template import Template
+from allocate.instrument import metrics
+
+import allocate.solvers.projection
+
+
+@dataclasses.dataclass()
+class FleetResult:
+    """
+    The solution of the bucket problem for many accounts sharing a model hierarchy.
+    """
+    # The template that was solved
+    template: Template
+    # The amount added to each leaf of each account, accounts by leaves
+    deltas: np.array
+    # The value in each leaf of each account after adding the deltas, accounts by leaves
+    values: np.array
+
+    @property
+    def totals(self) -> np.array:
+        """The amount added to each leaf over all accounts, the fleet wide total per fund."""
+        return np.sum(self.deltas, axis=0)
+
+    @property
+    def residuals(self) -> np.array:
+        """The distance between the leaf ratios and the product ratios of each account."""
+        ratios = self.template.leaf_ratios(self.values)
+        return np.linalg.norm(ratios - self.template.product_ratios[self.template.leaves], axis=1)
+
+
+@metrics.timed('fleet')
+def solve(template: Template, current_values: np.array, amounts: np.array, constrained: bool = True) -> FleetResult:
+    """
+    Solve the bucket problem over a model hierarchy for many accounts.
+
+    Parameters:
+        template: The compiled model hierarchy.
+        current_values: The current value in each leaf of each account, accounts by leaves.
+        amounts: The amount to add at the root of each account.
+        constrained: Do not allow values to be removed from buckets.
+
+    Returns:
+        The amount added to each leaf of each account.
+    """
+    current_values = np.atleast_2d(np.asanyarray(current_values, dtype=float))
+    amounts = np.asanyarray(amounts, dtype=float).reshape(-1)
+    if current_values.shape[0] != amounts.shape[0]:
+        raise ValueError('shape mismatch between values and amounts!')
+
+    if np.any(current_values < 0):
+        raise ValueError('negative values in fleet solve!')
+
+    if np.any(amounts < 0):
+        raise ValueError('negative amounts in fleet solve!')
+
+    node_values = template.node_values(current_values)
+    node_amounts = np.zeros_like(node_values)
+    node_amounts[:, template.root] = amounts
+
+    # walk the tree from the top down, every account at once
+    for parent, children in template.parents:
+        amount_to_add = node_amounts[:, parent]
+        values = node_values[:, children]
+        ratios = template.optimal_ratios[children]
+        b_matrix = (np.sum(values, axis=1) + amount_to_add)[:, np.newaxis] * ratios - values
+        if constrained:
+            node_amounts[:, children] += allocate.solvers.projection.simplex(b_matrix, amount_to_add)
+        else:
+            node_amounts[:, children] += b_matrix
+    metrics.count('fleet.accounts', len(amounts))
+
+    deltas = node_amounts[:, template.leaves]
+    return FleetResult(template=template, deltas=deltas, values=current_values + deltas)
@@ -16,20 +16,33 @@ A    level=[0] results_value=[ 5,000.00] results_ratio=[1.000] amount_to_add=[
  └─2 level=[1] results_value=[ 1,250.00] results_ratio=[0.250] amount_to_add=[   250.00]
 """
 import networkx as nx
+import numpy as np
 import typing
+import time
 import copy
 
 from allocate.solvers.constrained import BucketSolverConstrained
+from allocate.solvers.recorder import Recorder
+from allocate.solvers.memo import SolveCache
 from allocate.solvers import BucketSolver
 
 from allocate.network.attributes import node_attrs
+from allocate.instrument import metrics
 
 import allocate.network.algorithms
+import allocate.utilities
 import allocate.network.validate
 
+# graph attributes set by the solver
+TRUNCATED: str = 'truncated'
+RESIDUAL: str = 'residual'
 
+
+@metrics.timed('solve')
 def solve(graph: nx.DiGraph, solver: BucketSolver = BucketSolverConstrained,
-          inplace: bool = False, max_attempts: int = 10, **kwargs) -> nx.DiGraph:
+          inplace: bool = False, max_attempts: int = 10, recorder: Recorder = None,
+          deadline: float = None, time_budget: float = None, decimals: typing.Optional[int] = None,
+          cache: SolveCache = None, **kwargs) -> nx.DiGraph:
     """
     Solve the bucket problem over a hierarchy of buckets.
 
@@ -38,39 +51,79 @@ def solve(graph: nx.DiGraph, solver: BucketSolver = BucketSolverConstrained,
         solver: The bucket solver during traversal.
         inplace: Should the operation happen in place or on a copy?
         max_attempts: The maximum allowed passes through the network.
+        recorder: An optional recorder that keeps every bucket problem solved.
+        deadline: A time.monotonic() value, after which solvers return their best answer so far.
+        time_budget: The number of seconds the solve may take, an alternative to the deadline.
+        decimals: Solve in money mode, where the amounts to add are integer cents with this many decimals.
+        cache: An optional cache of bucket solves, so that identical sets of children are solved once.
         **kwargs: Extra key word arguments to the solver's solve method.
 
     Returns:
         The modified graph, with the results_value and results_delta updated.
+        When the solver is a withdrawal solver, the amounts to add are negative and are taken from the buckets.
+        The graph attributes hold whether any solve was truncated by the deadline and the leaf ratio residual.
+        In money mode the amounts to add are rounded to cents, so that the children of every parent add up
+        exactly to the amount added to the parent.
     """
     if not inplace:
         graph = copy.deepcopy(graph)
 
+    if time_budget is not None:
+        budget_deadline = time.monotonic() + time_budget
+        deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+
+    if deadline is not None:
+        kwargs.update(deadline=deadline)
+
+    # one seed sequence for the whole solve, so that each parent spawns its own random streams from it
+    if isinstance(kwargs.get('seed'), int):
+        kwargs.update(seed=np.random.SeedSequence(kwargs['seed']))
+
+    # the passes below skip amounts of the wrong sign for the solver, which would drop them without a trace
+    amounts = [graph.nodes[n][node_attrs.amount_to_add.column] for n in graph]
+    if solver.withdrawal and any(a > 0 for a in amounts):
+        raise ValueError('amount to add must be negative or zero for a withdrawal!')
+    if not solver.withdrawal and any(a < 0 for a in amounts):
+        raise ValueError('amount to add must be positive or zero, use a withdrawal solver to take amounts out!')
+
+    graph.graph[TRUNCATED] = False
+
+    # in money mode the amounts to add are kept as integer cents until the graph is finalized
+    if decimals is not None:
+        cents = allocate.utilities.to_cents(amounts, decimals=decimals)
+        if cents is None:
+            raise ValueError('amount to add can not be held in cents!')
+        for data, amount in zip(graph.nodes.values(), cents.tolist()):
+            data[node_attrs.amount_to_add.column] = amount
+
+    # a withdrawal solver handles the negative amounts, which are likewise marked as done by negating them
+    if solver.withdrawal:
+        first_condition, condition = (lambda a: a <= 0), (lambda a: a < 0)
+    else:
+        first_condition, condition = (lambda a: a >= 0), (lambda a: a > 0)
+
     # applying the solver here allows initial redistribution for unconstrained solvers
-    _apply_solver_over_graph(graph, solver, lambda a: a >= 0, **kwargs)
+    _apply_solver_over_graph(
+        graph, solver, first_condition, recorder=recorder, decimals=decimals, cache=cache, **kwargs)
     for attempt in range(max_attempts):
-        stop_algorithm = _apply_solver_over_graph(graph, solver, lambda a: a > 0, **kwargs)
+        stop_algorithm = _apply_solver_over_graph(
+            graph, solver, condition, recorder=recorder, decimals=decimals, cache=cache, **kwargs)
         if stop_algorithm:
             break
     else:
         raise RuntimeError('max attempts reached in network solver!')
 
-    graph = _finalize_graph(graph)
-
-    # validate the results
-    if not allocate.network.validate.validate(
-            graph,
-            lambda g: allocate.network.validate.network_sums_to_100_percent_at_each_level(
-                g, allocate.network.attributes.node_attrs.results_ratio.column, 1.0),
-            lambda g: allocate.network.validate.network_child_node_values_sum_to_parent_node_value(
-                g, allocate.network.attributes.node_attrs.results_value.column)
-    ):
-        raise ValueError('invalid network (after solver ran)')
+    graph = _finalize_graph(graph, decimals=decimals)
+    graph.graph[RESIDUAL] = _leaf_residual(graph)
+    _validate_results(graph)
 
     return graph
 
 
-def _apply_solver_over_graph(graph: nx.DiGraph, solver: BucketSolver, condition: typing.Callable, **kwargs) -> bool:
+@metrics.timed('pass')
+def _apply_solver_over_graph(graph: nx.DiGraph, solver: BucketSolver, condition: typing.Callable,
+                             recorder: Recorder = None, decimals: typing.Optional[int] = None,
+                             cache: SolveCache = None, **kwargs) -> bool:
     """
     Walk the graph from the bottom up, solving the bucket problem over the set of children for each parent.
 
@@ -78,11 +131,15 @@ def _apply_solver_over_graph(graph: nx.DiGraph, solver: BucketSolver, condition:
         graph: The DAG to process.
         solver: The bucket solver during traversal.
         condition: The continue condition to apply on the amount to add.
+        recorder: An optional recorder that keeps every bucket problem solved.
+        decimals: Solve in money mode, where the amounts to add are integer cents with this many decimals.
+        cache: An optional cache of bucket solves, so that identical sets of children are solved once.
         **kwargs: Extra key word arguments to the solver's solve method.
 
     Returns:
         True if the continue condition was never met.
     """
+    metrics.count('graph.passes')
     stop_algorithm = True
     # walk the graph from the bottom up, solving the bucket problem set of children
     source = allocate.network.algorithms.get_graph_root(graph)
@@ -90,32 +147,53 @@ def _apply_solver_over_graph(graph: nx.DiGraph, solver: BucketSolver, condition:
         amount_to_add = graph.nodes[parent][node_attrs.amount_to_add.column]
 
         if condition(amount_to_add):
-            current_values = [graph.nodes[n][node_attrs.current_value.column] for n in children]
-            optimal_ratios = [graph.nodes[n][node_attrs.optimal_ratio.column] for n in children]
+            data = [graph.nodes[n] for n in children]
+            current_values = [d[node_attrs.current_value.column] for d in data]
+            optimal_ratios = [d[node_attrs.optimal_ratio.column] for d in data]
+            min_values = [d.get(node_attrs.min_value.column, node_attrs.min_value.value) for d in data]
+            max_values = [d.get(node_attrs.max_value.column, node_attrs.max_value.value) for d in data]
             stop_algorithm = False
 
             # solve the bucket problem over the children
             system = allocate.solvers.BucketSystem.create(
-                amount_to_add=amount_to_add, current_values=current_values,
-                optimal_ratios=optimal_ratios, labels=children)
-            solved = solver.solve(system, **kwargs)
+                amount_to_add=amount_to_add if decimals is None else amount_to_add / 10 ** decimals,
+                current_values=current_values,
+                optimal_ratios=optimal_ratios, labels=children, min_values=min_values, max_values=max_values,
+                allow_withdrawal=solver.withdrawal)
+            with metrics.stage(solver.__name__):
+                start = time.perf_counter()
+                solved = solver.solve(system, **kwargs) if cache is None else cache.solve(solver, system, **kwargs)
+                if recorder is not None:
+                    recorder.record(system, solved, time.perf_counter() - start, **kwargs)
+            metrics.count('parents.solved')
+            metrics.count(f'solver.calls.{solver.__name__}')
+
+            if solved.truncated:
+                graph.graph[TRUNCATED] = True
+                metrics.count('solver.truncated')
 
             # negate the amount to add so we dont try to add it again on the next pass
             graph.nodes[parent][node_attrs.amount_to_add.column] = -amount_to_add
 
             # increment the amount to add value for the children of this node
-            for i, child in enumerate(children):
-                graph.nodes[child][node_attrs.amount_to_add.column] += solved.result_delta.values[i]
+            if decimals is None:
+                deltas = solved.result_delta.values.tolist()
+            else:
+                deltas = solved.result_delta.cents(total=amount_to_add, decimals=decimals).tolist()
+            for d, delta in zip(data, deltas):
+                d[node_attrs.amount_to_add.column] += delta
 
     return stop_algorithm
 
 
-def _finalize_graph(graph: nx.DiGraph) -> nx.DiGraph:
+@metrics.timed('finalize')
+def _finalize_graph(graph: nx.DiGraph, decimals: typing.Optional[int] = None) -> nx.DiGraph:
     """
     Finalize the amount_to_add, results_value, and results_ratio column for the graph.
 
     Parameters:
         graph: The DAG to process.
+        decimals: The amounts to add are integer cents with this many decimals.
 
     Returns:
         The processed DAG.
@@ -126,6 +204,8 @@ def _finalize_graph(graph: nx.DiGraph) -> nx.DiGraph:
         if graph.out_degree(node):
             graph.nodes[node][node_attrs.amount_to_add.column] = 0
         else:
+            if decimals is not None:
+                graph.nodes[node][node_attrs.amount_to_add.column] /= 10 ** decimals
             graph.nodes[node][node_attrs.results_value.column] = \
                 graph.nodes[node][node_attrs.current_value.column] + \
                 graph.nodes[node][node_attrs.amount_to_add.column]
@@ -142,3 +222,35 @@ def _finalize_graph(graph: nx.DiGraph) -> nx.DiGraph:
         out=node_attrs.results_ratio.column)
 
     return graph
+
+
+def _validate_results(graph: nx.DiGraph):
+    """
+    Raise an error if the results of the solver do not form a valid network.
+    """
+    if not allocate.network.validate.validate(
+            graph,
+            lambda g: allocate.network.validate.network_sums_to_100_percent_at_each_level(
+                g, allocate.network.attributes.node_attrs.results_ratio.column, 1.0),
+            lambda g: allocate.network.validate.network_child_node_values_sum_to_parent_node_value(
+                g, allocate.network.attributes.node_attrs.results_value.column)
+    ):
+        raise ValueError('invalid network (after solver ran)')
+
+
+def _leaf_residual(graph: nx.DiGraph) -> float:
+    """
+    The distance between the fraction of the total in each leaf and the leaf's product ratio.
+
+    Parameters:
+        graph: The solved DAG.
+
+    Returns:
+        The norm of the leaf ratio differences.
+    """
+    source = allocate.network.algorithms.get_graph_root(graph)
+    total = graph.nodes[source][node_attrs.results_value.column]
+    leaves = [n for n in graph if graph.out_degree(n) == 0]
+    values = np.array([graph.nodes[n][node_attrs.results_value.column] for n in leaves], dtype=float)
+    ratios = np.array([graph.nodes[n].get(node_attrs.product_ratio.column, 0.0) for n in leaves], dtype=float)
+    return float(np.linalg.norm(values / total - ratios)) if total > 0 else 0.0
@@ -0,0 +1,247 @@
+"""
+Keep a hierarchy of buckets solved while its inputs are edited, re-solving only what an edit affects.
+
+Each parent solves the bucket problem over its children, for the amount to add that it was given plus
+the amount it received from its own parent. An edit changes only a few of these bucket problems::
+
+    engine = IncrementalSolver(graph, solver=BucketSolverBounded)
+    engine.set_current_value('VIGAX', 1500.0)
+    engine.results_value('VIGAX')
+
+Changing the current value of a leaf changes the problems of its ancestors, and changing the optimal
+ratio or the amount to add of a node changes the problem of its parent or of itself. Only these parents
+are marked dirty and solved again, from the top down. A child is marked dirty in turn only when the amount
+it receives actually changed, so the work is on the order of the depth times the fan out, instead of the
+whole tree. The results values are updated along the paths from the changed leaves to the root.
+
+The solver must be deterministic, and the solution matches the graph solver when amounts are added at the root.
+As in the graph solver, a parent does not pass on an amount it received with the wrong sign for the solver.
+"""
+import networkx as nx
+import numpy as np
+import itertools
+import typing
+import heapq
+import copy
+
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers.bucketdata import BucketSystem
+from allocate.solvers import BucketSolver
+
+from allocate.network.attributes import node_attrs
+from allocate.instrument import metrics
+
+import allocate.network.algorithms
+import allocate.solvers.graphsolver
+
+
+class IncrementalSolver:
+    """
+    A solved hierarchy of buckets that is updated incrementally after each edit.
+    """
+    def __init__(self, graph: nx.DiGraph, solver: typing.Type[BucketSolver] = BucketSolverBounded,
+                 tolerance: float = 1e-9, **kwargs):
+        """
+        Solve the graph, keeping the state needed to update the solution after edits.
+
+        Parameters:
+            graph: The DAG to process, a copy is kept and edited.
+            solver: The bucket solver for each parent, which must be deterministic.
+            tolerance: Changes in a received amount smaller than this, relative to the total, are ignored.
+            **kwargs: Extra key word arguments to the solver's solve method.
+        """
+        self.graph = copy.deepcopy(graph)
+        self.solver = solver
+        self.kwargs = kwargs
+        self.tolerance = tolerance
+        self.source = allocate.network.algorithms.get_graph_root(self.graph)
+
+        nodes = self.graph.nodes
+        # the amount each node received from the solution of its parent's bucket problem
+        self._received: typing.Dict[typing.Any, float] = {n: 0.0 for n in self.graph}
+        # the value of each node after the solve, the sum of the values of its leaves
+        self._results: typing.Dict[typing.Any, float] = {n: 0.0 for n in self.graph}
+        # the sum of the values after the solve over each level of the tree
+        self._levels: typing.Dict[int, float] = {}
+
+        # noinspection PyCallingNonCallable
+        for leaf in [n for n in self.graph if self.graph.out_degree(n) == 0]:
+            value = nodes[leaf][node_attrs.current_value.column] + nodes[leaf][node_attrs.amount_to_add.column]
+            self._add_result(leaf, value)
+
+        self._dirty: typing.Set[typing.Any] = set()
+        self._heap: typing.List[tuple] = []
+        self._order = itertools.count()
+        # noinspection PyCallingNonCallable
+        for parent in [n for n in self.graph if self.graph.out_degree(n)]:
+            self._mark(parent)
+        self.update()
+
+    def set_current_value(self, node: typing.Any, value: float):
+        """
+        Set the current value of a leaf, updating the current values of its ancestors.
+        """
+        # noinspection PyCallingNonCallable
+        if self.graph.out_degree(node):
+            raise ValueError('only the current value of a leaf can be set!')
+
+        diff = value - self.graph.nodes[node][node_attrs.current_value.column]
+        self.graph.nodes[node][node_attrs.current_value.column] = value
+        for ancestor in self._ancestors(node):
+            self.graph.nodes[ancestor][node_attrs.current_value.column] += diff
+            self._mark(ancestor)
+        self._add_result(node, diff)
+
+    def set_optimal_ratio(self, node: typing.Any, ratio: float):
+        """
+        Set the optimal ratio of a node as a fraction of its parent, scaling its siblings to fill the rest.
+        The sum of the ratios over the siblings is unchanged, so the ratios stay normalized over each level.
+        """
+        if not 0 <= ratio <= 1:
+            raise ValueError('optimal ratio must be between zero and one!')
+
+        for parent in self.graph.predecessors(node):
+            siblings = [n for n in self.graph.successors(parent) if n != node]
+            nodes = self.graph.nodes
+            others = sum(nodes[n][node_attrs.optimal_ratio.column] for n in siblings)
+            total = others + nodes[node][node_attrs.optimal_ratio.column]
+            for sibling in siblings:
+                if others > 0:
+                    nodes[sibling][node_attrs.optimal_ratio.column] *= (1 - ratio) * total / others
+                else:
+                    nodes[sibling][node_attrs.optimal_ratio.column] = (1 - ratio) * total / len(siblings)
+            nodes[node][node_attrs.optimal_ratio.column] = ratio * total
+            self._mark(parent)
+
+    def set_amount_to_add(self, node: typing.Any, amount: float):
+        """
+        Set the amount to add at a node.
+        """
+        diff = amount - self.graph.nodes[node][node_attrs.amount_to_add.column]
+        self.graph.nodes[node][node_attrs.amount_to_add.column] = amount
+        # noinspection PyCallingNonCallable
+        if self.graph.out_degree(node):
+            self._mark(node)
+        else:
+            self._add_result(node, diff)
+
+    def update(self) -> int:
+        """
+        Solve the bucket problems of the dirty parents again, from the top down.
+
+        Returns:
+            The number of parents that were solved.
+        """
+        atol = self.tolerance * max(1.0, abs(self._results[self.source]))
+        solved = 0
+        while self._heap:
+            _, _, parent = heapq.heappop(self._heap)
+            self._dirty.discard(parent)
+            children = list(self.graph.successors(parent))
+            deltas = self._solve_parent(parent, children)
+            solved += 1
+
+            for child, value in zip(children, deltas.tolist()):
+                diff = value - self._received[child]
+                if abs(diff) <= atol:
+                    continue
+                self._received[child] = value
+                # noinspection PyCallingNonCallable
+                if self.graph.out_degree(child):
+                    self._mark(child)
+                else:
+                    self._add_result(child, diff)
+
+        metrics.count('incremental.solved', solved)
+        return solved
+
+    def results_value(self, node: typing.Any) -> float:
+        """
+        The value of a node after the solve.
+        """
+        self.update()
+        return self._results[node]
+
+    def results_ratio(self, node: typing.Any) -> float:
+        """
+        The value of a node after the solve as a fraction over its level.
+        """
+        self.update()
+        total = self._levels[self.graph.nodes[node][node_attrs.level.column]]
+        return self._results[node] / total if total > 0 else 0.0
+
+    def amount_to_add(self, node: typing.Any) -> float:
+        """
+        The amount added to a leaf by the solve, or zero for other nodes.
+        """
+        self.update()
+        # noinspection PyCallingNonCallable
+        if self.graph.out_degree(node):
+            return 0.0
+        return self.graph.nodes[node][node_attrs.amount_to_add.column] + self._received[node]
+
+    def to_graph(self) -> nx.DiGraph:
+        """
+        A solved copy of the graph, as returned by the graph solver.
+        """
+        self.update()
+        # the edits change the inputs only, so the attributes derived from them are computed again
+        graph = allocate.network.algorithms.derive(self.graph)
+        for node in graph:
+            graph.nodes[node][node_attrs.amount_to_add.column] = self.amount_to_add(node)
+        graph = allocate.solvers.graphsolver._finalize_graph(graph)
+        graph.graph[allocate.solvers.graphsolver.TRUNCATED] = False
+        graph.graph[allocate.solvers.graphsolver.RESIDUAL] = allocate.solvers.graphsolver._leaf_residual(graph)
+        return graph
+
+    def _solve_parent(self, parent: typing.Any, children: list) -> np.array:
+        """
+        Solve the bucket problem over the children of a parent, returning the amount added to each child.
+        """
+        nodes = self.graph.nodes
+        amount_to_add = nodes[parent][node_attrs.amount_to_add.column]
+        # like the passes of the graph solver, an amount received with the wrong sign for the solver is not passed
+        # on, such as the negative amount an unconstrained solver gives an overweight parent
+        allowed = (lambda a: a <= 0) if self.solver.withdrawal else (lambda a: a >= 0)
+        if allowed(amount_to_add + self._received[parent]):
+            amount_to_add += self._received[parent]
+        elif not allowed(amount_to_add):
+            return np.zeros(len(children))
+
+        system = BucketSystem.create(
+            amount_to_add=amount_to_add,
+            current_values=[nodes[n][node_attrs.current_value.column] for n in children],
+            optimal_ratios=[nodes[n][node_attrs.optimal_ratio.column] for n in children],
+            labels=children,
+            min_values=[nodes[n].get(node_attrs.min_value.column, node_attrs.min_value.value) for n in children],
+            max_values=[nodes[n].get(node_attrs.max_value.column, node_attrs.max_value.value) for n in children],
+            allow_withdrawal=self.solver.withdrawal)
+        return self.solver.solve(system, **self.kwargs).result_delta.values
+
+    def _mark(self, parent: typing.Any):
+        """
+        Mark a parent as dirty, so that its bucket problem is solved again on the next update.
+        """
+        if parent not in self._dirty:
+            self._dirty.add(parent)
+            level = self.graph.nodes[parent][node_attrs.level.column]
+            heapq.heappush(self._heap, (level, next(self._order), parent))
+
+    def _add_result(self, leaf: typing.Any, diff: float):
+        """
+        Add to the value after the solve of a leaf, and of every node on the path to the root.
+        """
+        for node in itertools.chain([leaf], self._ancestors(leaf)):
+            self._results[node] += diff
+            level = self.graph.nodes[node][node_attrs.level.column]
+            self._levels[level] = self._levels.get(level, 0.0) + diff
+
+    def _ancestors(self, node: typing.Any) -> typing.Generator[typing.Any, None, None]:
+        """
+        The ancestors of a node, from its parent up to the root.
+        """
+        parents = list(self.graph.predecessors(node))
+        while parents:
+            node = parents[0]
+            yield node
+            parents = list(self.graph.predecessors(node))
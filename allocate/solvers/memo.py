@@ -0,0 +1,153 @@
+"""
+Memoize the bucket problems solved over a graph, so that identical sets of buckets are only solved once.
+
+Hierarchies often reuse the same sub-allocation, such as a bond sleeve with the same ratios and holdings,
+under many parents or across many accounts. The graph solver creates the same BucketSystem for every copy,
+and a SolveCache keys the result of each solve by the content of its system::
+
+    cache = SolveCache(max_bytes=64 * 2 ** 20)
+    for graph in graphs:
+        allocate.solvers.graphsolver.solve(graph, solver=BucketSolverSimple, cache=cache)
+    cache.hits, cache.misses
+
+A linear solver, whose result moves by the optimal ratios times the change in the amount to add, also
+reuses a result solved for the same buckets and a different amount. Truncated results are never cached,
+and a solver that is not deterministic returns the first result for a system until it is evicted.
+"""
+import numpy as np
+import collections
+import dataclasses
+import hashlib
+import typing
+import json
+
+from allocate.solvers.bucketdata import BucketSystem
+from allocate.solvers.bucketdata import BucketData
+from allocate.solvers.basesolver import BucketSolver
+from allocate.instrument import metrics
+
+
+# The key word arguments that change how a solve runs, and not its result, which are left out of the key
+UNKEYED: typing.Tuple[str, ...] = ('deadline', 'executor', 'recorder')
+
+
+@dataclasses.dataclass()
+class Entry:
+    """
+    A cached result of a bucket solve.
+    """
+    # The amount to add that was solved for
+    amount_to_add: float
+    # The amounts added to each bucket by the solver, read only
+    deltas: np.array
+    # The size of the entry in bytes, counted against the size of the cache
+    nbytes: int
+
+
+class SolveCache:
+    """
+    A least recently used cache of bucket solves, keyed by a hash of the content of each system.
+    """
+    def __init__(self, max_bytes: int = 64 * 2 ** 20):
+        """
+        Parameters:
+            max_bytes: The largest total size of the cached results, the least recently used are evicted.
+        """
+        self.max_bytes = max_bytes
+        # The number of solves found in the cache, with the same or with a different amount to add
+        self.hits = 0
+        # The number of solves found in the cache for a different amount to add, for linear solvers
+        self.shifts = 0
+        # The number of solves not found in the cache
+        self.misses = 0
+        # The number of results dropped to keep the cache under its size
+        self.evictions = 0
+        # The total size of the cached results in bytes
+        self.nbytes = 0
+        self._entries: typing.OrderedDict[bytes, Entry] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of the solves found in the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def solve(self, solver: typing.Type[BucketSolver], system: BucketSystem, **kwargs) -> BucketSolver:
+        """
+        Solve the bucket problem with the solver, or build the result from the cache.
+
+        Parameters:
+            solver: The bucket solver class.
+            system: The bucket problem.
+            **kwargs: Extra key word arguments to the solver's solve method, those in UNKEYED are not part of the key.
+
+        Returns:
+            The solver instance, which for a cached result only has the system and the results set.
+        """
+        key = self.key(solver, system, **kwargs)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.count('cache.hits')
+            deltas = entry.deltas
+            if entry.amount_to_add != system.amount_to_add:
+                self.shifts += 1
+                metrics.count('cache.shifts')
+                deltas = deltas + (system.amount_to_add - entry.amount_to_add) * system.optimal.ratios
+            result_delta = BucketData(deltas)
+            return solver(system=system, result_delta=result_delta,
+                          result_total=BucketData(system.current.values + deltas))
+
+        self.misses += 1
+        metrics.count('cache.misses')
+        solved = solver.solve(system, **kwargs)
+        if not solved.truncated:
+            self._put(key, system, solved)
+        return solved
+
+    @staticmethod
+    def key(solver: typing.Type[BucketSolver], system: BucketSystem, **kwargs) -> bytes:
+        """
+        Hash the content of a bucket problem, leaving out the amount to add for linear solvers.
+        A seed sequence is keyed by its entropy, which is the same for every solve it spawns streams for.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        kwargs = {k: v for k, v in kwargs.items() if k not in UNKEYED}
+        if isinstance(kwargs.get('seed'), np.random.SeedSequence):
+            kwargs['seed'] = kwargs['seed'].entropy
+        digest.update(json.dumps([solver.__module__, solver.__qualname__, kwargs], sort_keys=True, default=str)
+                      .encode())
+        for array in (system.current.values, system.optimal.ratios, system.min_values, system.max_values):
+            array = np.zeros(0) if array is None else np.ascontiguousarray(array, dtype=float)
+            digest.update(np.int64(len(array)).tobytes())
+            digest.update(array.tobytes())
+        if not solver.__dict__.get('linear', False):
+            digest.update(np.float64(system.amount_to_add).tobytes())
+        return digest.digest()
+
+    def clear(self):
+        """
+        Drop every cached result, keeping the counters.
+        """
+        self._entries.clear()
+        self.nbytes = 0
+
+    def _put(self, key: bytes, system: BucketSystem, solved: BucketSolver):
+        deltas = np.array(solved.result_delta.values, dtype=float)
+        deltas.flags.writeable = False
+        entry = Entry(amount_to_add=system.amount_to_add, deltas=deltas, nbytes=deltas.nbytes + len(key))
+        if entry.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
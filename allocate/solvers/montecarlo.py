@@ -3,12 +3,34 @@ Solve the bucket problem, but do not allow moving values between buckets.
 In this version of the problem, we can only add to buckets and an optimal solution may not exist.
 This solution uses Monte Carlo and may not offer the optimal allocation of amounts into buckets, but gets close.
 """
+import concurrent.futures
 import numpy as np
 import dataclasses
+import functools
+import typing
 
 from allocate.solvers.basesolver import BucketSolver
+from allocate.solvers.basesolver import expired
 from allocate.solvers.bucketdata import BucketSystem
 from allocate.solvers.bucketdata import BucketData
+from allocate.solvers.sumtree import SumTree
+
+
+@dataclasses.dataclass()
+class Chain:
+    """
+    The statistics of a single Monte Carlo chain.
+    """
+    # The index of the chain
+    index: int
+    # The number of accepted steps
+    accept: int
+    # The number of rejected steps (steps are drawn in proportion to the deficits, so none are rejected)
+    reject: int
+    # The distance between the final ratios and the optimal ratios
+    error: float
+    # Did the chain stop early because the deadline passed?
+    truncated: bool = False
 
 
 @dataclasses.dataclass()
@@ -18,67 +40,168 @@ class BucketSolverConstrainedMonteCarlo(BucketSolver):
     In this version of the problem, we can only add to buckets and an optimal solution may not exist.
     This solution uses Monte Carlo and may not offer the optimal allocation of amounts into buckets, but gets close.
     """
-    accept: int
-    reject: int
+    # The accepted steps of the chain that was kept
+    accept: int = 0
+    # The rejected steps of the chain that was kept
+    reject: int = 0
+    # The statistics of every chain that was run
+    chains: typing.List[Chain] = dataclasses.field(default_factory=list)
 
     @classmethod
     def solve(cls, system: BucketSystem,
-              step_size: float = 0.01, max_steps: int = None) -> 'BucketSolverConstrainedMonteCarlo':
+              step_size: float = 0.01, max_steps: int = None,
+              seed: typing.Union[None, int, np.random.SeedSequence] = None, chains: int = 1,
+              processes: typing.Optional[int] = None, executor: typing.Optional[concurrent.futures.Executor] = None,
+              adaptive: bool = False, factor: float = 10.0,
+              tolerance: typing.Optional[float] = None,
+              deadline: typing.Optional[float] = None) -> 'BucketSolverConstrainedMonteCarlo':
         """
         Solve the bucket problem.
+
+        Parameters:
+            system: The bucket problem to solve.
+            step_size: The amount added to a bucket on each accepted step.
+            max_steps: The maximum number of steps in each chain, or None for no limit.
+            seed: The seed for the random number generators, or None for fresh entropy. A SeedSequence spawns new
+                children for every solve, so solving many parents with one sequence gives each its own streams.
+            chains: The number of independent chains to run, keeping the one with the smallest ratio error.
+            processes: The number of worker processes for multiple chains, 1 to run them in this process.
+            executor: A pool to run multiple chains in, reused across solves, instead of a pool made for this solve.
+            adaptive: Allocate with geometrically shrinking steps, from coarse down to step_size.
+            factor: The ratio between consecutive step sizes when adaptive.
+            tolerance: Stop refining once a level improves the ratio error by no more than this.
+            deadline: A time.monotonic() value, after which each chain stops and keeps its current state.
         """
-        total_added = 0
-        accept, reject = 0, 0
-        max_steps = max_steps if max_steps is not None else int(1000 * system.amount_to_add)
+        if chains < 1:
+            raise ValueError('at least one chain is required!')
+
+        if adaptive and factor <= 1:
+            raise ValueError('adaptive factor must be greater than one!')
+
+        schedule = cls._make_schedule(system, step_size, factor) if adaptive else [step_size]
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        seeds = seed.spawn(chains)
+        run_chain = functools.partial(
+            cls._run_chain, system, schedule=schedule, max_steps=max_steps, tolerance=tolerance, deadline=deadline)
+        if chains > 1 and executor is not None:
+            results = list(executor.map(run_chain, seeds))
+        elif chains > 1 and processes != 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+                results = list(pool.map(run_chain, seeds))
+        else:
+            results = [run_chain(s) for s in seeds]
 
-        n_values = np.copy(system.current.values)
-        p_vector = cls._make_p_vector(n_values, system.optimal.values)
+        stats = []
+        for index, (n_values, accept, reject, truncated) in enumerate(results):
+            stats.append(Chain(index=index, accept=accept, reject=reject,
+                               error=cls._ratio_error(system, n_values), truncated=truncated))
 
-        for i in range(max_steps):
-            if np.sum(p_vector) <= 0.0:
-                break
-            if total_added >= (system.amount_to_add - step_size):
-                break
+        best = min(stats, key=lambda c: c.error)
+        result_delta = BucketData.from_values(values=results[best.index][0])
+        result_total = BucketData.from_values(values=system.current.values + result_delta.values)
 
-            b_index = np.random.randint(0, len(p_vector))
-            p_value = p_vector[b_index]
+        return cls(system=system,
+                   accept=best.accept, reject=best.reject, chains=stats, truncated=best.truncated,
+                   result_delta=result_delta, result_total=result_total)
 
-            if np.random.random() <= p_value:
-                accept += 1
-                total_added += step_size
-                n_values[b_index] += step_size
-                p_vector = cls._make_p_vector(n_values, system.optimal.values)
-            else:
-                reject += 1
+    @staticmethod
+    def _make_schedule(system: BucketSystem, step_size: float, factor: float) -> typing.List[float]:
+        """
+        Make the step sizes step_size * factor^k, ..., step_size * factor, step_size.
+        The coarsest step is the largest one that is no more than the amount per bucket, so every level
+        takes on the order of factor steps per bucket, and the total is logarithmic in amount / step_size.
+        """
+        n_buckets = max(1, len(system.current.values))
+        if step_size <= 0 or system.amount_to_add <= n_buckets * step_size:
+            return [step_size]
+        levels = int(np.floor(np.log(system.amount_to_add / (n_buckets * step_size)) / np.log(factor) + 1.0e-9))
+        return [step_size * factor ** k for k in range(levels, -1, -1)]
 
-        p_vector = cls._make_p_vector(n_values, system.optimal.values)
-        n_values = n_values - system.current.values
+    @staticmethod
+    def _ratio_error(system: BucketSystem, n_values: np.array) -> float:
+        """The distance between the ratios after adding the values and the optimal ratios"""
+        totals = BucketData.from_values(values=system.current.values + n_values)
+        return float(np.linalg.norm(totals.ratios - system.optimal.ratios))
 
+    @staticmethod
+    def _fill_remaining(system: BucketSystem, n_values: np.array) -> np.array:
+        """Add the amount that was not allocated by steps in proportion to the positive deficits"""
         remaining = system.amount_to_add - np.sum(n_values)
+        if np.isclose(remaining, 0.0, rtol=0.0, atol=1.0e-9 * max(1.0, system.amount_to_add)):
+            return n_values
 
-        if abs(remaining) > 2 * step_size or remaining < 0:
+        if remaining < 0:
             raise ValueError(f'remaining: {remaining}')
-        elif remaining > 0:
-            n_values[np.argmax(p_vector)] += remaining
 
-        result_delta = BucketData.from_values(values=n_values)
-        result_total = BucketData.from_values(values=system.current.values + result_delta.values)
+        deficits = np.maximum(np.nan_to_num(system.optimal.values - system.current.values - n_values), 0.0)
+        if np.sum(deficits) > 0:
+            return n_values + remaining * deficits / np.sum(deficits)
+        else:
+            n_values = np.copy(n_values)
+            n_values[np.argmax(system.optimal.ratios)] += remaining
+            return n_values
 
-        return cls(system=system,
-                   accept=accept, reject=reject,
-                   result_delta=result_delta, result_total=result_total)
+    @classmethod
+    def _run_chain(cls, system: BucketSystem, seed: np.random.SeedSequence,
+                   schedule: typing.List[float], max_steps: typing.Optional[int] = None,
+                   tolerance: typing.Optional[float] = None, deadline: typing.Optional[float] = None,
+                   block_size: int = 65536) -> typing.Tuple[np.array, int, int, bool]:
+        """
+        Run a single chain, returning the amounts added, the accept and reject counts, and the truncated flag.
+
+        Each step adds the step size to a bucket chosen in proportion to its deficit, the positive part of
+        optimal - current. This is the distribution of the accepted steps of the uniform propose/accept chain,
+        but drawn directly from a sum tree, so every proposal is accepted and a step costs O(log n).
+        Every level of the schedule but the last only steps into buckets with a deficit of at least one step,
+        so coarse steps never overshoot. Whatever is left after the last level is added in proportion to the deficits.
+        The deadline is checked between blocks of steps, and when it passes whatever is left is added the same way.
+        """
+        rng = np.random.default_rng(seed)
+        accept, reject = 0, 0
+        truncated = False
+        error = np.inf
+        block_size = min(block_size, 1024) if deadline is not None else block_size
+
+        values = system.current.values.tolist()
+        optimal = system.optimal.values.tolist()
+        current_amount = system.current.amount
+
+        for level, step_size in enumerate(schedule):
+            final = level == len(schedule) - 1
+            threshold = 0.0 if final else step_size
+
+            remaining = system.amount_to_add - (sum(values) - current_amount)
+            n_steps = int(np.floor(remaining / step_size + 1.0e-9)) if step_size > 0 else 0
+            n_steps = min(n_steps, max_steps - accept) if max_steps is not None else n_steps
+
+            deficits = np.nan_to_num(np.array(optimal) - np.array(values))
+            tree = SumTree(np.where((deficits > 0) & (deficits >= threshold), deficits, 0.0))
+
+            taken = 0
+            while taken < n_steps and tree.total > 0:
+                if expired(deadline):
+                    truncated = True
+                    break
+                for u in rng.random(min(n_steps - taken, block_size)).tolist():
+                    total = tree.total
+                    if total <= 0:
+                        break
+                    b_index = tree.find(u * total)
+                    values[b_index] += step_size
+                    deficit = optimal[b_index] - values[b_index]
+                    tree.update(b_index, deficit if deficit > 0 and deficit >= threshold else 0.0)
+                    taken += 1
+            accept += taken
+
+            if truncated:
+                break
 
-    @staticmethod
-    def _make_p_vector(current: np.array, optimal: np.array) -> np.array:
-        """Get the current probability to add to each bucket"""
-        p_vector = optimal - current
-        p_vector[np.isnan(p_vector)] = 0.0
-        p_vector = np.where(p_vector > 0, p_vector, 0.0)
-        p_length = np.linalg.norm(p_vector, 1)
-
-        if p_length > 0:
-            p_vector = p_vector / p_length
-        else:
-            p_vector = np.zeros_like(current)
+            if tolerance is not None and not final:
+                filled = cls._fill_remaining(system, np.array(values) - system.current.values)
+                level_error = cls._ratio_error(system, filled)
+                if error - level_error <= tolerance:
+                    break
+                error = level_error
 
-        return p_vector
+        n_values = cls._fill_remaining(system, np.array(values) - system.current.values)
+        return n_values, accept, reject, truncated
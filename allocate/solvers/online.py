@@ -0,0 +1,218 @@
+"""
+Allocate a stream of small deposits into a solved hierarchy of buckets, one deposit at a time.
+
+Solving the whole graph for every small deposit repeats the same work over and over. A DepositAllocator
+solves the graph once, and then keeps the value of each leaf along with its product ratio::
+
+    allocator = DepositAllocator.from_graph(graph)
+    for amount in stream:
+        allocator.deposit(amount)
+    allocator.take()                        # {'VIGAX': 25.0, ...}, the amounts added since the last take
+    allocator.save('allocator.npz')
+    allocator = DepositAllocator.load('allocator.npz')
+
+The fill level of a leaf is its value over its product ratio, which orders the leaves the same way
+as their value over their optimal value, whatever the total is. A deposit is poured into the leaves
+with the lowest fill level, raising them together until it runs out (water filling), so the most
+underweight leaves relative to their optimal values are topped up first, and over many deposits the
+values converge to the optimal ratios. Pouring is independent of how the amount is split into deposits.
+
+The leaves at the lowest fill level form the floor, whose values are kept implicitly as the floor level
+times their ratios, so raising the floor costs O(1) however many leaves it holds. The other leaves wait
+in a heap by fill level, and join the floor once it reaches them, never to leave it unless they reach
+their max_value. Each leaf joins and leaves the floor at most once, so a deposit costs O(log n) amortized.
+Leaves with no ratio receive nothing.
+"""
+import networkx as nx
+import numpy as np
+import typing
+import heapq
+
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers import BucketSolver
+
+from allocate.network.attributes import node_attrs
+from allocate.network.template import Template
+
+import allocate.solvers.graphsolver
+
+
+class DepositAllocator:
+    """
+    The values of the leaves of a hierarchy of buckets, with a heap over their fill levels.
+    """
+    def __init__(self, labels: list, ratios: typing.Union[list, np.array], values: typing.Union[list, np.array],
+                 max_values: typing.Optional[typing.Union[list, np.array]] = None,
+                 taken: typing.Optional[typing.Union[list, np.array]] = None, deposited: float = 0.0):
+        """
+        Parameters:
+            labels: The labels of the leaves.
+            ratios: The product ratio of each leaf, its share of the total.
+            values: The value of each leaf.
+            max_values: The largest value allowed in each leaf, or None for no limit.
+            taken: The value of each leaf at the last take, or None for the values.
+            deposited: The total amount deposited so far.
+        """
+        ratios = np.asanyarray(ratios, dtype=float)
+        values = np.asanyarray(values, dtype=float)
+        max_values = np.full(len(values), np.inf) if max_values is None else np.asanyarray(max_values, dtype=float)
+        taken = values if taken is None else np.asanyarray(taken, dtype=float)
+        if not len(labels) == len(ratios) == len(values) == len(max_values) == len(taken):
+            raise ValueError('length mismatch between labels, ratios, and values!')
+
+        if np.any(ratios < 0):
+            raise ValueError('negative ratios in deposit allocator!')
+
+        self.labels = list(labels)
+        self.ratios = ratios.tolist()
+        self.max_values = max_values.tolist()
+        self.deposited = deposited
+
+        self._values = values.tolist()
+        self._taken = taken.tolist()
+        # the fill level and index of every leaf that can still receive a deposit, above the floor
+        self._heap = [(v / r, i) for i, (r, v, u) in enumerate(zip(self.ratios, self._values, self.max_values))
+                      if r > 0 and v < u]
+        heapq.heapify(self._heap)
+        # the leaves on the floor, with the sum of their ratios and the fill levels where they reach their max values
+        self._floor: typing.Dict[int, None] = {}
+        self._floor_ratio = 0.0
+        self._caps: typing.List[typing.Tuple[float, int]] = []
+        self._level = self._heap[0][0] if self._heap else 0.0
+        # the largest deposit that the leaves can hold
+        self._capacity = sum(self.max_values[i] - self._values[i] for _, i in self._heap)
+
+    @classmethod
+    def from_graph(cls, graph: nx.DiGraph, solver: typing.Type[BucketSolver] = BucketSolverBounded,
+                   **kwargs) -> 'DepositAllocator':
+        """
+        Solve a graph made by algorithms.create, and keep the values of its leaves after the solve.
+
+        Parameters:
+            graph: The DAG to process.
+            solver: The bucket solver during traversal.
+            **kwargs: Extra key word arguments to the solver's solve method.
+
+        Returns:
+            The allocator over the leaves of the solved graph.
+        """
+        solved = allocate.solvers.graphsolver.solve(graph, solver=solver, **kwargs)
+        template = Template.compile(solved)
+        labels = template.leaf_labels
+        nodes = solved.nodes
+        return cls(
+            labels=labels,
+            ratios=template.product_ratios[template.leaves],
+            values=[nodes[n][node_attrs.results_value.column] for n in labels],
+            max_values=[nodes[n].get(node_attrs.max_value.column, node_attrs.max_value.value) for n in labels])
+
+    @property
+    def capacity(self) -> float:
+        """The largest deposit that the leaves can hold."""
+        return self._capacity
+
+    @property
+    def level(self) -> float:
+        """The fill level of the floor, the lowest fill level of any leaf that can still receive a deposit."""
+        return self._level
+
+    @property
+    def values(self) -> np.array:
+        """The value of each leaf."""
+        values = np.array(self._values, dtype=float)
+        for i in self._floor:
+            values[i] = self._level * self.ratios[i]
+        return values
+
+    def deposit(self, amount: float) -> float:
+        """
+        Pour a deposit into the leaves with the lowest fill level.
+
+        Parameters:
+            amount: The amount to deposit.
+
+        Returns:
+            The fill level of the floor after the deposit.
+        """
+        if amount < 0:
+            raise ValueError('negative deposit!')
+
+        if amount > self._capacity + 1e-9 * max(1.0, amount):
+            raise ValueError('deposit is more than the leaves can hold!')
+
+        heap, caps, floor, ratios = self._heap, self._caps, self._floor, self.ratios
+        level, floor_ratio, remaining = self._level, self._floor_ratio, amount
+        while remaining > 0:
+            next_level = heap[0][0] if heap else np.inf
+            cap_level = caps[0][0] if caps else np.inf
+            target = min(next_level, cap_level)
+            if target == np.inf and floor_ratio <= 0:
+                break
+
+            if floor_ratio > 0:
+                cost = (target - level) * floor_ratio
+                if remaining <= cost:
+                    level += remaining / floor_ratio
+                    break
+                remaining -= cost
+            level = target
+
+            if cap_level <= next_level:
+                # the leaf reached its max value, and leaves the floor for good
+                _, j = heapq.heappop(caps)
+                del floor[j]
+                self._values[j] = self.max_values[j]
+                floor_ratio = floor_ratio - ratios[j] if floor else 0.0
+            else:
+                # the floor reached the next leaf, which joins it
+                _, j = heapq.heappop(heap)
+                floor[j] = None
+                floor_ratio += ratios[j]
+                if self.max_values[j] < np.inf:
+                    heapq.heappush(caps, (self.max_values[j] / ratios[j], j))
+
+        self._level, self._floor_ratio = level, floor_ratio
+        self._capacity -= amount
+        self.deposited += amount
+        return level
+
+    def deposits(self, amounts: typing.Iterable[float]) -> float:
+        """
+        Pour many deposits in turn, returning the fill level of the floor after the last one.
+        """
+        level = self._level
+        for amount in amounts:
+            level = self.deposit(amount)
+        return level
+
+    def take(self) -> typing.Dict[typing.Any, float]:
+        """
+        The amount added to each leaf since the last take, for each leaf that received anything.
+        """
+        values = self.values.tolist()
+        added = {self.labels[i]: v - t for i, (v, t) in enumerate(zip(values, self._taken)) if v != t}
+        self._taken = values
+        return added
+
+    def save(self, path: str):
+        """
+        Save the state of the allocator to a .npz file, the labels are saved as strings.
+        """
+        np.savez(
+            path,
+            labels=np.array([str(label) for label in self.labels], dtype=str),
+            ratios=np.array(self.ratios, dtype=float),
+            values=self.values,
+            max_values=np.array(self.max_values, dtype=float),
+            taken=np.array(self._taken, dtype=float),
+            deposited=np.array(self.deposited, dtype=float))
+
+    @classmethod
+    def load(cls, path: str) -> 'DepositAllocator':
+        """
+        Load the state of an allocator from a .npz file.
+        """
+        with np.load(path) as data:
+            return cls(
+                labels=data['labels'].tolist(), ratios=data['ratios'], values=data['values'],
+                max_values=data['max_values'], taken=data['taken'], deposited=float(data['deposited']))
@@ -0,0 +1,187 @@
+"""
+Precompute the allocation over a hierarchy of buckets for a whole range of amounts to add at the root.
+
+For a fixed tree, the amount added to each leaf is a piecewise linear function of the amount to add
+at the root, when the solver is exact. The unconstrained solution is linear, and the constrained and
+bounded solutions are projections of a linear function, which are linear between the amounts where a
+bucket starts or stops receiving anything. An AllocationPath finds these breakpoints once::
+
+    path = AllocationPath.create(graph, lower=0.0, upper=100000.0)
+    path.allocation_for(5000.0)
+    path.allocations_for(np.linspace(0.0, 100000.0, 1001))
+
+and then answers any amount in the range with a binary search and a linear interpolation.
+
+The breakpoints are found by tracing the linear pieces from both ends of an interval. If the piece
+from the left end reaches the right end, the interval is linear. Otherwise the two pieces are extended
+until they meet, which is exactly the breakpoint when the interval holds one, and the interval is split there.
+"""
+import networkx as nx
+import numpy as np
+import dataclasses
+import typing
+import copy
+
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers import BucketSolver
+
+from allocate.network.attributes import node_attrs
+from allocate.instrument import metrics
+
+import allocate.network.algorithms
+import allocate.solvers.graphsolver
+import allocate.solvers.treesolver
+
+
+@dataclasses.dataclass()
+class AllocationPath:
+    """
+    The amount added to each leaf of a hierarchy of buckets, as a function of the amount to add at the root.
+    """
+    # The labels of the leaves, in the order of the columns of values
+    labels: list
+    # The root amounts to add at the breakpoints of the path, in increasing order
+    amounts: np.array
+    # The amount added to each leaf at each breakpoint, one row per breakpoint
+    values: np.array
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @classmethod
+    def create(cls, graph: nx.DiGraph, lower: float, upper: float,
+               solver: typing.Type[BucketSolver] = BucketSolverBounded, whole_tree: bool = False,
+               tolerance: float = 1e-6, max_evaluations: int = 10000, **kwargs) -> 'AllocationPath':
+        """
+        Find the breakpoints of the allocation path over a range of amounts to add at the root.
+
+        Parameters:
+            graph: The DAG to process, the amount to add at its root is replaced.
+            lower: The smallest amount to add at the root.
+            upper: The largest amount to add at the root.
+            solver: The bucket solver during traversal, which must be exact (not Monte Carlo or SLSQP).
+            whole_tree: Solve all leaves at once with the tree solver instead of the graph solver.
+            tolerance: The allowed error in the allocation, relative to the largest amount.
+            max_evaluations: The maximum allowed solves of the graph.
+            **kwargs: Extra key word arguments to the solver's solve method.
+
+        Returns:
+            The allocation path over the range of amounts.
+        """
+        if upper < lower:
+            raise ValueError('upper amount is less than the lower amount in allocation path!')
+
+        leaves = [n for n in graph if graph.out_degree(n) == 0]
+        evaluate = _make_evaluate(graph, leaves, solver, whole_tree, **kwargs)
+
+        atol = tolerance * max(1.0, abs(lower), abs(upper))
+        step = 1e-7 * max(1.0, upper - lower)
+        known: typing.Dict[float, np.array] = {}
+
+        def f(amount: float) -> np.array:
+            if amount not in known:
+                if len(known) >= max_evaluations:
+                    raise RuntimeError('max evaluations reached in allocation path!')
+                known[amount] = evaluate(amount)
+            return known[amount]
+
+        def slope(a: float, b: float) -> np.array:
+            return (f(b) - f(a)) / (b - a)
+
+        if upper - lower <= 4 * step:
+            amounts = [lower, upper] if upper > lower else [lower]
+            return cls(labels=leaves, amounts=np.array(amounts), values=np.array([f(a) for a in amounts]))
+
+        breaks = {lower, upper}
+        stack = [(lower, upper, slope(lower, lower + step), slope(upper - step, upper))]
+        while stack:
+            a, b, sa, sb = stack.pop()
+            fa, fb = f(a), f(b)
+            if np.allclose(fa + sa * (b - a), fb, rtol=0.0, atol=atol) or b - a <= 4 * step:
+                continue
+
+            # the amount where the piece from the left meets the piece from the right
+            ds = sa - sb
+            dd = float(np.dot(ds, ds))
+            t = a + float(np.dot(ds, fb - fa - sb * (b - a))) / dd if dd > 0 else np.nan
+            if not a + 2 * step < t < b - 2 * step:
+                t = 0.5 * (a + b)
+
+            ft = f(t)
+            breaks.add(t)
+            if np.allclose(ft, fa + sa * (t - a), rtol=0.0, atol=atol) and \
+                    np.allclose(ft, fb + sb * (t - b), rtol=0.0, atol=atol):
+                continue
+
+            stack.append((a, t, sa, slope(t - step, t)))
+            stack.append((t, b, slope(t, t + step), sb))
+
+        amounts = np.array(sorted(breaks))
+        metrics.count('parametric.evaluations', len(known))
+        return cls(labels=leaves, amounts=amounts, values=np.array([f(a) for a in amounts]))
+
+    def allocation_for(self, amount: float) -> np.array:
+        """
+        The amount added to each leaf for an amount to add at the root.
+        """
+        return self.allocations_for(np.array([amount]))[0]
+
+    def allocations_for(self, amounts: typing.Union[list, np.array]) -> np.array:
+        """
+        The amount added to each leaf for many amounts to add at the root, one row per amount.
+        """
+        amounts = np.asanyarray(amounts, dtype=float)
+        if np.any(amounts < self.amounts[0]) or np.any(amounts > self.amounts[-1]):
+            raise ValueError('amount is outside of the allocation path!')
+
+        if len(self.amounts) == 1:
+            return np.repeat(self.values, len(amounts), axis=0)
+
+        index = np.clip(np.searchsorted(self.amounts, amounts, side='right') - 1, 0, len(self.amounts) - 2)
+        a0, a1 = self.amounts[index], self.amounts[index + 1]
+        weight = ((amounts - a0) / (a1 - a0))[:, np.newaxis]
+        return self.values[index] + weight * (self.values[index + 1] - self.values[index])
+
+    def graph_for(self, graph: nx.DiGraph, amount: float) -> nx.DiGraph:
+        """
+        A solved copy of the graph for an amount to add at the root, without running any solver.
+        """
+        graph = _with_amount(graph, amount)
+        for node in graph:
+            graph.nodes[node][node_attrs.amount_to_add.column] = 0.0
+        for node, value in zip(self.labels, self.allocation_for(amount).tolist()):
+            graph.nodes[node][node_attrs.amount_to_add.column] = value
+        graph = allocate.solvers.graphsolver._finalize_graph(graph)
+        graph.graph[allocate.solvers.graphsolver.TRUNCATED] = False
+        graph.graph[allocate.solvers.graphsolver.RESIDUAL] = allocate.solvers.graphsolver._leaf_residual(graph)
+        return graph
+
+
+def _with_amount(graph: nx.DiGraph, amount: float) -> nx.DiGraph:
+    """
+    A copy of the graph with the amount to add at the root replaced, and the optimal values updated to match.
+    """
+    graph = copy.deepcopy(graph)
+    source = allocate.network.algorithms.get_graph_root(graph)
+    graph.nodes[source][node_attrs.amount_to_add.column] = amount
+    total = allocate.network.algorithms.aggregate_quantity(graph, key=node_attrs.amount_to_add.column) + \
+        graph.nodes[source][node_attrs.current_value.column]
+    for node in graph:
+        graph.nodes[node][node_attrs.optimal_value.column] = \
+            total * graph.nodes[node].get(node_attrs.product_ratio.column, 0.0)
+    return graph
+
+
+def _make_evaluate(graph: nx.DiGraph, leaves: list, solver: typing.Type[BucketSolver], whole_tree: bool,
+                   **kwargs) -> typing.Callable[[float], np.array]:
+    """
+    Make a function that solves the graph for an amount to add at the root, returning the amount added to each leaf.
+    """
+    def evaluate(amount: float) -> np.array:
+        solving = _with_amount(graph, amount)
+        if whole_tree:
+            solved = allocate.solvers.treesolver.solve(solving, inplace=True)
+        else:
+            solved = allocate.solvers.graphsolver.solve(solving, solver=solver, inplace=True, **kwargs)
+        return np.array([solved.nodes[n][node_attrs.amount_to_add.column] for n in leaves], dtype=float)
+    return evaluate
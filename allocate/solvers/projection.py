@@ -0,0 +1,106 @@
+"""
+Euclidean projections used to turn unconstrained solutions into feasible ones.
+
+Since the bucket problem minimizes ||x - b||^2, the projection of the unconstrained solution b onto the
+feasible set is also the exact solution of the constrained problem.
+"""
+import numpy as np
+import typing
+
+
+def simplex(values: typing.Union[list, np.array], amount: typing.Union[float, np.array]) -> np.array:
+    """
+    Project onto the scaled simplex {x : x >= 0, sum(x) = amount} in O(n log n).
+
+    Parameters:
+        values: The point(s) to project, projecting along the last axis.
+        amount: The sum of the projected point(s), one per row for a 2-D input.
+
+    Returns:
+        The projected point(s).
+    """
+    values = np.asanyarray(values, dtype=float)
+    amount = np.asanyarray(amount, dtype=float)
+    if np.any(amount < 0):
+        raise ValueError('negative amount in simplex projection!')
+
+    if values.shape[-1] == 0:
+        return np.copy(values)
+
+    ordered = -np.sort(-values, axis=-1)
+    partial = np.cumsum(ordered, axis=-1) - amount[..., np.newaxis]
+    counts = np.arange(1, values.shape[-1] + 1)
+    # the number of coordinates that remain positive after the shift
+    active = np.maximum(np.sum(ordered - partial / counts > 0, axis=-1), 1)
+    shift = np.take_along_axis(partial, active[..., np.newaxis] - 1, axis=-1) / active[..., np.newaxis]
+    return np.maximum(values - shift, 0.0)
+
+
+def bounded(values: typing.Union[list, np.array], amount: float,
+            lower: typing.Union[float, list, np.array] = 0.0,
+            upper: typing.Union[float, list, np.array] = np.inf) -> np.array:
+    """
+    Project onto the box slice {x : lower <= x <= upper, sum(x) = amount} in O(n log n).
+
+    The projection is clip(values - shift, lower, upper) for the shift where the sum equals the amount.
+    The sum is piecewise linear and non-increasing in the shift, changing slope only at the breakpoints
+    values - upper and values - lower. A bisection over the sorted breakpoints finds the linear piece
+    holding the amount, with O(log n) sums of O(n) each, and the shift is then solved for exactly.
+
+    Parameters:
+        values: The point to project.
+        amount: The sum of the projected point.
+        lower: The lower bound of each coordinate, may be -inf.
+        upper: The upper bound of each coordinate, may be inf.
+
+    Returns:
+        The projected point.
+    """
+    values = np.asanyarray(values, dtype=float)
+    lower = np.broadcast_to(np.asanyarray(lower, dtype=float), values.shape)
+    upper = np.broadcast_to(np.asanyarray(upper, dtype=float), values.shape)
+    if np.any(lower > upper):
+        raise ValueError('lower bounds above upper bounds in bounded projection!')
+
+    atol = 1.0e-9 * max(1.0, abs(amount))
+    if np.sum(lower) > amount + atol or np.sum(upper) < amount - atol:
+        raise ValueError('amount is outside of the bounds in bounded projection!')
+
+    if values.shape[-1] == 0:
+        return np.copy(values)
+
+    def total(shift: float) -> float:
+        return float(np.sum(np.clip(values - shift, lower, upper)))
+
+    points = np.concatenate([values - upper, values - lower])
+    points = np.unique(points[np.isfinite(points)])
+
+    # find the last breakpoint where the sum is still at least the amount
+    lo, hi = -1, len(points)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if total(points[mid]) >= amount:
+            lo = mid
+        else:
+            hi = mid
+    left = points[lo] if lo >= 0 else -np.inf
+    right = points[hi] if hi < len(points) else np.inf
+
+    # pick a point strictly inside the linear piece, to see which coordinates are not at a bound
+    if np.isfinite(left) and np.isfinite(right):
+        inside = 0.5 * (left + right)
+    elif np.isfinite(left):
+        inside = left + 1.0
+    elif np.isfinite(right):
+        inside = right - 1.0
+    else:
+        inside = 0.0
+    free = (values - upper < inside) & (inside < values - lower)
+
+    if np.any(free):
+        fixed = np.sum(np.clip(values[~free] - inside, lower[~free], upper[~free]))
+        shift = (fixed + np.sum(values[free]) - amount) / np.sum(free)
+    else:
+        shift = left if np.isfinite(left) else right
+
+    return np.clip(values - shift, lower, upper)
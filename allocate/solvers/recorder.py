@@ -0,0 +1,244 @@
+"""
+Record the bucket problems solved over a graph, and replay them against any solver offline.
+
+The graph solver creates one BucketSystem per parent and discards it once the solve returns.
+A Recorder keeps each of these systems along with the solver, the solver kwargs, the result, and
+the time spent solving, so that a slow production run can be captured and benchmarked later::
+
+    recorder = Recorder()
+    allocate.solvers.graphsolver.solve(graph, solver=BucketSolverConstrained, recorder=recorder)
+    recorder.save('capture.npz')
+
+    report = replay(Recorder.load('capture.npz').calls, solver=BucketSolverSimple)
+"""
+import numpy as np
+import dataclasses
+import logging
+import typing
+import json
+import time
+import os
+
+from allocate.solvers.bucketdata import BucketSystem
+from allocate.solvers.basesolver import BucketSolver
+
+
+@dataclasses.dataclass()
+class Call:
+    """
+    A single recorded call to a bucket solver.
+    """
+    # The bucket problem that was solved
+    system: BucketSystem
+    # The name of the solver class
+    solver: str
+    # The extra key word arguments given to the solve method
+    kwargs: dict
+    # The amounts added to each bucket by the solver
+    result: np.array
+    # The wall time spent in the solve method (seconds)
+    elapsed: float
+
+
+@dataclasses.dataclass()
+class Recorder:
+    """
+    Collects the bucket problems solved over a graph.
+    """
+    calls: typing.List[Call] = dataclasses.field(default_factory=list)
+
+    def record(self, system: BucketSystem, solved: BucketSolver, elapsed: float, **kwargs):
+        """
+        Record a call to a bucket solver.
+
+        Parameters:
+            system: The bucket problem that was solved.
+            solved: The solver instance returned by the solve method.
+            elapsed: The wall time spent in the solve method.
+            **kwargs: The extra key word arguments given to the solve method.
+        """
+        # a pool is not a parameter of the solve, and a shared seed sequence can not be replayed
+        kwargs = {k: v for k, v in kwargs.items() if k not in ['executor']}
+        if isinstance(kwargs.get('seed'), np.random.SeedSequence):
+            kwargs['seed'] = None
+        self.calls.append(Call(
+            system=system, solver=solved.__class__.__name__, kwargs=kwargs,
+            result=np.array(solved.result_delta.values, dtype=float), elapsed=elapsed))
+
+    def save(self, path: str):
+        """
+        Save the recorded calls to a .npz or .jsonl capture file.
+        """
+        ext = os.path.splitext(path)[-1].lower()
+        if ext in ['.npz']:
+            self._save_npz(path)
+        elif ext in ['.jsonl']:
+            self._save_jsonl(path)
+        else:
+            raise ValueError(f'unknown capture extension! {ext}')
+
+    @classmethod
+    def load(cls, path: str) -> 'Recorder':
+        """
+        Load the recorded calls from a .npz or .jsonl capture file.
+        """
+        ext = os.path.splitext(path)[-1].lower()
+        if ext in ['.npz']:
+            return cls._load_npz(path)
+        elif ext in ['.jsonl']:
+            return cls._load_jsonl(path)
+        else:
+            raise ValueError(f'unknown capture extension! {ext}')
+
+    def _save_npz(self, path: str):
+        sizes = [len(c.system.current.values) for c in self.calls]
+        np.savez_compressed(
+            path,
+            offsets=np.cumsum([0] + sizes),
+            amounts=np.array([c.system.amount_to_add for c in self.calls], dtype=float),
+            current=np.concatenate([c.system.current.values for c in self.calls] or [np.zeros(0)]),
+            optimal=np.concatenate([c.system.optimal.ratios for c in self.calls] or [np.zeros(0)]),
+            results=np.concatenate([c.result for c in self.calls] or [np.zeros(0)]),
+            min_values=np.concatenate(
+                [_bounds(c.system.min_values, c.system, 0.0) for c in self.calls] or [np.zeros(0)]),
+            max_values=np.concatenate(
+                [_bounds(c.system.max_values, c.system, np.inf) for c in self.calls] or [np.zeros(0)]),
+            elapsed=np.array([c.elapsed for c in self.calls], dtype=float),
+            labels=np.array([str(label) for c in self.calls for label in c.system.current.labels], dtype=str),
+            solvers=np.array([c.solver for c in self.calls], dtype=str),
+            kwargs=np.array([json.dumps(c.kwargs, default=str) for c in self.calls], dtype=str))
+
+    @classmethod
+    def _load_npz(cls, path: str) -> 'Recorder':
+        with np.load(path) as data:
+            offsets = data['offsets']
+            calls = []
+            for i, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+                system = BucketSystem.create(
+                    amount_to_add=float(data['amounts'][i]),
+                    current_values=data['current'][start:stop],
+                    optimal_ratios=data['optimal'][start:stop],
+                    labels=list(data['labels'][start:stop]),
+                    min_values=data['min_values'][start:stop] if 'min_values' in data else None,
+                    max_values=data['max_values'][start:stop] if 'max_values' in data else None,
+                    allow_withdrawal=True)
+                calls.append(Call(
+                    system=system, solver=str(data['solvers'][i]), kwargs=json.loads(str(data['kwargs'][i])),
+                    result=data['results'][start:stop], elapsed=float(data['elapsed'][i])))
+        return cls(calls=calls)
+
+    def _save_jsonl(self, path: str):
+        with open(path, 'w') as stream:
+            for c in self.calls:
+                stream.write(json.dumps(dict(
+                    amount_to_add=c.system.amount_to_add,
+                    current_values=c.system.current.values.tolist(),
+                    optimal_ratios=c.system.optimal.ratios.tolist(),
+                    labels=[str(label) for label in c.system.current.labels],
+                    min_values=_bounds(c.system.min_values, c.system, 0.0).tolist(),
+                    max_values=_bounds(c.system.max_values, c.system, np.inf).tolist(),
+                    solver=c.solver, kwargs=c.kwargs,
+                    result=c.result.tolist(), elapsed=c.elapsed), default=str))
+                stream.write('\n')
+
+    @classmethod
+    def _load_jsonl(cls, path: str) -> 'Recorder':
+        calls = []
+        with open(path, 'r') as stream:
+            for line in stream:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                system = BucketSystem.create(
+                    amount_to_add=data['amount_to_add'], current_values=data['current_values'],
+                    optimal_ratios=data['optimal_ratios'], labels=data['labels'],
+                    min_values=data.get('min_values'), max_values=data.get('max_values'),
+                    allow_withdrawal=True)
+                calls.append(Call(
+                    system=system, solver=data['solver'], kwargs=data['kwargs'],
+                    result=np.array(data['result'], dtype=float), elapsed=data['elapsed']))
+        return cls(calls=calls)
+
+
+def _bounds(values: typing.Optional[np.array], system: BucketSystem, default: float) -> np.array:
+    """The bounds of a system, or the default bound for every bucket when there are none"""
+    if values is None:
+        return np.full_like(system.current.values, default)
+    return np.asanyarray(values, dtype=float)
+
+
+@dataclasses.dataclass()
+class Report:
+    """
+    The results of replaying recorded calls against a solver.
+    """
+    # The name of the solver class that was replayed
+    solver: str
+    # The wall time of each replayed call (seconds)
+    latencies: np.array
+    # The wall time of each call when it was recorded (seconds)
+    recorded: np.array
+    # The largest absolute difference between the replayed and recorded result of each call
+    differences: np.array
+    # The number of calls that raised an exception
+    failures: int
+
+    def percentiles(self, q: typing.Sequence[float] = (50, 90, 99, 100)) -> typing.Dict[float, float]:
+        """
+        Get percentiles of the replayed latencies.
+        """
+        if not len(self.latencies):
+            return {p: float('nan') for p in q}
+        return dict(zip(q, np.percentile(self.latencies, q)))
+
+    def __str__(self):
+        lines = [
+            f'solver         : {self.solver}',
+            f'calls          : {len(self.latencies)}',
+            f'failures       : {self.failures}',
+            f'total          : {np.sum(self.latencies):.6f}s (recorded {np.sum(self.recorded):.6f}s)',
+        ]
+        for p, v in self.percentiles().items():
+            lines.append(f'{f"latency p{p:g}":<15}: {v:.6f}s')
+        if len(self.differences):
+            lines.append(f'max difference : {np.nanmax(self.differences):.6e}')
+            lines.append(f'mean difference: {np.nanmean(self.differences):.6e}')
+        return '\n'.join(lines)
+
+
+def replay(calls: typing.Iterable[Call], solver: typing.Type[BucketSolver],
+           use_recorded_kwargs: bool = False, **kwargs) -> Report:
+    """
+    Rerun recorded calls against a solver class.
+
+    Parameters:
+        calls: The recorded calls to replay.
+        solver: The bucket solver class to benchmark.
+        use_recorded_kwargs: Pass the recorded kwargs to the solver, updated with the given kwargs.
+        **kwargs: Extra key word arguments to the solver's solve method.
+
+    Returns:
+        The latencies and result differences of the replayed calls.
+    """
+    latencies, recorded, differences, failures = [], [], [], 0
+    for call in calls:
+        options = dict(call.kwargs, **kwargs) if use_recorded_kwargs else kwargs
+        start = time.perf_counter()
+        # noinspection PyBroadException
+        try:
+            solved = solver.solve(call.system, **options)
+        except Exception:
+            logging.exception('caught exception while replaying call!')
+            failures += 1
+            solved = None
+        latencies.append(time.perf_counter() - start)
+        recorded.append(call.elapsed)
+        if solved is not None:
+            differences.append(float(np.max(np.abs(solved.result_delta.values - call.result), initial=0.0)))
+        else:
+            differences.append(np.nan)
+
+    return Report(
+        solver=solver.__name__,
+        latencies=np.array(latencies), recorded=np.array(recorded),
+        differences=np.array(differences), failures=failures)
@@ -0,0 +1,78 @@
+"""
+A sum tree over non-negative weights, for sampling an index in proportion to its weight.
+
+Sampling and updating a single weight both cost O(log n), instead of the O(n) needed to rebuild
+and normalize a probability vector after every change.
+"""
+import numpy as np
+import typing
+
+
+class SumTree:
+    """
+    A complete binary tree where every internal node holds the sum of its two children.
+    The leaves hold the weights, and the root holds the total weight.
+    """
+    __slots__ = ('size', 'capacity', 'nodes')
+
+    def __init__(self, weights: typing.Union[list, np.array]):
+        weights = np.asanyarray(weights, dtype=float)
+        if np.any(weights < 0):
+            raise ValueError('negative weights in sum tree!')
+
+        self.size = len(weights)
+        self.capacity = 1 << max(0, (self.size - 1).bit_length())
+
+        nodes = np.zeros(2 * self.capacity)
+        nodes[self.capacity:self.capacity + self.size] = weights
+        # build the internal nodes one level at a time, from the leaves up
+        start = self.capacity
+        while start > 1:
+            nodes[start // 2:start] = nodes[start:2 * start:2] + nodes[start + 1:2 * start:2]
+            start //= 2
+
+        # plain floats in a list are much faster than numpy scalars for single element access
+        self.nodes: typing.List[float] = nodes.tolist()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> float:
+        return self.nodes[self.capacity + index]
+
+    @property
+    def total(self) -> float:
+        """The sum of all weights."""
+        return self.nodes[1]
+
+    @property
+    def weights(self) -> np.array:
+        """A copy of the weights."""
+        return np.array(self.nodes[self.capacity:self.capacity + self.size])
+
+    def update(self, index: int, weight: float):
+        """
+        Set the weight at the index, and update the sums of its ancestors.
+        """
+        nodes = self.nodes
+        j = self.capacity + index
+        nodes[j] = weight
+        j >>= 1
+        while j:
+            nodes[j] = nodes[2 * j] + nodes[2 * j + 1]
+            j >>= 1
+
+    def find(self, value: float) -> int:
+        """
+        Find the index whose cumulative weight interval contains the value, where 0 <= value < total.
+        Subtrees with no weight are never entered, so rounding can not select an index with zero weight.
+        """
+        nodes = self.nodes
+        j = 1
+        while j < self.capacity:
+            j <<= 1
+            left = nodes[j]
+            if value >= left and nodes[j + 1] > 0:
+                value -= left
+                j += 1
+        return j - self.capacity
@@ -0,0 +1,88 @@
+"""
+Solve the bucket problem over a hierarchy of buckets as a single problem over the leaves.
+
+The graph solver solves the children of each parent on their own and pushes the amounts down,
+which takes one call to the bucket solver per parent, and with constraints the local solutions
+need not be the best allocation for the whole tree. Here the amounts are chosen for every leaf at once::
+
+    minimize   || current + x - optimal ||^2
+    subject to x >= 0, sum(x) = amount
+
+where optimal is each leaf's optimal_value (the product_ratio times the final total).
+Since the objective is the identity quadratic, the solution is the Euclidean projection of
+optimal - current onto the scaled simplex, which is found exactly in O(n log n) with no iterations.
+
+All amounts to add in the tree are pooled and distributed over the leaves of the whole tree.
+The min_value and max_value bounds of the leaves are kept, using the bounded projection instead,
+but the bounds of the other nodes are not.
+
+A negative total amount is a withdrawal, taken from the leaves with -current <= x <= 0.
+"""
+import networkx as nx
+import numpy as np
+import copy
+
+from allocate.network.attributes import node_attrs
+from allocate.solvers.graphsolver import TRUNCATED
+from allocate.solvers.graphsolver import RESIDUAL
+from allocate.instrument import metrics
+
+import allocate.solvers.projection
+import allocate.solvers.graphsolver
+
+
+@metrics.timed('solve')
+def solve(graph: nx.DiGraph, inplace: bool = False) -> nx.DiGraph:
+    """
+    Solve the bucket problem over all leaves of a hierarchy of buckets at once.
+
+    Parameters:
+        graph: The DAG to process.
+        inplace: Should the operation happen in place or on a copy?
+
+    Returns:
+        The modified graph, with the results_value and results_delta updated.
+        The graph attributes hold whether the solve was truncated (never) and the leaf ratio residual.
+    """
+    if not inplace:
+        graph = copy.deepcopy(graph)
+
+    # noinspection PyCallingNonCallable
+    leaves = [n for n in graph if graph.out_degree(n) == 0]
+    amount = sum(graph.nodes[n][node_attrs.amount_to_add.column] for n in graph)
+    current_values = np.fromiter(
+        (graph.nodes[n][node_attrs.current_value.column] for n in leaves), dtype=float, count=len(leaves))
+    optimal_values = np.fromiter(
+        (graph.nodes[n][node_attrs.optimal_value.column] for n in leaves), dtype=float, count=len(leaves))
+
+    min_values = np.fromiter(
+        (graph.nodes[n].get(node_attrs.min_value.column, node_attrs.min_value.value) for n in leaves),
+        dtype=float, count=len(leaves))
+    max_values = np.fromiter(
+        (graph.nodes[n].get(node_attrs.max_value.column, node_attrs.max_value.value) for n in leaves),
+        dtype=float, count=len(leaves))
+    if amount < 0:
+        upper = np.minimum(max_values - current_values, 0.0)
+        lower = np.minimum(np.minimum(np.maximum(min_values - current_values, -current_values), 0.0), upper)
+    else:
+        lower = np.maximum(min_values - current_values, 0.0)
+        upper = np.maximum(max_values - current_values, lower)
+
+    with metrics.stage('projection'):
+        if amount < 0 or np.any(lower > 0) or np.any(np.isfinite(upper)):
+            delta = allocate.solvers.projection.bounded(optimal_values - current_values, amount, lower, upper)
+        else:
+            delta = allocate.solvers.projection.simplex(optimal_values - current_values, amount)
+    metrics.count('solver.calls.global')
+
+    graph.graph[TRUNCATED] = False
+    for node in graph:
+        graph.nodes[node][node_attrs.amount_to_add.column] = 0.0
+    for node, value in zip(leaves, delta.tolist()):
+        graph.nodes[node][node_attrs.amount_to_add.column] = value
+
+    graph = allocate.solvers.graphsolver._finalize_graph(graph)
+    graph.graph[RESIDUAL] = allocate.solvers.graphsolver._leaf_residual(graph)
+    allocate.solvers.graphsolver._validate_results(graph)
+
+    return graph
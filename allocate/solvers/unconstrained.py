@@ -4,6 +4,7 @@ This is a pretty straight forward solution and places no major constrains on the
 """
 import numpy as np
 import dataclasses
+import typing
 
 from allocate.solvers.basesolver import BucketSolver
 from allocate.solvers.bucketdata import BucketSystem
@@ -17,14 +18,18 @@ class BucketSolverSimple(BucketSolver):
     This is a pretty straight forward solution and places no major constrains on the problem.
     """
     # The matrix A in the equation Ax = b
-    a_matrix: np.array
+    a_matrix: np.array = None
     # The vector b in the equation Ax = b
-    b_vector: np.array
+    b_vector: np.array = None
+    # The amounts added are (amount_to_add + current.amount) * optimal.ratios - current.values
+    linear: typing.ClassVar[bool] = True
 
+    # noinspection PyUnusedLocal
     @classmethod
-    def solve(cls, system: BucketSystem) -> 'BucketSolverSimple':
+    def solve(cls, system: BucketSystem, deadline: float = None) -> 'BucketSolverSimple':
         """
         Solve the bucket problem.
+        The solution is closed form, so the deadline is accepted for compatibility but never truncates.
         """
         a_matrix = cls._make_a_matrix(system)
         b_vector = cls._make_b_vector(system)
@@ -0,0 +1,65 @@
+"""
+Solve the bucket problem for a withdrawal, but do not allow moving values between buckets.
+In this version of the problem, the amount to add is negative, and we can only take from buckets.
+This is the mirror of the constrained solver, the amount is taken from the most overweight buckets first.
+"""
+import numpy as np
+import dataclasses
+import typing
+
+from allocate.solvers.bucketdata import BucketSystem
+from allocate.solvers.bucketdata import BucketData
+
+from allocate.solvers.unconstrained import BucketSolverSimple
+
+import allocate.solvers.projection
+
+
+@dataclasses.dataclass()
+class BucketSolverWithdrawal(BucketSolverSimple):
+    """
+    Solve the bucket problem for a withdrawal, but do not allow moving values between buckets.
+
+    Since the problem minimizes ||x - b||^2, the solution is the projection of the unconstrained solution b
+    onto {x : -current <= x <= 0, sum(x) = amount}, found exactly in O(n log n) by a breakpoint search.
+    """
+    # The lower bound on the amount added to each bucket
+    lower: np.array = None
+    # The upper bound on the amount added to each bucket
+    upper: np.array = None
+
+    withdrawal: typing.ClassVar[bool] = True
+
+    # noinspection PyUnusedLocal
+    @classmethod
+    def solve(cls, system: BucketSystem, deadline: float = None) -> 'BucketSolverWithdrawal':
+        """
+        Solve the bucket problem.
+        The solution is closed form, so the deadline is accepted for compatibility but never truncates.
+        """
+        if system.amount_to_add > 0:
+            raise ValueError('amount to add is positive in a withdrawal!')
+
+        a_matrix = cls._make_a_matrix(system)
+        b_vector = cls._make_b_vector(system)
+        lower, upper = cls._make_bounds(system)
+        n_values = allocate.solvers.projection.bounded(b_vector, system.amount_to_add, lower, upper)
+        result_delta = BucketData.from_values(values=np.minimum(n_values, 0.0), allow_negative_values=True)
+        result_total = BucketData.from_values(values=np.maximum(system.current.values + result_delta.values, 0.0))
+        return cls(system=system,
+                   result_delta=result_delta, result_total=result_total,
+                   a_matrix=a_matrix, b_vector=b_vector, lower=lower, upper=upper)
+
+    @staticmethod
+    def _make_bounds(system: BucketSystem) -> (np.array, np.array):
+        """
+        Make the bounds on the amount added to each bucket from the bounds on the values.
+        Nothing is ever added, so a bucket already below its min_value gives nothing more.
+        """
+        lower = -system.current.values
+        upper = np.zeros_like(system.current.values)
+        if system.max_values is not None:
+            upper = np.minimum(system.max_values - system.current.values, 0.0)
+        if system.min_values is not None:
+            lower = np.minimum(np.maximum(system.min_values - system.current.values, lower), 0.0)
+        return np.minimum(lower, upper), upper
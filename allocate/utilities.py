@@ -1,8 +1,9 @@
 """
 Miscellaneous helper functions.
 """
-import itertools
+import numpy as np
 import decimal
+import typing
 
 
 def moneyfmt(value, *values, width: int = 12, decimals: int = 2) -> str:
@@ -18,10 +19,91 @@ def moneyfmt(value, *values, width: int = 12, decimals: int = 2) -> str:
     Returns:
         The formatted money string.
     """
-    cent = '0.{}1'.format('0' * (decimals - 1))
-    cent = decimal.Decimal(cent)
-    if values:
-        return ', '.join('{:>{width},}'.format(decimal.Decimal(v).quantize(cent, decimal.ROUND_HALF_UP), width=width)
-                         for v in itertools.chain([value], values))
-    else:
-        return '{:>{width},}'.format(decimal.Decimal(value).quantize(cent, decimal.ROUND_HALF_UP), width=width)
+    return ', '.join(moneyfmt_array([value, *values], width=width, decimals=decimals))
+
+
+def moneyfmt_array(values: typing.Union[list, np.array], width: int = 12, decimals: int = 2) -> typing.List[str]:
+    """
+    Format many values as money rounded to pennies, half away from zero, as moneyfmt does one value at a time.
+
+    Parameters:
+        values: The values to format.
+        width: The output width to justify each string in.
+        decimals: The number of decimals to round to.
+
+    Returns:
+        The formatted money string of each value.
+    """
+    values = np.asanyarray(values, dtype=float).reshape(-1)
+    cents = to_cents(values, decimals=decimals)
+    if cents is None:
+        cent = decimal.Decimal(1).scaleb(-decimals)
+        return ['{:>{width},}'.format(decimal.Decimal(v).quantize(cent, decimal.ROUND_HALF_UP), width=width)
+                for v in values.tolist()]
+
+    # whole cents over the scale are the nearest floats to the rounded values, which format back exactly
+    rounded = np.copysign(np.abs(cents) / 10 ** decimals, values)
+    return list(map('{{:>{},.{}f}}'.format(width, decimals).format, rounded.tolist()))
+
+
+def to_cents(values: typing.Union[list, np.array], decimals: int = 2) -> typing.Optional[np.array]:
+    """
+    Round values to integer cents, half away from zero, exactly as decimal.ROUND_HALF_UP does.
+
+    Parameters:
+        values: The values to round.
+        decimals: The number of decimals to round to.
+
+    Returns:
+        The values in cents, or None if a value is not finite or is too large to be held exactly.
+    """
+    values = np.asanyarray(values, dtype=float)
+    scaled = np.abs(values) * 10 ** decimals
+    if not np.all(np.isfinite(scaled)) or (scaled.size and np.max(scaled) >= 2 ** 53):
+        return None
+
+    floor = np.floor(scaled)
+    cents = (floor + (scaled - floor >= 0.5)).astype(np.int64)
+    # the scaling is inexact, so values within rounding error of half a cent are rounded by decimal
+    cent = decimal.Decimal(1).scaleb(-decimals)
+    for i in np.flatnonzero(np.abs(scaled - floor - 0.5) <= 2 * np.spacing(scaled)).tolist():
+        value = decimal.Decimal(abs(float(values.flat[i]))).quantize(cent, decimal.ROUND_HALF_UP)
+        cents.flat[i] = int(value.scaleb(decimals))
+    return np.where(np.signbit(values), -cents, cents)
+
+
+def round_cents(values: typing.Union[list, np.array], total: typing.Optional[int] = None,
+                decimals: int = 2) -> np.array:
+    """
+    Round values to integer cents that sum exactly to a total, by the largest remainder method.
+
+    Every value is rounded down, and the cents still missing from the total are given to the values that lost
+    the most by rounding down, so that no value moves by a cent or more unless the total asks for it.
+
+    Parameters:
+        values: The values to round.
+        total: The sum of the rounded values in cents, or None for the sum of the values rounded to cents.
+        decimals: The number of decimals to round to.
+
+    Returns:
+        The values in cents as int64.
+    """
+    scaled = np.asanyarray(values, dtype=float) * 10 ** decimals
+    if not np.all(np.isfinite(scaled)):
+        raise ValueError('can not round values that are not finite!')
+
+    floor = np.floor(scaled)
+    cents = floor.astype(np.int64)
+    target = int(np.round(np.sum(scaled))) if total is None else int(total)
+    missing = target - int(np.sum(cents))
+    if len(cents) == 0:
+        if missing:
+            raise ValueError('can not round a total into no values!')
+        return cents
+
+    # python floor division, so a negative number of missing cents is taken from every value then given back
+    cents += missing // len(cents)
+    missing %= len(cents)
+    if missing:
+        cents[np.argsort(floor - scaled, kind='stable')[:missing]] += 1
+    return cents
@@ -0,0 +1,74 @@
+"""
+Benchmark the SLSQP constrained solver with finite difference and analytic gradients by bucket count.
+
+    python -m benchmarks.bench_constrained --buckets 10 50 100 200
+"""
+import numpy as np
+import argparse
+import logging
+import time
+
+import allocate.configure
+import allocate.instrument
+import allocate.solvers.bucketdata
+import allocate.solvers.constrained
+
+
+MODES = {
+    'finite-difference': dict(analytic=False, warm_start=False),
+    'analytic': dict(analytic=True, warm_start=False),
+    'analytic+warm': dict(analytic=True, warm_start=True),
+}
+
+
+# noinspection DuplicatedCode
+def get_arguments(args=None) -> argparse.Namespace:
+    """
+    Get the command line arguments.
+    """
+    # noinspection PyTypeChecker
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--buckets', nargs='+', type=int, default=[10, 50, 100, 200],
+                        help='The bucket counts to benchmark')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='The number of random systems to solve for each bucket count')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='The seed for the random systems')
+    return parser.parse_args(args=args)
+
+
+def main(buckets: list, repeat: int, seed: int):
+    """
+    The main logic of the script.
+    """
+    rng = np.random.default_rng(seed)
+    logging.debug('%8s %-18s %8s %8s %8s %12s', 'buckets', 'mode', 'nit', 'nfev', 'njev', 'seconds')
+    for n in buckets:
+        systems = [
+            allocate.solvers.bucketdata.BucketSystem.create(
+                amount_to_add=1000.0 * n, current_values=rng.random(n) * 1000.0, optimal_ratios=rng.random(n))
+            for _ in range(repeat)
+        ]
+        for mode, kwargs in MODES.items():
+            allocate.instrument.metrics.reset()
+            start = time.perf_counter()
+            for system in systems:
+                allocate.solvers.constrained.BucketSolverConstrained.solve(system, **kwargs)
+            elapsed = (time.perf_counter() - start) / repeat
+            counters = allocate.instrument.metrics.counters
+            logging.debug('%8d %-18s %8.1f %8.1f %8.1f %12.6f', n, mode,
+                          counters.get('slsqp.nit', 0) / repeat,
+                          counters.get('slsqp.nfev', 0) / repeat,
+                          counters.get('slsqp.njev', 0) / repeat, elapsed)
+
+
+if __name__ == '__main__':
+    # noinspection PyBroadException
+    try:
+        allocate.configure.logging()
+        opts = get_arguments()
+        main(**opts.__dict__)
+    except Exception:
+        logging.exception('caught unhandled exception!')
+        exit(-1)
+    exit(0)
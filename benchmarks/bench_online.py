@@ -0,0 +1,56 @@
+"""
+Benchmark the online deposit allocator on a stream of small deposits by leaf count.
+
+    python -m benchmarks.bench_online --leaves 10 100 1000 --deposits 100000
+"""
+import numpy as np
+import argparse
+import logging
+import time
+
+import allocate.configure
+import allocate.solvers.online
+
+
+# noinspection DuplicatedCode
+def get_arguments(args=None) -> argparse.Namespace:
+    """
+    Get the command line arguments.
+    """
+    # noinspection PyTypeChecker
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leaves', nargs='+', type=int, default=[10, 100, 1000],
+                        help='The leaf counts to benchmark')
+    parser.add_argument('--deposits', type=int, default=100000,
+                        help='The number of deposits to allocate for each leaf count')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='The seed for the random allocators and deposits')
+    return parser.parse_args(args=args)
+
+
+def main(leaves: list, deposits: int, seed: int):
+    """
+    The main logic of the script.
+    """
+    rng = np.random.default_rng(seed)
+    logging.debug('%8s %10s %12s %14s', 'leaves', 'deposits', 'seconds', 'deposits/s')
+    for n in leaves:
+        allocator = allocate.solvers.online.DepositAllocator(
+            labels=list(range(n)), ratios=rng.random(n), values=rng.random(n) * 1000.0)
+        amounts = rng.random(deposits) * 10.0
+        start = time.perf_counter()
+        allocator.deposits(amounts)
+        elapsed = time.perf_counter() - start
+        logging.debug('%8d %10d %12.6f %14.0f', n, deposits, elapsed, deposits / elapsed)
+
+
+if __name__ == '__main__':
+    # noinspection PyBroadException
+    try:
+        allocate.configure.logging()
+        opts = get_arguments()
+        main(**opts.__dict__)
+    except Exception:
+        logging.exception('caught unhandled exception!')
+        exit(-1)
+    exit(0)
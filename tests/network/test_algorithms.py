@@ -36,27 +36,27 @@ def test_get_graph_root(graph, expected_root: str):
             ('0', dict(level=0,
                        current_value=8000.0, results_value=0.0, optimal_value=8000.0 * 1.00,
                        current_ratio=1.0000, optimal_ratio=1.00, results_ratio=0.0, product_ratio=1.00,
-                       amount_to_add=0.0)),
+                       amount_to_add=0.0, min_value=0.0, max_value=float('inf'))),
             ('X', dict(level=1,
                        current_value=2500.0, results_value=0.0, optimal_value=8000.0 * 0.45,
                        current_ratio=0.3125, optimal_ratio=0.45, results_ratio=0.0, product_ratio=0.45,
-                       amount_to_add=0.0)),
+                       amount_to_add=0.0, min_value=0.0, max_value=float('inf'))),
             ('Y', dict(level=1,
                        current_value=5000.0, results_value=0.0, optimal_value=8000.0 * 0.20,
                        current_ratio=0.6250, optimal_ratio=0.20, results_ratio=0.0, product_ratio=0.20,
-                       amount_to_add=0.0)),
+                       amount_to_add=0.0, min_value=0.0, max_value=float('inf'))),
             ('Z', dict(level=1,
                        current_value=500.00, results_value=0.0, optimal_value=8000.0 * 0.35,
                        current_ratio=0.0625, optimal_ratio=0.35, results_ratio=0.0, product_ratio=0.35,
-                       amount_to_add=0.0)),
+                       amount_to_add=0.0, min_value=0.0, max_value=float('inf'))),
             ('Q', dict(level=2,
                        current_value=200.00, results_value=0.0, optimal_value=8000.0 * 0.35 * 0.25,
                        current_ratio=0.4000, optimal_ratio=0.25, results_ratio=0.0, product_ratio=0.35 * 0.25,
-                       amount_to_add=0.0)),
+                       amount_to_add=0.0, min_value=0.0, max_value=float('inf'))),
             ('R', dict(level=2,
                        current_value=300.00, results_value=0.0, optimal_value=8000.0 * 0.35 * 0.75,
                        current_ratio=0.6000, optimal_ratio=0.75, results_ratio=0.0, product_ratio=0.35 * 0.75,
-                       amount_to_add=0.0)),
+                       amount_to_add=0.0, min_value=0.0, max_value=float('inf'))),
         ], edges=[
             ('0', 'X'), ('0', 'Y'), ('0', 'Z'), ('Z', 'Q'), ('Z', 'R')
         ]),
@@ -235,3 +235,9 @@ def test_is_leaf_node():
     assert allocate.network.algorithms.is_leaf_node(graph, 'C')
     assert allocate.network.algorithms.is_leaf_node(graph, 'A') is False
     assert allocate.network.algorithms.is_leaf_node(graph, 'B') is False
+
+
+def test_leaf_mask():
+    graph = tests.utilities.make_graph(nodes=[('A', {}), ('B', {}), ('C', {})], edges=[('A', 'B'), ('B', 'C')])
+    assert list(allocate.network.algorithms.leaf_mask(graph, ['A', 'B', 'C'])) == [False, False, True]
+    assert list(allocate.network.algorithms.leaf_mask(graph, [])) == []
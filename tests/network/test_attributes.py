@@ -1,6 +1,7 @@
 """
 Unit tests for module.
 """
+import numpy as np
 import dataclasses
 import pytest
 
@@ -35,3 +36,27 @@ def test_subset_given_unknown_raises():
 def test_subset_given_unknown_ignores_when_not_strict():
     observed = list(node_attrs.subset('missing', strict=False))
     assert not observed
+
+
+def test_schema_tables():
+    schema = node_attrs.schema
+    assert schema is node_attrs.schema
+    assert schema.subset() == tuple(node_attrs.subset())
+    assert schema.subset(DISPLAY_INP) == tuple(node_attrs.subset(filters=DISPLAY_INP))
+    assert schema.positions[node_attrs.label.column] == 0
+    assert schema.names['amount_to_add'] is node_attrs.amount_to_add
+    with pytest.raises(TypeError):
+        schema.tables[DISPLAY_INP] = ()
+
+
+def test_schema_array():
+    array = node_attrs.schema.array(3)
+    assert array.dtype.names == tuple(node_attrs.columns())
+    assert array.dtype['current_value'] == np.float64
+    assert array.dtype['level'] == np.int64
+    assert array.dtype['label'] == object
+    assert list(array['max_value']) == [float('inf')] * 3
+
+    array = node_attrs.schema.array(2, 'optimal_ratio', 'level')
+    assert array.dtype.names == ('optimal_ratio', 'level')
+    assert list(array['level']) == [-1, -1]
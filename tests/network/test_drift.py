@@ -0,0 +1,77 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pandas as pd
+import numpy as np
+import pytest
+
+import allocate.network.algorithms
+import allocate.network.template
+import allocate.network.drift
+
+
+@pytest.fixture()
+def graph() -> nx.DiGraph:
+    frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=0.0, children=('3', '4', '5')),
+        dict(label='3', current_value=5000.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='4', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0, children=('A', 'Z')),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0, children=('C', 'D')),
+        dict(label='A', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='Z', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='C', current_value=1500.0, optimal_ratio=0.40, amount_to_add=0.0, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.60, amount_to_add=0.0, children=()),
+    ])
+    yield allocate.network.algorithms.create(frame)
+
+
+@pytest.fixture()
+def template(graph: nx.DiGraph) -> allocate.network.template.Template:
+    yield allocate.network.template.Template.compile(graph)
+
+
+def test_screen(template: allocate.network.template.Template):
+    # leaves are 3, A, Z, C, D with product ratios 0.5, 0.125, 0.125, 0.1, 0.15
+    values = np.array([
+        [500.0, 125.0, 125.0, 100.0, 150.0],
+        [600.0, 100.0, 100.0, 100.0, 100.0],
+        [0.0, 0.0, 0.0, 0.0, 0.0],
+        [400.0, 125.0, 125.0, 250.0, 100.0],
+    ])
+    report = allocate.network.drift.screen(template, values)
+    assert len(report) == 4
+    np.testing.assert_allclose(report.deviations[0], 0.0, atol=1e-12)
+    np.testing.assert_allclose(report.deviations[1], [0.1, -0.025, -0.025, 0.0, -0.05])
+    np.testing.assert_allclose(report.deviations[2], -template.product_ratios[template.leaves])
+    np.testing.assert_allclose(report.drifts, [0.0, 0.1, 0.5, 0.15])
+    np.testing.assert_allclose(report.distances[1], np.sqrt(0.01 + 2 * 0.025 ** 2 + 0.05 ** 2))
+
+    np.testing.assert_array_equal(report.flagged(0.05), [1, 2, 3])
+    np.testing.assert_array_equal(report.flagged(0.2), [2])
+    np.testing.assert_array_equal(report.top_accounts(3), [2, 3, 1])
+    assert len(report.top_accounts(10)) == 4
+
+    top = report.top_leaves(2)
+    assert top[0] == (2, '3', pytest.approx(-0.5))
+    assert abs(top[1][2]) == pytest.approx(0.15)
+
+
+def test_sibling_deviations(template: allocate.network.template.Template):
+    report = allocate.network.drift.screen(template, [[500.0, 200.0, 50.0, 100.0, 150.0]])
+    deviations = dict(zip(template.labels, report.sibling_deviations()[0]))
+    assert deviations['B'] == 0.0
+    assert deviations['3'] == pytest.approx(0.0)
+    assert deviations['A'] == pytest.approx(0.3)
+    assert deviations['Z'] == pytest.approx(-0.3)
+    assert deviations['C'] == pytest.approx(0.0)
+
+
+def test_stack(graph: nx.DiGraph, template: allocate.network.template.Template):
+    values = allocate.network.drift.stack(template, [graph, graph])
+    np.testing.assert_allclose(values, [[5000.0, 500.0, 500.0, 1500.0, 500.0]] * 2)
+    assert allocate.network.drift.stack(template, []).shape == (0, 5)
+
+    other = nx.relabel_nodes(graph, {'A': 'Y'})
+    with pytest.raises(ValueError):
+        allocate.network.drift.stack(template, [other])
@@ -0,0 +1,55 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pandas as pd
+import numpy as np
+import pytest
+
+import allocate.network.algorithms
+import allocate.network.template
+
+
+@pytest.fixture()
+def graph() -> nx.DiGraph:
+    frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=0.0, children=('3', '4', '5')),
+        dict(label='3', current_value=5000.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='4', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0, children=('A', 'Z')),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0, children=('C', 'D')),
+        dict(label='A', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='Z', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='C', current_value=1500.0, optimal_ratio=0.40, amount_to_add=0.0, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.60, amount_to_add=0.0, children=()),
+    ])
+    yield allocate.network.algorithms.create(frame)
+
+
+def test_compile(graph: nx.DiGraph):
+    template = allocate.network.template.Template.compile(graph)
+    assert template.labels[template.root] == 'B'
+    assert template.leaf_labels == ['3', 'A', 'Z', 'C', 'D']
+    assert [template.labels[p] for p, _ in template.parents] == ['B', '4', '5']
+    np.testing.assert_allclose(
+        template.product_ratios[template.leaves], [0.5, 0.125, 0.125, 0.1, 0.15])
+    for parent, children in template.parents:
+        assert np.sum(template.optimal_ratios[children]) == pytest.approx(1.0)
+
+
+def test_node_values(graph: nx.DiGraph):
+    template = allocate.network.template.Template.compile(graph)
+    leaf_values = np.array([[5000.0, 500.0, 500.0, 1500.0, 500.0], [1.0, 2.0, 3.0, 4.0, 5.0]])
+    observed = template.node_values(leaf_values)
+    assert observed.shape == (2, len(template.labels))
+    for label, column in zip(template.labels, observed.T):
+        if label in ['B', '4', '5']:
+            continue
+        np.testing.assert_allclose(column[0], graph.nodes[label]['current_value'])
+    np.testing.assert_allclose(observed[:, template.labels.index('B')], [8000.0, 15.0])
+    np.testing.assert_allclose(observed[:, template.labels.index('5')], [2000.0, 9.0])
+
+
+def test_node_values_raises_on_wrong_shape(graph: nx.DiGraph):
+    template = allocate.network.template.Template.compile(graph)
+    with pytest.raises(ValueError, match='shape mismatch'):
+        template.node_values(np.zeros((2, 3)))
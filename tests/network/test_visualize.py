@@ -4,6 +4,7 @@ Unit tests for module.
 import networkx as nx
 import logging
 import pytest
+import io
 
 import allocate.network.visualize
 import tests.utilities
@@ -26,3 +27,48 @@ import tests.utilities
 ])
 def test_text(graph: nx.DiGraph, attrs: dict):
     logging.debug('\n%s', allocate.network.visualize.text(graph, **attrs))
+
+
+@pytest.fixture()
+def graph() -> nx.DiGraph:
+    yield tests.utilities.make_graph(nodes=[
+        ('0', dict(value=8.00)),
+        ('A', dict(value=2.00)),
+        ('B', dict(value=2.00)),
+        ('C', dict(value=4.00)),
+        ('D', dict(value=4.00)),
+        ('E', dict(value=4.00)),
+    ], edges=[
+        ('0', 'A'), ('0', 'B'), ('0', 'C'), ('C', 'D'), ('C', 'E')
+    ])
+
+
+def test_text_layout(graph: nx.DiGraph):
+    assert allocate.network.visualize.text(graph) == '0\n ├─A\n ├─B\n └─C\n    ├─D\n    └─E\n'
+    assert allocate.network.visualize.text(graph, value='{:.1f}').splitlines() == [
+        '0        value=8.0',
+        ' ├─A     value=2.0',
+        ' ├─B     value=2.0',
+        ' └─C     value=4.0',
+        '    ├─D  value=4.0',
+        '    └─E  value=4.0',
+    ]
+
+
+def test_text_options(graph: nx.DiGraph):
+    assert allocate.network.visualize.text(graph, max_depth=1) == '0\n ├─A\n ├─B\n └─C\n'
+    assert allocate.network.visualize.text(graph, max_depth=0) == '0\n'
+    assert allocate.network.visualize.text(graph, max_children=1) == '0\n ├─A\n └─… 2 more\n'
+    assert allocate.network.visualize.text(graph, max_children=2) == \
+        '0\n ├─A\n ├─B\n └─… 1 more\n'
+    assert allocate.network.visualize.text(graph, leaves_only=True) == 'A\nB\nD\nE\n'
+    assert allocate.network.visualize.text(graph, leaves_only=True, value='{:.1f}').splitlines()[0] == 'A  value=2.0'
+
+
+def test_write_deep_tree():
+    graph = nx.path_graph(5000, create_using=nx.DiGraph)
+    stream = io.StringIO()
+    allocate.network.visualize.write(graph, stream)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 5000
+    assert lines[-1] == 4998 * '   ' + ' └─4999'
@@ -2,11 +2,88 @@
 Unit tests for module.
 """
 import unittest.mock
+import panel as pn
+import pathlib
+import pytest
+import time
 
 from allocate.plotting.dashboard.dashboard import Dashboard
+from allocate.network.attributes import node_attrs
 
 
 def test_setup_called_on_create():
     with unittest.mock.patch.object(Dashboard, '__setup__') as m0:
         w0 = Dashboard()
         m0.assert_called_once()
+
+
+@pytest.fixture()
+def dashboard() -> Dashboard:
+    dashboard = Dashboard(config=str(pathlib.Path(__file__).parents[3] / 'allocate.yaml'), debounce=0.05)
+    yield dashboard
+    dashboard.close()
+
+
+def test_empty_dashboard():
+    w0 = Dashboard()
+    assert isinstance(w0.layout, pn.pane.Markdown)
+    w0.connect()
+    w0.close()
+
+
+def test_request_solves_and_caches(dashboard: Dashboard):
+    assert dashboard.layout is not None
+    future = dashboard.request()
+    solved = future.result()
+    assert dashboard.model['solves'] == 1
+    assert dashboard.view['outputs'].object is not None
+    added = sum(solved.nodes[n][node_attrs.amount_to_add.column] for n in solved if solved.out_degree(n) == 0)
+    assert added == pytest.approx(dashboard.view['amount'].value)
+
+    # the same values are shown again without a solve
+    assert dashboard.request() is None
+    assert dashboard.model['solves'] == 1
+    assert dashboard.model['hits'] == 1
+
+
+def test_request_is_debounced(dashboard: Dashboard):
+    futures = []
+    for amount in [100.0, 200.0, 300.0]:
+        dashboard.view['amount'].value = amount
+        futures.append(dashboard.request())
+    results = [f.result() for f in futures]
+    assert results[:2] == [None, None]
+    assert dashboard.model['solves'] == 1
+    assert dashboard.parameters in dashboard.model['cache']
+
+
+def test_request_burst_waits_one_debounce(dashboard: Dashboard):
+    dashboard.solve(dashboard.parameters)
+    start = time.monotonic()
+    dashboard.solve((1.0, ()))
+    solve_time = time.monotonic() - start
+
+    futures = []
+    for amount in range(20):
+        dashboard.view['amount'].value = 100.0 + amount
+        futures.append(dashboard.request())
+    start = time.monotonic()
+    assert futures[-1].result() is not None
+    # the stale requests give up at once, instead of each waiting out the debounce in turn
+    assert time.monotonic() - start < 5 * dashboard.debounce + 2 * solve_time
+    assert all(f.result() is None for f in futures[:-1])
+
+
+def test_ratio_edits(dashboard: Dashboard):
+    dashboard.connect()
+    dashboard.model['executor'].submit(lambda: None).result()
+    node = dashboard.view['node'].options[0]
+    dashboard.view['node'].value = node
+    dashboard.view['ratio'].value = 1.0
+    assert dashboard.parameters[1] == ((node, 1.0),)
+    solved = dashboard.solve(dashboard.parameters)
+    assert solved.nodes[node][node_attrs.optimal_ratio.column] > 0
+
+    # selecting a node is not an edit
+    dashboard.view['node'].value = dashboard.view['node'].options[1]
+    assert dashboard.parameters[1] == ((node, 1.0),)
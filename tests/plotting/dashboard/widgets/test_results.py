@@ -0,0 +1,81 @@
+"""
+Unit tests for module.
+"""
+import unittest.mock
+import threading
+import time
+
+import allocate.batch
+
+from allocate.plotting.dashboard.widgets.results import ResultsMonitor
+from allocate.plotting.dashboard.dashboard import Dashboard
+
+
+def test_update_and_select(tmp_path):
+    monitor = ResultsMonitor(directory=str(tmp_path))
+    assert monitor.layout is not None
+    assert monitor.update() == 0
+
+    with allocate.batch.ResultsWriter(str(tmp_path)) as writer:
+        writer.write('a', deltas=dict(X=10.0, Y=5.0))
+        writer.write('b', error='invalid network')
+    assert monitor.update() == 2
+    assert 'errors: 1' in monitor.view['counters'].object
+    assert list(monitor.view['errors'].object['account']) == ['b']
+    assert len(monitor.view['totals'].object.data) == 2
+
+    monitor.view['account'].value = 'a'
+    assert monitor.view['record'].object == {}
+    monitor.connect()
+    monitor.view['account'].value = 'b'
+    assert monitor.view['record'].object['error'] == 'invalid network'
+    monitor.close()
+    assert monitor.model['thread'] is None
+
+
+def test_update_from_the_document_thread(tmp_path):
+    monitor = ResultsMonitor(directory=str(tmp_path))
+    doc = unittest.mock.Mock()
+    monitor.model['doc'] = doc
+    with allocate.batch.ResultsWriter(str(tmp_path)) as writer:
+        writer.write('b', error='invalid network')
+
+    # the view is only changed by the callback on the next tick of the document
+    assert monitor.update() == 1
+    assert monitor.view['counters'].object == ''
+    callback, = doc.add_next_tick_callback.call_args.args
+    callback()
+    assert 'errors: 1' in monitor.view['counters'].object
+    assert list(monitor.view['errors'].object['account']) == ['b']
+
+
+def test_poll_errors_are_logged(tmp_path, caplog):
+    monitor = ResultsMonitor(directory=str(tmp_path), period=0.01)
+    polled = threading.Event()
+    poll = monitor.model['tailer'].poll
+
+    def flaky_poll():
+        if not polled.is_set():
+            polled.set()
+            raise OSError('truncated file')
+        return poll()
+
+    monitor.model['tailer'].poll = flaky_poll
+    monitor.start()
+    # the thread keeps polling after the error
+    with allocate.batch.ResultsWriter(str(tmp_path)) as writer:
+        writer.write('a', deltas=dict(X=10.0))
+    for _ in range(500):
+        if monitor.model['tailer'].total:
+            break
+        time.sleep(0.01)
+    monitor.close()
+    assert monitor.model['tailer'].total == 1
+    assert 'can not poll results' in caplog.text
+
+
+def test_dashboard_with_results(tmp_path):
+    dashboard = Dashboard(results=str(tmp_path))
+    assert dashboard.layout is dashboard.model['monitor'].layout
+    dashboard.connect()
+    dashboard.close()
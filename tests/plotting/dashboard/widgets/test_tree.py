@@ -0,0 +1,82 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pytest
+
+from allocate.plotting.dashboard.widgets.tree import LabelIndex, TreeView, Row
+from allocate.network.attributes import node_attrs
+
+
+@pytest.fixture()
+def graph() -> nx.DiGraph:
+    # a root with 10 branches of 1000 leaves each
+    graph = nx.DiGraph()
+    graph.add_node('root', optimal_ratio=1.0, results_ratio=1.0, amount_to_add=100.0)
+    for i in range(10):
+        graph.add_edge('root', f'B{i}')
+        graph.nodes[f'B{i}'].update(optimal_ratio=0.1, results_ratio=0.1, amount_to_add=10.0)
+        graph.add_edges_from((f'B{i}', f'L{i}-{j:04d}') for j in range(1000))
+    return graph
+
+
+def test_label_index():
+    index = LabelIndex(['beta', 'Alpha', 'alphabet', 'gamma'])
+    assert len(index) == 4
+    assert index.search('al') == ['Alpha', 'alphabet']
+    assert index.search('ALPHAB') == ['alphabet']
+    assert index.search('a', limit=1) == ['Alpha']
+    assert index.search('z') == []
+
+
+def test_expand_in_chunks(graph: nx.DiGraph):
+    tree = TreeView(graph=graph, page_size=5, chunk=3)
+    assert tree.rows() == [Row('root', 0), Row('B0', 1), Row('B1', 1), Row('B2', 1), Row('root', 1, hidden=7)]
+
+    tree.toggle('B1')
+    assert tree.rows(2, 7) == [
+        Row('B1', 1), Row('L1-0000', 2), Row('L1-0001', 2), Row('L1-0002', 2), Row('B1', 2, hidden=997)]
+    tree.more('B1')
+    assert tree.rows(8, 10) == [Row('L1-0005', 2), Row('B1', 2, hidden=994)]
+    tree.toggle('B1')
+    assert len(tree.rows()) == 5
+
+    assert len(tree.view['table'].value) == 5
+    assert 'amount_to_add' in tree.view['table'].value['node'][0]
+    assert '7 more' in tree.view['table'].value['node'][4]
+
+
+def test_reveal(graph: nx.DiGraph):
+    tree = TreeView(graph=graph, page_size=5, chunk=3)
+    assert tree.search('l9-05') == [f'L9-05{j:02d}' for j in range(20)]
+    assert tree.reveal('L9-0500') == 8
+    assert tree.model['offset'] == 5
+    assert Row('L9-0500', 2) in tree.model['page']
+    assert tree.rows(3, 11) == [
+        Row('B2', 1), Row('B9', 1), Row('L9-0000', 2), Row('L9-0001', 2), Row('L9-0002', 2), Row('L9-0500', 2),
+        Row('B9', 2, hidden=996), Row('root', 1, hidden=6)]
+    assert tree.reveal('missing') is None
+
+
+def test_update_and_scroll(graph: nx.DiGraph):
+    tree = TreeView(graph=graph, page_size=5, chunk=3)
+    tree.connect()
+    tree.expand('B0')
+    tree.scroll(5)
+    assert tree.model['page'][0] == Row('B0', 2, hidden=997)
+    # scrolling past the last row shows the last page
+    tree.scroll(100)
+    assert tree.model['offset'] == 5
+    tree.scroll(-1000)
+    assert tree.model['offset'] == 0
+
+    solved = graph.copy()
+    solved.nodes['root'][node_attrs.amount_to_add.column] = 0.0
+    tree.update(solved)
+    assert '0.00' in tree.view['table'].value['node'][0]
+
+
+def test_empty_tree():
+    tree = TreeView()
+    assert tree.rows() == []
+    assert tree.layout is not None
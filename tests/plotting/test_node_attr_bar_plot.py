@@ -7,9 +7,13 @@ import logging
 import pytest
 
 import allocate.plotting.node_attr_bar_plot
+import allocate.plotting.node_attr_table
+import allocate.solvers.graphsolver
 import allocate.network.algorithms
 import tests.utilities
 
+from allocate.solvers.unconstrained import BucketSolverSimple
+
 
 @pytest.fixture()
 def graph() -> nx.DiGraph:
@@ -36,3 +40,90 @@ def test_get_plot_object_leaves_only(graph: nx.DiGraph, show: bool = False):
     hv_obj = allocate.plotting.node_attr_bar_plot.get_plot_object(
         graph, graph, graph, should_extract=allocate.network.algorithms.is_leaf_node)
     tests.utilities.show_plot(hv_obj, show)
+
+
+def test_get_plot_object_aggregated(graph: nx.DiGraph, show: bool = False):
+    hv_obj = allocate.plotting.node_attr_bar_plot.get_plot_object(graph, graph, level=1, top_k=2)
+    assert len(hv_obj.data) == 6
+    assert set(hv_obj.data['node']) == {'2', '3', 'other'}
+    tests.utilities.show_plot(hv_obj, show)
+
+
+def test_get_plot_object_rolls_up_leaves(graph: nx.DiGraph):
+    solved = allocate.solvers.graphsolver.solve(graph, solver=BucketSolverSimple)
+    cache = allocate.plotting.node_attr_table.TableCache()
+    for _ in range(2):
+        hv_obj = allocate.plotting.node_attr_bar_plot.get_plot_object(
+            solved, level=1, vdims=['amount_to_add', 'current_value'], cache=cache)
+    # the internal node 4 has no amount to add of its own, its bar is the sum over its leaves 5 and 6
+    data = hv_obj.data.set_index('node')
+    assert data.loc['4', 'amount_to_add'] == pytest.approx(
+        solved.nodes['5']['amount_to_add'] + solved.nodes['6']['amount_to_add'])
+    assert data.loc['4', 'amount_to_add'] != 0.0
+    assert data['current_value'].tolist() == [2500.0, 5000.0, 500.0]
+    # the mask and the columns are the same for the same level, so the second plot is read from the cache
+    assert cache.hits == 1
+
+
+@pytest.mark.parametrize('level,expected', [
+    (0, ['1']), (1, ['2', '3', '4']), (2, ['2', '3', '5', '6']),
+])
+def test_level_mask(graph: nx.DiGraph, level: int, expected: list):
+    mask = allocate.plotting.node_attr_bar_plot.level_mask(level)
+    assert allocate.plotting.node_attr_bar_plot.level_mask(level) is mask
+    assert [n for n, k in zip(graph, mask(graph, list(graph))) if k] == expected
+
+
+def test_aggregate():
+    data = pd.DataFrame(dict(
+        g_id=pd.Categorical([0, 0, 0, 1, 1, 1]),
+        node=['A', 'B', 'C', 'A', 'B', 'C'],
+        value=[10.0, 1.0, 5.0, 10.0, 9.0, 4.0],
+    ))
+    observed = allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], top_k=1)
+    assert list(observed['node']) == ['A', 'A', 'other', 'other']
+    assert list(observed['value']) == [10.0, 10.0, 6.0, 13.0]
+    assert isinstance(observed['g_id'].dtype, pd.CategoricalDtype)
+
+    observed = allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], top_k=1, rank_by='deviation')
+    assert list(observed['node']) == ['B', 'B', 'other', 'other']
+    assert list(observed['value']) == [1.0, 9.0, 15.0, 14.0]
+
+    # two bars per graph fit in the budget, one for the top node and one for the other node
+    observed = allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], max_bars=4)
+    assert list(observed['node']) == ['A', 'A', 'other', 'other']
+
+    pd.testing.assert_frame_equal(allocate.plotting.node_attr_bar_plot.aggregate(data, ['value']), data)
+    with pytest.raises(ValueError):
+        allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], rank_by='other')
+
+
+@pytest.mark.parametrize('max_bars,expected', [
+    (4, ['other', 'other', 'other']),
+    (2, ['other', 'other']),
+])
+def test_aggregate_with_fewer_bars_than_graphs(max_bars: int, expected: list):
+    data = pd.DataFrame(dict(
+        g_id=pd.Categorical([0, 0, 1, 1, 2, 2]),
+        node=['A', 'B', 'A', 'B', 'A', 'B'],
+        value=[1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    ))
+    observed = allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], max_bars=max_bars)
+    assert list(observed['node']) == expected
+    assert list(observed['value']) == [3.0, 7.0, 11.0][:len(expected)]
+
+
+def test_aggregate_with_empty_graph():
+    # the graph with g_id 1 has no rows
+    data = pd.DataFrame(dict(
+        g_id=pd.Categorical([0, 0, 0, 0, 2, 2, 2, 2], categories=[0, 1, 2]),
+        node=['A', 'B', 'C', 'D', 'A', 'B', 'C', 'D'],
+        value=[1.0, 5.0, 3.0, 2.0, 9.0, 5.0, 3.0, 2.0],
+    ))
+    observed = allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], top_k=1, rank_by='deviation')
+    assert list(observed['node']) == ['A', 'A', 'other', 'other']
+    assert list(observed['g_id']) == [0, 2, 0, 2]
+
+    # the budget is split over the two graphs with rows
+    observed = allocate.plotting.node_attr_bar_plot.aggregate(data, ['value'], max_bars=6, rank_by='deviation')
+    assert list(observed['node']) == ['A', 'B', 'A', 'B', 'other', 'other']
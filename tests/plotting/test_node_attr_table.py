@@ -7,6 +7,7 @@ import logging
 import pytest
 
 import allocate.plotting.node_attr_table
+import allocate.network.algorithms
 import tests.utilities
 import pandas.testing
 
@@ -63,6 +64,7 @@ def test_create(vdims: list, starting_graph: nx.DiGraph, expected_frame: pd.Data
         starting_graph, vdims=vdims, add_properties=add_properties)
 
     logging.debug('observed_frame\n%s', observed_frame)
+    expected_frame['g_id'] = expected_frame['g_id'].astype('category')
     pandas.testing.assert_frame_equal(expected_frame, observed_frame)
 
 
@@ -85,4 +87,39 @@ def test_create_multiple(unstack: bool, starting_graph: nx.DiGraph, expected_fra
         starting_graph, starting_graph, starting_graph, add_properties=add_properties)
 
     logging.debug('observed_frame\n%s', observed_frame)
+    expected_frame['g_id'] = expected_frame['g_id'].astype('category')
     pandas.testing.assert_frame_equal(expected_frame, observed_frame)
+
+
+def test_create_columnar(starting_graph: nx.DiGraph, expected_frame: pd.DataFrame):
+    levels = nx.shortest_path_length(starting_graph, 'A')
+    observed_frame: pd.DataFrame = allocate.plotting.node_attr_table.create(
+        starting_graph, starting_graph, vdims=['a', 'c'], mask=allocate.network.algorithms.leaf_mask,
+        columns=dict(level=lambda g, nodes: [levels[n] for n in nodes]))
+
+    expected_frame = expected_frame[expected_frame['node'].isin(['B', 'E', 'F'])][['g_id', 'node', 'a', 'c', 'level']]
+    expected_frame = pd.concat([expected_frame, expected_frame.assign(g_id=1)], ignore_index=True)
+    expected_frame['g_id'] = expected_frame['g_id'].astype('category')
+    pandas.testing.assert_frame_equal(expected_frame, observed_frame)
+
+    # the vectorized and the per node filters agree
+    pandas.testing.assert_frame_equal(observed_frame, allocate.plotting.node_attr_table.create(
+        starting_graph, starting_graph, vdims=['a', 'c'], should_extract=allocate.network.algorithms.is_leaf_node,
+        add_properties=dict(level=lambda g, n: levels[n])))
+
+
+def test_create_cache(starting_graph: nx.DiGraph):
+    cache = allocate.plotting.node_attr_table.TableCache(maxsize=2)
+    first = allocate.plotting.node_attr_table.create(starting_graph, starting_graph, vdims='a', cache=cache)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+    # changes are not seen until the graph is touched
+    starting_graph.nodes['A']['a'] = 10
+    assert allocate.plotting.node_attr_table.create(starting_graph, vdims='a', cache=cache)['a'][0] == 1
+    allocate.plotting.node_attr_table.touch(starting_graph)
+    assert allocate.plotting.node_attr_table.create(starting_graph, vdims='a', cache=cache)['a'][0] == 10
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 2)
+
+    allocate.plotting.node_attr_table.create(starting_graph, vdims='b', cache=cache)
+    assert len(cache) == 2
+    assert list(first['a']) == [1, 2, 3, 4, 5, 6] * 2
@@ -0,0 +1,81 @@
+"""
+Unit tests for module.
+"""
+import pandas as pd
+import numpy as np
+import logging
+import pytest
+
+import allocate.solvers.bucketdata
+import allocate.solvers.constrained
+import allocate.solvers.bounded
+
+from pandas.testing import assert_series_equal
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_simple():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[0, 0], optimal_ratios=[0.5, 0.5])
+    logging.debug('\n%s', system)
+
+    solver = allocate.solvers.bounded.BucketSolverBounded.solve(system)
+    logging.debug('\n%s', solver)
+
+    totals = pd.Series(solver.result_total.values)
+    assert_series_equal(totals, pd.Series([5.0, 5.0]))
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_matches_constrained_without_bounds():
+    rng = np.random.default_rng(0)
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=1000, current_values=rng.random(20) * 100, optimal_ratios=rng.random(20))
+
+    bounded = allocate.solvers.bounded.BucketSolverBounded.solve(system)
+    constrained = allocate.solvers.constrained.BucketSolverConstrained.solve(system)
+
+    assert np.allclose(bounded.result_delta.values, constrained.result_delta.values, atol=1e-2)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_max_value():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=100, current_values=[0, 0, 0], optimal_ratios=[0.5, 0.25, 0.25],
+        max_values=[5.0, np.inf, np.inf])
+
+    solver = allocate.solvers.bounded.BucketSolverBounded.solve(system)
+    logging.debug('\n%s', solver)
+
+    np.testing.assert_allclose(solver.result_total.values, [5.0, 47.5, 47.5])
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_min_value():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=100, current_values=[0, 0, 0], optimal_ratios=[0.5, 0.5, 0.0],
+        min_values=[0.0, 0.0, 20.0])
+
+    solver = allocate.solvers.bounded.BucketSolverBounded.solve(system)
+    logging.debug('\n%s', solver)
+
+    np.testing.assert_allclose(solver.result_total.values, [40.0, 40.0, 20.0])
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_never_removes_above_max_value():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[50, 0], optimal_ratios=[0.5, 0.5],
+        max_values=[20.0, np.inf])
+
+    solver = allocate.solvers.bounded.BucketSolverBounded.solve(system)
+
+    np.testing.assert_allclose(solver.result_delta.values, [0.0, 10.0])
+
+
+def test_solver_solve_raises_on_infeasible_bounds():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[0, 0], optimal_ratios=[0.5, 0.5], max_values=[1.0, 1.0])
+
+    with pytest.raises(ValueError, match='outside of the bounds'):
+        allocate.solvers.bounded.BucketSolverBounded.solve(system)
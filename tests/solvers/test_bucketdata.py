@@ -1,6 +1,7 @@
 """
 Unit tests for module.
 """
+import numpy as np
 import logging
 import pytest
 
@@ -58,3 +59,46 @@ def test_create_bucket_system_raises_on_wrong_size():
 def test_create_bucket_system_raises_on_negative_amount():
     with pytest.raises(ValueError, match='amount to add is negative'):
         allocate.solvers.bucketdata.BucketSystem.create(-1, [0], [1])
+
+
+def test_create_bucket_system_with_bounds():
+    system = allocate.solvers.bucketdata.BucketSystem.create(1, [0, 0], [0.5, 0.5], min_values=[0, 1])
+    assert system.min_values.tolist() == [0.0, 1.0]
+    assert system.max_values is None
+
+
+def test_create_bucket_system_raises_on_wrong_bounds_size():
+    with pytest.raises(ValueError, match='length mismatch between values and bounds'):
+        allocate.solvers.bucketdata.BucketSystem.create(1, [0, 0], [1, 1], max_values=[1])
+
+
+def test_create_bucket_system_with_withdrawal():
+    system = allocate.solvers.bucketdata.BucketSystem.create(-1, [1, 1], [0.5, 0.5], allow_withdrawal=True)
+    assert system.optimal.amount == 1.0
+
+
+def test_create_bucket_system_raises_on_large_withdrawal():
+    with pytest.raises(ValueError, match='amount to withdraw is more than the current amount'):
+        allocate.solvers.bucketdata.BucketSystem.create(-3, [1, 1], [0.5, 0.5], allow_withdrawal=True)
+
+
+def test_bucket_data_is_lazy_and_does_not_copy():
+    values = np.array([1.0, 3.0])
+    data = allocate.solvers.bucketdata.BucketData.from_values(values=values)
+    assert data.values is values
+    assert data._ratios is None and data._labels is None and data._amount is None
+    assert data.amount == 4.0
+    assert data.ratios.tolist() == [0.25, 0.75]
+    assert data.ratios is data.ratios
+    assert data.labels == [0, 1]
+    assert not hasattr(data, '__dict__')
+    with pytest.raises(AttributeError):
+        data.values = values
+
+
+def test_bucket_data_from_zero_values_and_ratios():
+    data = allocate.solvers.bucketdata.BucketData.from_values(values=[0, 0])
+    assert data.ratios.tolist() == [0.0, 0.0]
+    data = allocate.solvers.bucketdata.BucketData.from_ratios(ratios=[0, 0], amount=0)
+    assert data.ratios.tolist() == [0.0, 0.0]
+    assert data.values.tolist() == [0.0, 0.0]
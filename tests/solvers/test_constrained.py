@@ -4,9 +4,13 @@ Unit tests for module.
 import pandas as pd
 import numpy as np
 import logging
+import pytest
+import time
 
+import allocate.instrument
 import allocate.solvers.bucketdata
 import allocate.solvers.constrained
+import allocate.solvers.projection
 
 from pandas.testing import assert_series_equal
 
@@ -34,3 +38,63 @@ def test_solver_solve_all_positive():
     logging.debug('\n%s', solver)
 
     assert np.all(solver.result_delta.values >= 0)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_expired_deadline():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 90], optimal_ratios=[0.5, 0.5])
+
+    solver = allocate.solvers.constrained.BucketSolverConstrained.solve(system, deadline=time.monotonic() - 1)
+    logging.debug('\n%s', solver)
+
+    assert solver.truncated
+    assert solver.result_delta.values[0] == pytest.approx(10)
+    assert solver.result_delta.values[1] == pytest.approx(0)
+    assert solver.residual == pytest.approx(np.linalg.norm([20 / 110 - 0.5, 90 / 110 - 0.5]))
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_future_deadline():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 90], optimal_ratios=[0.5, 0.5])
+
+    solver = allocate.solvers.constrained.BucketSolverConstrained.solve(system, deadline=time.monotonic() + 60)
+
+    assert not solver.truncated
+    assert np.all(solver.result_delta.values >= 0)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_analytic_matches_finite_difference():
+    rng = np.random.default_rng(0)
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=1000, current_values=rng.random(20) * 100, optimal_ratios=rng.random(20))
+
+    allocate.instrument.metrics.reset()
+    numeric = allocate.solvers.constrained.BucketSolverConstrained.solve(system, analytic=False, warm_start=False)
+    numeric_nfev = allocate.instrument.metrics.counters['slsqp.nfev']
+
+    allocate.instrument.metrics.reset()
+    analytic = allocate.solvers.constrained.BucketSolverConstrained.solve(system, analytic=True, warm_start=True)
+    analytic_nfev = allocate.instrument.metrics.counters['slsqp.nfev']
+
+    assert analytic_nfev < numeric_nfev
+    assert np.sum(analytic.result_delta.values) == pytest.approx(1000)
+    assert np.all(analytic.result_delta.values >= -1.0e-6)
+    b_vector = allocate.solvers.constrained.BucketSolverConstrained._make_b_vector(system)
+    exact = allocate.solvers.projection.simplex(b_vector, 1000)
+    assert np.allclose(analytic.result_delta.values, exact, atol=1.0e-2)
+    assert np.allclose(numeric.result_delta.values, exact, atol=1.0e-2)
+
+
+def test_make_w_vector():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 90], optimal_ratios=[0.5, 0.5])
+    a_matrix = allocate.solvers.constrained.BucketSolverConstrained._make_a_matrix(system)
+    b_vector = allocate.solvers.constrained.BucketSolverConstrained._make_b_vector(system)
+
+    w_vector = allocate.solvers.constrained.BucketSolverConstrained._make_w_vector(system, a_matrix, b_vector)
+
+    assert np.all(w_vector >= 0)
+    assert np.sum(w_vector) == pytest.approx(10)
@@ -0,0 +1,95 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pandas as pd
+import numpy as np
+import pytest
+
+import allocate.solvers.graphsolver
+import allocate.network.algorithms
+import allocate.network.template
+import allocate.solvers.fleet
+
+from allocate.solvers.unconstrained import BucketSolverSimple
+from allocate.solvers.bounded import BucketSolverBounded
+
+
+@pytest.fixture()
+def frame() -> pd.DataFrame:
+    yield pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=0.0, children=('3', '4', '5')),
+        dict(label='3', current_value=5000.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='4', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0, children=()),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0, children=('C', 'D', 'E')),
+        dict(label='C', current_value=1500.0, optimal_ratio=0.20, amount_to_add=0.0, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.30, amount_to_add=0.0, children=()),
+        dict(label='E', current_value=0000.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+    ])
+
+
+def _account_graph(frame: pd.DataFrame, template, values: np.array, amount: float) -> nx.DiGraph:
+    """Make the graph of a single account with the given leaf values."""
+    frame = frame.set_index('label')
+    node_values = template.node_values(values)[0]
+    for label, value in zip(template.labels, node_values):
+        frame.loc[label, 'current_value'] = value
+    frame.loc[template.labels[template.root], 'amount_to_add'] = amount
+    return allocate.network.algorithms.create(frame.reset_index())
+
+
+def test_solve_matches_graph_solver(frame: pd.DataFrame):
+    template = allocate.network.template.Template.compile(allocate.network.algorithms.create(frame))
+    rng = np.random.default_rng(0)
+    current_values = rng.uniform(0.0, 1000.0, (8, len(template.leaves)))
+    amounts = rng.uniform(0.0, 2000.0, 8)
+
+    result = allocate.solvers.fleet.solve(template, current_values, amounts)
+
+    for values, amount, deltas in zip(current_values, amounts, result.deltas):
+        graph = _account_graph(frame, template, values[np.newaxis], amount)
+        solved = allocate.solvers.graphsolver.solve(graph, solver=BucketSolverBounded)
+        expected = [solved.nodes[n]['amount_to_add'] for n in template.leaf_labels]
+        np.testing.assert_allclose(deltas, expected, atol=1e-6)
+
+    np.testing.assert_allclose(np.sum(result.deltas, axis=1), amounts)
+    np.testing.assert_allclose(result.totals, np.sum(result.deltas, axis=0))
+    assert np.all(result.deltas >= -1e-9)
+
+
+def test_solve_unconstrained_reaches_product_ratios(frame: pd.DataFrame):
+    template = allocate.network.template.Template.compile(allocate.network.algorithms.create(frame))
+    current_values = np.random.default_rng(0).uniform(0.0, 1000.0, (4, len(template.leaves)))
+
+    result = allocate.solvers.fleet.solve(template, current_values, np.full(4, 100.0), constrained=False)
+
+    np.testing.assert_allclose(result.residuals, 0.0, atol=1e-12)
+
+
+def test_solve_unconstrained_passes_down_negative_amounts(frame: pd.DataFrame):
+    template = allocate.network.template.Template.compile(allocate.network.algorithms.create(frame))
+    # the parent 5 of C, D and E is overweight, so it is given a negative amount
+    current_values = np.array([[1000.0, 1000.0, 3000.0, 2000.0, 1000.0]])
+
+    result = allocate.solvers.fleet.solve(template, current_values, np.array([1000.0]), constrained=False)
+    np.testing.assert_allclose(np.sum(result.deltas), 1000.0)
+    np.testing.assert_allclose(result.residuals, 0.0, atol=1e-12)
+
+    # the graph solver drops the negative amount, and adds more than the amount to the account
+    graph = _account_graph(frame, template, current_values, 1000.0)
+    solved = allocate.solvers.graphsolver.solve(graph, solver=BucketSolverSimple)
+    expected = np.array([solved.nodes[n]['amount_to_add'] for n in template.leaf_labels])
+    assert np.sum(expected) > 1000.0
+    np.testing.assert_allclose(result.deltas[0, :2], expected[:2])
+    assert np.sum(result.deltas[0, 2:]) < 0
+
+
+@pytest.mark.parametrize('current_values,amounts,match', [
+    (np.zeros((2, 5)), np.zeros(3), 'shape mismatch'),
+    (np.zeros((2, 5)), -np.ones(2), 'negative amounts'),
+    (-np.ones((2, 5)), np.zeros(2), 'negative values'),
+])
+def test_solve_raises(frame: pd.DataFrame, current_values: np.array, amounts: np.array, match: str):
+    template = allocate.network.template.Template.compile(allocate.network.algorithms.create(frame))
+    with pytest.raises(ValueError, match=match):
+        allocate.solvers.fleet.solve(template, current_values, amounts)
@@ -3,6 +3,7 @@ Unit tests for module.
 """
 import networkx as nx
 import pandas as pd
+import numpy as np
 import logging
 import pytest
 
@@ -13,6 +14,8 @@ import tests.utilities
 
 from allocate.solvers.constrained import BucketSolverConstrained
 from allocate.solvers.constrained import BucketSolverSimple
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers.withdrawal import BucketSolverWithdrawal
 from allocate.solvers import BucketSolver
 
 
@@ -114,3 +117,100 @@ def test_solve(starting_frame: pd.DataFrame, expected_graph: nx.DiGraph, solver:
     node_match = nx.algorithms.isomorphism.numerical_node_match(
         ['results_value', 'amount_to_add'], [-1000, -1000])
     assert nx.is_isomorphic(observed_graph, expected_graph, node_match=node_match)
+
+
+@pytest.mark.parametrize('time_budget,expected_truncated', [
+    (0.0, True),
+    (60.0, False),
+])
+def test_solve_time_budget(time_budget: float, expected_truncated: bool):
+    starting_frame = pd.DataFrame([
+        dict(label='A', current_value=4000.0, optimal_ratio=1.00, amount_to_add=1000.0, children=('0', '1', '2')),
+        dict(label='0', current_value=2000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='1', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+        dict(label='2', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    observed_graph: nx.DiGraph = allocate.solvers.graphsolver.solve(
+        starting_graph, solver=BucketSolverConstrained, time_budget=time_budget)
+    assert observed_graph.graph[allocate.solvers.graphsolver.TRUNCATED] == expected_truncated
+    assert observed_graph.graph[allocate.solvers.graphsolver.RESIDUAL] == pytest.approx(0.0, abs=1e-3)
+    assert observed_graph.nodes['0']['results_value'] == pytest.approx(2500.0, rel=1e-3)
+
+
+def test_solve_bounded():
+    starting_frame = pd.DataFrame([
+        dict(label='A', current_value=4000.0, optimal_ratio=1.00, amount_to_add=1000.0, children=('0', '1', '2'),
+             max_value=np.inf),
+        dict(label='0', current_value=2000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=(),
+             max_value=2100.0),
+        dict(label='1', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=(),
+             max_value=np.inf),
+        dict(label='2', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=(),
+             max_value=np.inf),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    observed_graph: nx.DiGraph = allocate.solvers.graphsolver.solve(starting_graph, solver=BucketSolverBounded)
+    assert observed_graph.nodes['0']['results_value'] == pytest.approx(2100.0)
+    assert observed_graph.nodes['1']['results_value'] == pytest.approx(1450.0)
+    assert observed_graph.nodes['2']['results_value'] == pytest.approx(1450.0)
+
+
+def test_solve_withdrawal():
+    starting_frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=-2000.0, children=('3', '4', '5')),
+        dict(label='3', current_value=4000.0, optimal_ratio=0.50, amount_to_add=0.00000, children=()),
+        dict(label='4', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.00000, children=()),
+        dict(label='5', current_value=3000.0, optimal_ratio=0.25, amount_to_add=0.00000, children=('C', 'D')),
+        dict(label='C', current_value=2500.0, optimal_ratio=0.50, amount_to_add=0.00000, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.00000, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    observed_graph: nx.DiGraph = allocate.solvers.graphsolver.solve(starting_graph, solver=BucketSolverWithdrawal)
+    tests.utilities.show_graph('observed_graph', observed_graph, **allocate.network.visualize.formats_out)
+    assert observed_graph.nodes['B']['results_value'] == pytest.approx(6000.0)
+    assert observed_graph.nodes['3']['results_value'] == pytest.approx(3250.0)
+    assert observed_graph.nodes['4']['results_value'] == pytest.approx(1000.0)
+    assert observed_graph.nodes['5']['results_value'] == pytest.approx(1750.0)
+    assert observed_graph.nodes['C']['results_value'] == pytest.approx(1250.0)
+    assert observed_graph.nodes['D']['results_value'] == pytest.approx(500.0)
+
+
+@pytest.mark.parametrize('solver,amount_to_add', [
+    (BucketSolverWithdrawal, 2000.0),
+    (BucketSolverSimple, -2000.0),
+])
+def test_solve_raises_on_wrong_sign(solver: BucketSolver, amount_to_add: float):
+    starting_frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=amount_to_add, children=('3', '4')),
+        dict(label='3', current_value=4000.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+        dict(label='4', current_value=4000.0, optimal_ratio=0.50, amount_to_add=0.0, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    with pytest.raises(ValueError, match='amount to add must be'):
+        allocate.solvers.graphsolver.solve(starting_graph, solver=solver)
+
+
+@pytest.mark.parametrize('solver,amount_to_add', [
+    (BucketSolverSimple, 100.0),
+    (BucketSolverBounded, 100.0),
+    (BucketSolverConstrained, 1000.01),
+    (BucketSolverWithdrawal, -100.0),
+])
+def test_solve_in_cents(solver: BucketSolver, amount_to_add: float):
+    starting_frame = pd.DataFrame([
+        dict(label='R', current_value=300.0, optimal_ratio=1.0, amount_to_add=amount_to_add, children=('A', 'B', 'C')),
+        dict(label='A', current_value=100.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+        dict(label='B', current_value=100.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+        dict(label='C', current_value=100.0, optimal_ratio=1.0, amount_to_add=0.0, children=('D', 'E', 'F')),
+        dict(label='D', current_value=50.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+        dict(label='E', current_value=30.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+        dict(label='F', current_value=20.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    observed_graph = allocate.solvers.graphsolver.solve(starting_graph, solver=solver, decimals=2)
+    leaves = ['A', 'B', 'D', 'E', 'F']
+    cents = [observed_graph.nodes[n]['amount_to_add'] * 100 for n in leaves]
+    # every leaf gets whole cents, and the cents add up exactly to the amount to add
+    assert cents == pytest.approx(np.round(cents), abs=1e-6)
+    assert int(np.sum(np.round(cents))) == round(amount_to_add * 100)
@@ -0,0 +1,130 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pandas as pd
+import pytest
+
+import allocate.solvers.graphsolver
+import allocate.solvers.incremental
+import allocate.network.algorithms
+
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers.constrained import BucketSolverSimple
+
+
+@pytest.fixture()
+def frame() -> pd.DataFrame:
+    yield pd.DataFrame([
+        dict(label='B', current_value=9000.0, optimal_ratio=1.00, amount_to_add=2000.0, children=('3', '4', '5')),
+        dict(label='3', current_value=5000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='4', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=('A', 'Z')),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=('C', 'D', 'E')),
+        dict(label='A', current_value=1500.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='Z', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='C', current_value=1500.0, optimal_ratio=0.20, amount_to_add=0.0000, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.30, amount_to_add=0.0000, children=()),
+        dict(label='E', current_value=0000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+    ])
+
+
+def _assert_matches_graph_solver(engine: allocate.solvers.incremental.IncrementalSolver, frame: pd.DataFrame,
+                                 solver=BucketSolverBounded):
+    expected = allocate.solvers.graphsolver.solve(allocate.network.algorithms.create(frame), solver=solver)
+    observed = engine.to_graph()
+    assert observed.graph[allocate.solvers.graphsolver.RESIDUAL] == \
+        pytest.approx(expected.graph[allocate.solvers.graphsolver.RESIDUAL])
+    for node in expected:
+        for key in ['product_ratio', 'optimal_value', 'current_ratio']:
+            assert observed.nodes[node][key] == pytest.approx(expected.nodes[node][key])
+        assert engine.results_value(node) == pytest.approx(expected.nodes[node]['results_value'])
+        assert engine.results_ratio(node) == pytest.approx(expected.nodes[node]['results_ratio'])
+        assert engine.amount_to_add(node) == pytest.approx(expected.nodes[node]['amount_to_add'], abs=1e-6)
+        assert observed.nodes[node]['results_value'] == pytest.approx(expected.nodes[node]['results_value'])
+
+
+def _set(frame: pd.DataFrame, label: str, column: str, value: float):
+    frame.loc[frame['label'] == label, column] = value
+
+
+def _set_current_value(frame: pd.DataFrame, graph: nx.DiGraph, label: str, value: float):
+    diff = value - frame.loc[frame['label'] == label, 'current_value'].iloc[0]
+    for node in [label] + list(nx.ancestors(graph, label)):
+        frame.loc[frame['label'] == node, 'current_value'] += diff
+
+
+@pytest.mark.parametrize('solver', [BucketSolverBounded, BucketSolverSimple])
+def test_create(frame: pd.DataFrame, solver):
+    engine = allocate.solvers.incremental.IncrementalSolver(allocate.network.algorithms.create(frame), solver=solver)
+    if solver is BucketSolverBounded:
+        _assert_matches_graph_solver(engine, frame, solver=solver)
+    assert engine.results_value('B') == pytest.approx(11000.0)
+
+
+def test_overweight_parent():
+    # B is overweight, and the unconstrained solver gives it a negative amount, which is not passed on
+    frame = pd.DataFrame([
+        dict(label='R', current_value=3000.0, optimal_ratio=1.0, amount_to_add=550.0, children=('A', 'B')),
+        dict(label='A', current_value=1000.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+        dict(label='B', current_value=2000.0, optimal_ratio=0.5, amount_to_add=0.0, children=('C', 'D')),
+        dict(label='C', current_value=1500.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+    ])
+    graph = allocate.network.algorithms.create(frame)
+    engine = allocate.solvers.incremental.IncrementalSolver(graph, solver=BucketSolverSimple)
+    _assert_matches_graph_solver(engine, frame, solver=BucketSolverSimple)
+    assert engine.results_value('B') == pytest.approx(2000.0)
+
+    engine.set_current_value('C', 500.0)
+    _set_current_value(frame, graph, 'C', 500.0)
+    _assert_matches_graph_solver(engine, frame, solver=BucketSolverSimple)
+
+
+def test_edits(frame: pd.DataFrame):
+    graph = allocate.network.algorithms.create(frame)
+    engine = allocate.solvers.incremental.IncrementalSolver(graph)
+
+    engine.set_current_value('D', 1500.0)
+    _set_current_value(frame, graph, 'D', 1500.0)
+    _assert_matches_graph_solver(engine, frame)
+
+    engine.set_optimal_ratio('A', 0.9)
+    _set(frame, 'A', 'optimal_ratio', 0.9)
+    _set(frame, 'Z', 'optimal_ratio', 0.1)
+    _assert_matches_graph_solver(engine, frame)
+
+    engine.set_amount_to_add('B', 500.0)
+    _set(frame, 'B', 'amount_to_add', 500.0)
+    _assert_matches_graph_solver(engine, frame)
+
+
+def test_update_solves_only_affected_parents():
+    # P0 is far below its target and receives the whole amount, the other parents are above theirs
+    rows = [dict(label='R', current_value=100.0 + 1200.0 * 9, optimal_ratio=1.0, amount_to_add=1000.0,
+                 children=tuple(f'P{i}' for i in range(10)))]
+    for i in range(10):
+        value = 10.0 if i == 0 else 120.0
+        rows.append(dict(label=f'P{i}', current_value=value * 10, optimal_ratio=1.0, amount_to_add=0.0,
+                         children=tuple(f'L{i}{j}' for j in range(10))))
+        for j in range(10):
+            rows.append(dict(label=f'L{i}{j}', current_value=value, optimal_ratio=1.0, amount_to_add=0.0,
+                             children=()))
+    engine = allocate.solvers.incremental.IncrementalSolver(allocate.network.algorithms.create(pd.DataFrame(rows)))
+    assert engine.results_value('P0') == pytest.approx(1100.0)
+
+    # the root and P0 are solved again, the amounts received by the other parents do not change
+    engine.set_current_value('L00', 12.0)
+    assert engine.update() == 2
+    assert engine.results_value('P0') == pytest.approx(1102.0)
+
+    # only P5 is solved again, and its amount to add is still zero
+    engine.set_optimal_ratio('L55', 0.5)
+    assert engine.update() == 1
+    assert engine.update() == 0
+    assert engine.results_value('L55') == pytest.approx(120.0)
+
+
+def test_set_current_value_raises_on_parent(frame: pd.DataFrame):
+    engine = allocate.solvers.incremental.IncrementalSolver(allocate.network.algorithms.create(frame))
+    with pytest.raises(ValueError, match='only the current value of a leaf'):
+        engine.set_current_value('4', 1.0)
@@ -0,0 +1,116 @@
+"""
+Unit tests for module.
+"""
+import concurrent.futures
+import networkx as nx
+import pandas as pd
+import numpy as np
+import dataclasses
+import pytest
+
+import allocate.solvers.graphsolver
+import allocate.network.algorithms
+
+from allocate.solvers.unconstrained import BucketSolverSimple
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers.bucketdata import BucketSystem
+from allocate.solvers.memo import SolveCache
+
+
+def make_graph(n_sleeves: int = 3) -> nx.DiGraph:
+    # the same bond sleeve, with the same ratios and holdings, under each parent
+    rows = [dict(label='R', current_value=600.0 * n_sleeves, optimal_ratio=1.0, amount_to_add=300.0 * n_sleeves,
+                 children=tuple(f'P{i}' for i in range(n_sleeves)))]
+    for i in range(n_sleeves):
+        rows.append(dict(label=f'P{i}', current_value=600.0, optimal_ratio=1.0, amount_to_add=0.0,
+                         children=(f'P{i}-A', f'P{i}-B', f'P{i}-C')))
+        rows.append(dict(label=f'P{i}-A', current_value=300.0, optimal_ratio=0.2, amount_to_add=0.0, children=()))
+        rows.append(dict(label=f'P{i}-B', current_value=200.0, optimal_ratio=0.3, amount_to_add=0.0, children=()))
+        rows.append(dict(label=f'P{i}-C', current_value=100.0, optimal_ratio=0.5, amount_to_add=0.0, children=()))
+    return allocate.network.algorithms.create(pd.DataFrame(rows))
+
+
+@pytest.mark.parametrize('solver', [BucketSolverSimple, BucketSolverBounded])
+def test_solve_graph_with_shared_sleeves(solver):
+    graph = make_graph()
+    cache = SolveCache()
+    observed = allocate.solvers.graphsolver.solve(graph, solver=solver, cache=cache)
+    expected = allocate.solvers.graphsolver.solve(graph, solver=solver)
+    for node in graph:
+        assert observed.nodes[node]['results_value'] == pytest.approx(expected.nodes[node]['results_value'])
+    assert cache.hits > 0
+    assert cache.misses < cache.hits + cache.misses
+    assert 0 < cache.hit_rate < 1
+
+    # a second account with the same hierarchy is solved entirely from the cache
+    misses = cache.misses
+    allocate.solvers.graphsolver.solve(graph, solver=solver, cache=cache)
+    assert cache.misses == misses
+
+
+def test_linear_solver_shifts_by_the_amount():
+    cache = SolveCache()
+    for amount in [100.0, 250.0, 100.0]:
+        system = BucketSystem.create(amount, [300.0, 200.0, 100.0], [0.2, 0.3, 0.5])
+        observed = cache.solve(BucketSolverSimple, system)
+        expected = BucketSolverSimple.solve(system)
+        assert observed.result_delta.values == pytest.approx(expected.result_delta.values)
+        assert observed.result_total.values == pytest.approx(expected.result_total.values)
+    assert (cache.misses, cache.hits, cache.shifts) == (1, 2, 1)
+
+    # the amount is part of the key for solvers that are not linear
+    cache.solve(BucketSolverBounded, BucketSystem.create(100.0, [300.0, 200.0, 100.0], [0.2, 0.3, 0.5]))
+    cache.solve(BucketSolverBounded, BucketSystem.create(250.0, [300.0, 200.0, 100.0], [0.2, 0.3, 0.5]))
+    assert cache.misses == 3
+
+
+def test_eviction_by_size():
+    cache = SolveCache(max_bytes=3 * (16 + 16 * 8))
+    for i in range(5):
+        cache.solve(BucketSolverBounded, BucketSystem.create(100.0, np.arange(16.0) + i, np.ones(16)))
+    assert len(cache) == 3
+    assert cache.evictions == 2
+    assert cache.nbytes <= cache.max_bytes
+
+    # the least recently used results were evicted
+    cache.solve(BucketSolverBounded, BucketSystem.create(100.0, np.arange(16.0) + 4, np.ones(16)))
+    assert cache.hits == 1
+    cache.solve(BucketSolverBounded, BucketSystem.create(100.0, np.arange(16.0) + 0, np.ones(16)))
+    assert cache.misses == 6
+
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+@dataclasses.dataclass()
+class TruncatedSolver(BucketSolverSimple):
+    @classmethod
+    def solve(cls, system: BucketSystem, deadline: float = None) -> 'TruncatedSolver':
+        solved = super().solve(system)
+        return cls(system=system, result_delta=solved.result_delta, result_total=solved.result_total, truncated=True)
+
+
+def test_linear_is_not_inherited():
+    system_a = BucketSystem.create(100.0, [1.0, 2.0], [0.5, 0.5])
+    system_b = BucketSystem.create(250.0, [1.0, 2.0], [0.5, 0.5])
+    assert SolveCache.key(BucketSolverSimple, system_a) == SolveCache.key(BucketSolverSimple, system_b)
+    # a subclass of the simple solver keys by the amount unless it sets linear itself
+    assert SolveCache.key(TruncatedSolver, system_a) != SolveCache.key(TruncatedSolver, system_b)
+
+
+def test_truncated_results_are_not_cached():
+    cache = SolveCache()
+    system = BucketSystem.create(100.0, [1.0, 2.0], [0.5, 0.5])
+    assert cache.solve(TruncatedSolver, system, deadline=0.0).truncated
+    assert len(cache) == 0
+
+
+def test_key_leaves_out_run_options():
+    system = BucketSystem.create(100.0, [1.0, 2.0], [0.5, 0.5])
+    key = SolveCache.key(BucketSolverBounded, system, seed=7)
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        seed = np.random.SeedSequence(7)
+        assert SolveCache.key(BucketSolverBounded, system, seed=seed, executor=pool, deadline=1.0) == key
+        seed.spawn(4)
+        assert SolveCache.key(BucketSolverBounded, system, seed=seed) == key
+    assert SolveCache.key(BucketSolverBounded, system, seed=8) != key
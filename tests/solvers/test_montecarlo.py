@@ -1,12 +1,18 @@
 """
 Unit tests for module.
 """
+import concurrent.futures
+import networkx as nx
 import pandas as pd
 import numpy as np
 import logging
+import time
+import pytest
 
 import allocate.solvers.bucketdata
 import allocate.solvers.montecarlo
+import allocate.solvers.graphsolver
+import allocate.network.algorithms
 
 from pandas.testing import assert_series_equal
 
@@ -34,3 +40,138 @@ def test_solver_solve_all_positive():
     logging.debug('\n%s', solver)
 
     assert np.all(solver.result_delta.values >= 0)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_seed_is_reproducible():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 20, 30], optimal_ratios=[0.5, 0.3, 0.2])
+
+    solver_a = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(system, step_size=0.1, seed=42)
+    solver_b = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(system, step_size=0.1, seed=42)
+
+    np.testing.assert_array_equal(solver_a.result_delta.values, solver_b.result_delta.values)
+    assert (solver_a.accept, solver_a.reject) == (solver_b.accept, solver_b.reject)
+
+
+# noinspection DuplicatedCode
+@pytest.mark.parametrize('processes', [1, 2])
+def test_solver_solve_multiple_chains(processes: int):
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 20, 30], optimal_ratios=[0.5, 0.3, 0.2])
+
+    solver = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(
+        system, step_size=0.1, seed=7, chains=4, processes=processes)
+    logging.debug('\n%s', solver)
+
+    assert len(solver.chains) == 4
+    best = min(solver.chains, key=lambda c: c.error)
+    assert (solver.accept, solver.reject) == (best.accept, best.reject)
+    assert solver.result_delta.amount == pytest.approx(10)
+    assert np.all(solver.result_delta.values >= 0)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_with_executor():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 20, 30], optimal_ratios=[0.5, 0.3, 0.2])
+
+    # the same pool runs the chains of every solve, and gives the same chains as a pool made for the solve
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as pool:
+        solvers = [allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(
+            system, step_size=0.1, seed=7, chains=4, executor=pool) for _ in range(3)]
+    expected = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(
+        system, step_size=0.1, seed=7, chains=4, processes=2)
+
+    for solver in solvers:
+        np.testing.assert_array_equal(solver.result_delta.values, expected.result_delta.values)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_seed_sequence_spawns_new_streams():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 20, 30], optimal_ratios=[0.5, 0.3, 0.2])
+
+    seed = np.random.SeedSequence(42)
+    solver_a = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(system, step_size=0.1, seed=seed)
+    solver_b = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(system, step_size=0.1, seed=seed)
+
+    assert not np.array_equal(solver_a.result_delta.values, solver_b.result_delta.values)
+
+
+def test_solve_graph_seed_is_reproducible():
+    starting_frame = pd.DataFrame([
+        dict(label='R', current_value=300.0, optimal_ratio=1.0, amount_to_add=100.0, children=('A', 'B')),
+        dict(label='A', current_value=100.0, optimal_ratio=0.5, amount_to_add=0.0, children=('C', 'D')),
+        dict(label='B', current_value=200.0, optimal_ratio=0.5, amount_to_add=0.0, children=('E', 'F')),
+        dict(label='C', current_value=50.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+        dict(label='D', current_value=50.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+        dict(label='E', current_value=100.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+        dict(label='F', current_value=100.0, optimal_ratio=0.5, amount_to_add=0.0, children=()),
+    ])
+    graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    solver = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo
+
+    graph_a = allocate.solvers.graphsolver.solve(graph, solver=solver, step_size=0.1, seed=3)
+    graph_b = allocate.solvers.graphsolver.solve(graph, solver=solver, step_size=0.1, seed=3)
+
+    for node in graph:
+        assert graph_a.nodes[node]['results_value'] == graph_b.nodes[node]['results_value']
+
+
+def test_solver_solve_raises_on_zero_chains():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[0, 0], optimal_ratios=[0.5, 0.5])
+    with pytest.raises(ValueError, match='at least one chain'):
+        allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(system, chains=0)
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_many_buckets():
+    rng = np.random.default_rng(0)
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=1000, current_values=rng.random(2000) * 10, optimal_ratios=rng.random(2000))
+
+    solver = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(system, step_size=0.01, seed=0)
+
+    assert solver.accept == 100000
+    assert solver.result_delta.amount == pytest.approx(1000)
+    assert np.all(solver.result_delta.values >= 0)
+
+
+# noinspection DuplicatedCode
+@pytest.mark.parametrize('tolerance', [None, 1e-6])
+def test_solver_solve_adaptive(tolerance: float):
+    rng = np.random.default_rng(1)
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=1e6, current_values=rng.random(100) * 1000, optimal_ratios=rng.random(100))
+
+    solver = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(
+        system, step_size=0.01, seed=0, adaptive=True, tolerance=tolerance)
+    logging.debug('accept: %d error: %.3e', solver.accept, solver.chains[0].error)
+
+    assert solver.accept < 10000
+    assert solver.result_delta.amount == pytest.approx(1e6)
+    assert np.all(solver.result_delta.values >= 0)
+    assert solver.chains[0].error < 1e-3
+
+
+def test_make_schedule():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=1000, current_values=[0, 0], optimal_ratios=[0.5, 0.5])
+    schedule = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo._make_schedule(system, 0.01, 10.0)
+    assert schedule == pytest.approx([100.0, 10.0, 1.0, 0.1, 0.01])
+
+
+# noinspection DuplicatedCode
+def test_solver_solve_expired_deadline():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[10, 20, 30], optimal_ratios=[0.5, 0.3, 0.2])
+
+    solver = allocate.solvers.montecarlo.BucketSolverConstrainedMonteCarlo.solve(
+        system, step_size=0.01, seed=0, deadline=time.monotonic() - 1)
+
+    assert solver.truncated
+    assert solver.accept == 0
+    assert solver.result_delta.amount == pytest.approx(10)
+    assert np.all(solver.result_delta.values >= 0)
@@ -0,0 +1,108 @@
+"""
+Unit tests for module.
+"""
+import pandas as pd
+import numpy as np
+import pytest
+
+import allocate.network.algorithms
+import allocate.solvers.online
+
+
+def _make_allocator(**kwargs) -> allocate.solvers.online.DepositAllocator:
+    return allocate.solvers.online.DepositAllocator(
+        labels=['A', 'B', 'C', 'D'], ratios=[0.4, 0.3, 0.2, 0.1], values=[100.0, 100.0, 100.0, 100.0], **kwargs)
+
+
+def test_deposit_fills_the_lowest_level_first():
+    allocator = _make_allocator()
+    # A has the lowest value over its ratio, and reaches the level of B after 33.33
+    assert allocator.deposit(20.0) == pytest.approx(300.0)
+    assert allocator.take() == pytest.approx({'A': 20.0})
+    allocator.deposit(50.0)
+    added = allocator.take()
+    assert set(added) == {'A', 'B'}
+    assert sum(added.values()) == pytest.approx(50.0)
+    assert allocator.values[0] / 0.4 == pytest.approx(allocator.values[1] / 0.3)
+    assert allocator.deposited == pytest.approx(70.0)
+    assert allocator.take() == {}
+
+
+def test_deposit_converges_to_ratios():
+    allocator = _make_allocator()
+    assert allocator.deposit(600.0) == pytest.approx(1000.0)
+    np.testing.assert_allclose(allocator.values, [400.0, 300.0, 200.0, 100.0])
+    allocator.deposit(1000.0)
+    np.testing.assert_allclose(allocator.values / np.sum(allocator.values), [0.4, 0.3, 0.2, 0.1])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_deposits_are_independent_of_splitting(seed: int):
+    rng = np.random.default_rng(seed)
+    n = 50
+    kwargs = dict(labels=list(range(n)), ratios=rng.random(n), values=rng.random(n) * 100.0,
+                  max_values=np.where(rng.random(n) < 0.2, 150.0, np.inf))
+    amounts = rng.random(2000)
+    one = allocate.solvers.online.DepositAllocator(**kwargs)
+    one.deposit(float(np.sum(amounts)))
+    many = allocate.solvers.online.DepositAllocator(**kwargs)
+    many.deposits(amounts)
+    np.testing.assert_allclose(many.values, one.values, atol=1e-6)
+    assert sum(many.take().values()) == pytest.approx(np.sum(amounts))
+    assert np.all(many.values <= kwargs['max_values'] + 1e-9)
+
+
+def test_max_values():
+    allocator = _make_allocator(max_values=[110.0, np.inf, np.inf, np.inf])
+    allocator.deposit(100.0)
+    added = allocator.take()
+    assert added['A'] == pytest.approx(10.0)
+    assert sum(added.values()) == pytest.approx(100.0)
+    assert allocator.capacity == np.inf
+
+    allocator = _make_allocator(max_values=[110.0, 110.0, 110.0, 110.0])
+    assert allocator.capacity == pytest.approx(40.0)
+    with pytest.raises(ValueError):
+        allocator.deposit(41.0)
+    np.testing.assert_allclose(allocator.values, [100.0] * 4)
+    allocator.deposit(40.0)
+    np.testing.assert_allclose(allocator.values, [110.0] * 4)
+    assert allocator.capacity == pytest.approx(0.0)
+
+
+def test_deposit_raises():
+    allocator = _make_allocator()
+    with pytest.raises(ValueError):
+        allocator.deposit(-1.0)
+    assert allocator.deposit(0.0) == pytest.approx(250.0)
+    assert allocator.take() == {}
+
+
+def test_save_and_load(tmp_path):
+    allocator = _make_allocator()
+    allocator.deposit(123.0)
+    allocator.take()
+    allocator.deposit(10.0)
+    allocator.save(str(tmp_path / 'allocator.npz'))
+    loaded = allocate.solvers.online.DepositAllocator.load(str(tmp_path / 'allocator.npz'))
+    assert loaded.labels == allocator.labels
+    np.testing.assert_allclose(loaded.values, allocator.values)
+    assert loaded.deposited == allocator.deposited
+    assert loaded.deposit(77.0) == pytest.approx(allocator.deposit(77.0))
+    assert loaded.take() == pytest.approx(allocator.take())
+
+
+def test_from_graph():
+    graph = allocate.network.algorithms.create(pd.DataFrame([
+        dict(label='R', current_value=300.0, optimal_ratio=1.0, amount_to_add=100.0, children=('A', 'B')),
+        dict(label='A', current_value=100.0, optimal_ratio=1.0, amount_to_add=0.0, children=('C', 'D')),
+        dict(label='B', current_value=200.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+        dict(label='C', current_value=50.0, optimal_ratio=1.0, amount_to_add=0.0, children=()),
+        dict(label='D', current_value=50.0, optimal_ratio=3.0, amount_to_add=0.0, children=()),
+    ]))
+    allocator = allocate.solvers.online.DepositAllocator.from_graph(graph)
+    assert allocator.labels == ['B', 'C', 'D']
+    np.testing.assert_allclose(allocator.ratios, [0.5, 0.125, 0.375])
+    assert sum(allocator.values) == pytest.approx(400.0)
+    allocator.deposit(400.0)
+    np.testing.assert_allclose(allocator.values, [400.0, 100.0, 300.0])
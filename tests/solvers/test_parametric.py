@@ -0,0 +1,98 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pandas as pd
+import numpy as np
+import pytest
+
+import allocate.solvers.graphsolver
+import allocate.solvers.treesolver
+import allocate.solvers.parametric
+import allocate.network.algorithms
+
+from allocate.solvers.bounded import BucketSolverBounded
+from allocate.solvers.constrained import BucketSolverSimple
+
+
+@pytest.fixture()
+def graph() -> nx.DiGraph:
+    frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=0.0000, children=('3', '4', '5')),
+        dict(label='3', current_value=5000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='4', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=('C', 'D', 'E')),
+        dict(label='C', current_value=1500.0, optimal_ratio=0.20, amount_to_add=0.0000, children=()),
+        dict(label='D', current_value=0500.0, optimal_ratio=0.30, amount_to_add=0.0000, children=()),
+        dict(label='E', current_value=0000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+    ])
+    yield allocate.network.algorithms.create(frame)
+
+
+def _solve(graph: nx.DiGraph, amount: float, whole_tree: bool, solver=BucketSolverBounded) -> list:
+    solving = allocate.solvers.parametric._with_amount(graph, amount)
+    if whole_tree:
+        solved = allocate.solvers.treesolver.solve(solving)
+    else:
+        solved = allocate.solvers.graphsolver.solve(solving, solver=solver)
+    return [solved.nodes[n]['amount_to_add'] for n in graph if graph.out_degree(n) == 0]
+
+
+@pytest.mark.parametrize('whole_tree', [False, True])
+def test_allocations_for(graph: nx.DiGraph, whole_tree: bool):
+    path = allocate.solvers.parametric.AllocationPath.create(graph, lower=0.0, upper=20000.0, whole_tree=whole_tree)
+    assert 2 < len(path) < 20
+
+    amounts = np.random.default_rng(0).uniform(0.0, 20000.0, 25)
+    observed = path.allocations_for(amounts)
+    for amount, row in zip(amounts, observed):
+        np.testing.assert_allclose(row, _solve(graph, amount, whole_tree), atol=1e-2)
+        assert np.sum(row) == pytest.approx(amount)
+
+
+def test_allocation_for_breakpoints(graph: nx.DiGraph):
+    path = allocate.solvers.parametric.AllocationPath.create(graph, lower=0.0, upper=20000.0)
+    for amount, values in zip(path.amounts, path.values):
+        np.testing.assert_allclose(path.allocation_for(amount), values)
+
+
+def test_create_unconstrained(graph: nx.DiGraph):
+    path = allocate.solvers.parametric.AllocationPath.create(
+        graph, lower=0.0, upper=20000.0, solver=BucketSolverSimple)
+    for amount in np.random.default_rng(0).uniform(0.0, 20000.0, 10):
+        np.testing.assert_allclose(
+            path.allocation_for(amount), _solve(graph, amount, False, solver=BucketSolverSimple), atol=1e-2)
+
+
+def test_create_flat_unconstrained_is_linear():
+    frame = pd.DataFrame([
+        dict(label='A', current_value=4000.0, optimal_ratio=1.00, amount_to_add=0.0000, children=('0', '1', '2')),
+        dict(label='0', current_value=3000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='1', current_value=1000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+        dict(label='2', current_value=0000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+    ])
+    graph = allocate.network.algorithms.create(frame)
+    path = allocate.solvers.parametric.AllocationPath.create(
+        graph, lower=0.0, upper=20000.0, solver=BucketSolverSimple)
+    assert len(path) == 2
+    np.testing.assert_allclose(path.allocation_for(4000.0), [1000.0, 1000.0, 2000.0])
+
+
+def test_graph_for(graph: nx.DiGraph):
+    path = allocate.solvers.parametric.AllocationPath.create(graph, lower=0.0, upper=20000.0)
+    observed = path.graph_for(graph, 3000.0)
+    expected = allocate.solvers.graphsolver.solve(
+        allocate.solvers.parametric._with_amount(graph, 3000.0), solver=BucketSolverBounded)
+    for node in graph:
+        assert observed.nodes[node]['results_value'] == pytest.approx(expected.nodes[node]['results_value'])
+
+
+def test_allocations_for_raises_outside_of_path(graph: nx.DiGraph):
+    path = allocate.solvers.parametric.AllocationPath.create(graph, lower=0.0, upper=1000.0)
+    with pytest.raises(ValueError, match='outside of the allocation path'):
+        path.allocations_for([500.0, 1500.0])
+
+
+def test_create_raises_on_max_evaluations(graph: nx.DiGraph):
+    with pytest.raises(RuntimeError, match='max evaluations'):
+        allocate.solvers.parametric.AllocationPath.create(graph, lower=0.0, upper=20000.0, max_evaluations=3)
@@ -0,0 +1,77 @@
+"""
+Unit tests for module.
+"""
+import scipy.optimize
+import numpy as np
+import pytest
+
+import allocate.solvers.projection
+
+
+@pytest.mark.parametrize('values,amount', [
+    ([1.0, 2.0, 3.0], 6.0),
+    ([5.0, -1.0, 0.5], 3.0),
+    ([-5.0, -1.0, -2.0], 1.0),
+    ([0.2, 0.2, 0.2, 0.2], 0.0),
+])
+def test_simplex(values: list, amount: float):
+    observed = allocate.solvers.projection.simplex(values, amount)
+    expected = scipy.optimize.minimize(
+        lambda x: np.sum((x - values) ** 2), np.zeros(len(values)), method='SLSQP',
+        bounds=[(0.0, None)] * len(values), constraints=[{'type': 'eq', 'fun': lambda x: x.sum() - amount}],
+        options={'ftol': 1e-12}).x
+    assert np.all(observed >= 0)
+    assert np.sum(observed) == pytest.approx(amount)
+    np.testing.assert_allclose(observed, expected, atol=1e-6)
+
+
+def test_simplex_rows():
+    values = np.array([[1.0, 2.0, 3.0], [5.0, -1.0, 0.5]])
+    amounts = np.array([6.0, 3.0])
+    observed = allocate.solvers.projection.simplex(values, amounts)
+    for row, amount, expected in zip(values, amounts, observed):
+        np.testing.assert_allclose(allocate.solvers.projection.simplex(row, amount), expected)
+
+
+def test_simplex_raises_on_negative_amount():
+    with pytest.raises(ValueError, match='negative amount'):
+        allocate.solvers.projection.simplex([1.0, 2.0], -1.0)
+
+
+@pytest.mark.parametrize('values,amount,lower,upper', [
+    ([1.0, 2.0, 3.0], 6.0, 0.0, np.inf),
+    ([5.0, -1.0, 0.5], 3.0, 0.0, 2.0),
+    ([5.0, -1.0, 0.5], 3.0, [0.0, 1.0, 0.0], [np.inf, np.inf, 0.5]),
+    ([-5.0, -1.0, -2.0], -4.0, -np.inf, np.inf),
+    ([0.2, 0.2, 0.2, 0.2], 4.0, [1.0, 1.0, 1.0, 1.0], [1.0, 1.0, 1.0, 1.0]),
+    ([10.0, 0.0, 0.0], 5.0, [0.0, 2.0, 0.0], [1.0, np.inf, np.inf]),
+])
+def test_bounded(values: list, amount: float, lower, upper):
+    observed = allocate.solvers.projection.bounded(values, amount, lower, upper)
+    bounds = [(lo if np.isfinite(lo) else None, hi if np.isfinite(hi) else None)
+              for lo, hi in zip(*np.broadcast_arrays(lower, upper, values)[:2])]
+    expected = scipy.optimize.minimize(
+        lambda x: np.sum((x - values) ** 2), np.clip(np.zeros(len(values)), lower, upper), method='SLSQP',
+        bounds=bounds, constraints=[{'type': 'eq', 'fun': lambda x: x.sum() - amount}],
+        options={'ftol': 1e-12}).x
+    assert np.all(observed >= np.asanyarray(lower) - 1e-12)
+    assert np.all(observed <= np.asanyarray(upper) + 1e-12)
+    assert np.sum(observed) == pytest.approx(amount)
+    np.testing.assert_allclose(observed, expected, atol=1e-6)
+
+
+def test_bounded_matches_simplex():
+    values = np.random.default_rng(0).normal(size=100)
+    np.testing.assert_allclose(
+        allocate.solvers.projection.bounded(values, 10.0),
+        allocate.solvers.projection.simplex(values, 10.0))
+
+
+@pytest.mark.parametrize('lower,upper,match', [
+    ([0.0, 0.0], [1.0, 1.0], 'outside of the bounds'),
+    ([2.0, 2.0], [np.inf, np.inf], 'outside of the bounds'),
+    ([1.0, 0.0], [0.0, 1.0], 'lower bounds above upper bounds'),
+])
+def test_bounded_raises(lower: list, upper: list, match: str):
+    with pytest.raises(ValueError, match=match):
+        allocate.solvers.projection.bounded([1.0, 2.0], 3.0, lower, upper)
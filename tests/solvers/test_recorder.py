@@ -0,0 +1,69 @@
+"""
+Unit tests for module.
+"""
+import pandas as pd
+import numpy as np
+import pytest
+import os
+
+import allocate.solvers.graphsolver
+import allocate.solvers.recorder
+import allocate.network.algorithms
+
+from allocate.solvers.constrained import BucketSolverConstrained
+from allocate.solvers.constrained import BucketSolverSimple
+
+
+@pytest.fixture()
+def recorder() -> allocate.solvers.recorder.Recorder:
+    frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=4000.0, children=('3', '4', '5')),
+        dict(label='3', current_value=4000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='4', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=('C', 'D')),
+        dict(label='C', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='D', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+    ])
+    graph = allocate.network.algorithms.create(frame)
+    recorder = allocate.solvers.recorder.Recorder()
+    allocate.solvers.graphsolver.solve(graph, solver=BucketSolverSimple, recorder=recorder)
+    yield recorder
+
+
+def test_record(recorder: allocate.solvers.recorder.Recorder):
+    assert len(recorder.calls) >= 2
+    assert all(call.solver == BucketSolverSimple.__name__ for call in recorder.calls)
+    assert {tuple(call.system.current.labels) for call in recorder.calls} == {('3', '4', '5'), ('C', 'D')}
+
+
+@pytest.mark.parametrize('ext', ['.npz', '.jsonl'])
+def test_save_and_load(ext: str, tmp_path, recorder: allocate.solvers.recorder.Recorder):
+    path = os.path.join(tmp_path, f'capture{ext}')
+    recorder.save(path)
+    loaded = allocate.solvers.recorder.Recorder.load(path)
+    assert len(loaded.calls) == len(recorder.calls)
+    for observed, expected in zip(loaded.calls, recorder.calls):
+        assert observed.system.amount_to_add == pytest.approx(expected.system.amount_to_add)
+        assert observed.system.current.labels == [str(label) for label in expected.system.current.labels]
+        np.testing.assert_allclose(observed.system.current.values, expected.system.current.values)
+        np.testing.assert_allclose(observed.system.optimal.ratios, expected.system.optimal.ratios)
+        np.testing.assert_allclose(observed.result, expected.result)
+        np.testing.assert_allclose(observed.system.min_values, expected.system.min_values)
+        np.testing.assert_allclose(observed.system.max_values, expected.system.max_values)
+
+
+def test_save_raises_on_unknown_extension(recorder: allocate.solvers.recorder.Recorder):
+    with pytest.raises(ValueError, match='unknown capture extension!'):
+        recorder.save('capture.jpeg')
+
+
+def test_replay(recorder: allocate.solvers.recorder.Recorder):
+    report = allocate.solvers.recorder.replay(recorder.calls, solver=BucketSolverSimple)
+    assert report.failures == 0
+    assert len(report.latencies) == len(recorder.calls)
+    assert np.all(report.differences < 1e-9)
+    assert set(report.percentiles(q=(50, 99)).keys()) == {50, 99}
+
+    report = allocate.solvers.recorder.replay(recorder.calls, solver=BucketSolverConstrained)
+    assert report.solver == BucketSolverConstrained.__name__
+    assert report.failures == 0
@@ -0,0 +1,47 @@
+"""
+Unit tests for module.
+"""
+import numpy as np
+import pytest
+
+import allocate.solvers.sumtree
+
+
+@pytest.mark.parametrize('weights', [
+    [1.0], [1.0, 2.0, 3.0], [0.0, 0.0, 5.0, 0.0, 1.0], list(np.arange(17, dtype=float)),
+])
+def test_total_and_weights(weights: list):
+    tree = allocate.solvers.sumtree.SumTree(weights)
+    assert len(tree) == len(weights)
+    assert tree.total == pytest.approx(sum(weights))
+    np.testing.assert_allclose(tree.weights, weights)
+
+
+def test_update():
+    tree = allocate.solvers.sumtree.SumTree([1.0, 2.0, 3.0])
+    tree.update(1, 5.0)
+    assert tree[1] == 5.0
+    assert tree.total == pytest.approx(9.0)
+
+
+def test_find():
+    tree = allocate.solvers.sumtree.SumTree([1.0, 0.0, 2.0, 0.0])
+    assert tree.find(0.0) == 0
+    assert tree.find(0.999) == 0
+    assert tree.find(1.0) == 2
+    assert tree.find(2.999) == 2
+    # rounding past the total never selects an index with zero weight
+    assert tree.find(3.5) == 2
+
+
+def test_find_is_proportional():
+    weights = np.array([1.0, 2.0, 3.0, 4.0])
+    tree = allocate.solvers.sumtree.SumTree(weights)
+    rng = np.random.default_rng(0)
+    counts = np.bincount([tree.find(u * tree.total) for u in rng.random(20000)], minlength=4)
+    np.testing.assert_allclose(counts / counts.sum(), weights / weights.sum(), atol=0.02)
+
+
+def test_raises_on_negative_weights():
+    with pytest.raises(ValueError, match='negative weights'):
+        allocate.solvers.sumtree.SumTree([1.0, -1.0])
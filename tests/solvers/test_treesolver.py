@@ -0,0 +1,112 @@
+"""
+Unit tests for module.
+"""
+import networkx as nx
+import pandas as pd
+import numpy as np
+import logging
+import pytest
+
+import allocate.solvers.graphsolver
+import allocate.solvers.treesolver
+import allocate.network.algorithms
+import allocate.network.visualize
+import tests.utilities
+
+from allocate.solvers.constrained import BucketSolverConstrained
+
+
+# noinspection DuplicatedCode
+def test_solve_matches_local_solve_when_feasible():
+    starting_frame = pd.DataFrame([
+        dict(label='B', current_value=8000.0, optimal_ratio=1.00, amount_to_add=4000.0, children=('3', '4', '5')),
+        dict(label='3', current_value=4000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='4', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+        dict(label='5', current_value=2000.0, optimal_ratio=0.25, amount_to_add=0.0000, children=('C', 'D')),
+        dict(label='C', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='D', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=('6', '7')),
+        dict(label='6', current_value=2.50e2, optimal_ratio=0.25, amount_to_add=0.0000, children=()),
+        dict(label='7', current_value=7.50e2, optimal_ratio=0.75, amount_to_add=0.0000, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    local_graph = allocate.solvers.graphsolver.solve(starting_graph, solver=BucketSolverConstrained)
+    global_graph = allocate.solvers.treesolver.solve(starting_graph)
+    tests.utilities.show_graph('global_graph', global_graph, **allocate.network.visualize.formats_out)
+
+    node_match = nx.algorithms.isomorphism.numerical_node_match(
+        ['results_value', 'amount_to_add'], [-1000, -1000], rtol=1e-4)
+    assert nx.is_isomorphic(global_graph, local_graph, node_match=node_match)
+    assert not global_graph.graph[allocate.solvers.graphsolver.TRUNCATED]
+    assert global_graph.graph[allocate.solvers.graphsolver.RESIDUAL] == pytest.approx(0.0, abs=1e-9)
+    assert starting_graph.nodes['B']['amount_to_add'] == 4000.0
+
+
+# noinspection DuplicatedCode
+def test_solve_better_than_local_solve():
+    starting_frame = pd.DataFrame([
+        dict(label='R', current_value=2000.0, optimal_ratio=1.00, amount_to_add=1000.0, children=('A', 'B')),
+        dict(label='A', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=('A1', 'A2')),
+        dict(label='B', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=('B1', 'B2')),
+        dict(label='A1', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='A2', current_value=0000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='B1', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='B2', current_value=0500.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    local_graph = allocate.solvers.graphsolver.solve(starting_graph, solver=BucketSolverConstrained)
+    global_graph = allocate.solvers.treesolver.solve(starting_graph)
+    tests.utilities.show_graph('global_graph', global_graph, **allocate.network.visualize.formats_out)
+
+    observed = [global_graph.nodes[n]['results_value'] for n in ['A1', 'A2', 'B1', 'B2']]
+    logging.debug('observed: %s', observed)
+    assert np.allclose(observed, [1000.0, 2000.0 / 3.0, 2000.0 / 3.0, 2000.0 / 3.0])
+    assert global_graph.nodes['R']['results_value'] == pytest.approx(3000.0)
+    assert global_graph.nodes['R']['amount_to_add'] == 0.0
+    assert global_graph.graph[allocate.solvers.graphsolver.RESIDUAL] < \
+        local_graph.graph[allocate.solvers.graphsolver.RESIDUAL]
+
+
+def test_solve_pools_amounts_below_the_root():
+    starting_frame = pd.DataFrame([
+        dict(label='R', current_value=2000.0, optimal_ratio=1.00, amount_to_add=0000.0, children=('A', 'B')),
+        dict(label='A', current_value=1000.0, optimal_ratio=0.50, amount_to_add=1000.0, children=()),
+        dict(label='B', current_value=1000.0, optimal_ratio=0.50, amount_to_add=1000.0, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    global_graph = allocate.solvers.treesolver.solve(starting_graph, inplace=True)
+
+    assert global_graph is starting_graph
+    assert global_graph.nodes['A']['amount_to_add'] == pytest.approx(1000.0)
+    assert global_graph.nodes['B']['amount_to_add'] == pytest.approx(1000.0)
+    assert global_graph.nodes['R']['results_value'] == pytest.approx(4000.0)
+
+
+def test_solve_keeps_leaf_bounds():
+    starting_frame = pd.DataFrame([
+        dict(label='R', current_value=2000.0, optimal_ratio=1.00, amount_to_add=1000.0, children=('A', 'B'),
+             max_value=np.inf),
+        dict(label='A', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0000.0, children=(),
+             max_value=1100.0),
+        dict(label='B', current_value=1000.0, optimal_ratio=0.50, amount_to_add=0000.0, children=(),
+             max_value=np.inf),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    global_graph = allocate.solvers.treesolver.solve(starting_graph)
+
+    assert global_graph.nodes['A']['results_value'] == pytest.approx(1100.0)
+    assert global_graph.nodes['B']['results_value'] == pytest.approx(1900.0)
+
+
+def test_solve_withdrawal():
+    starting_frame = pd.DataFrame([
+        dict(label='R', current_value=1000.0, optimal_ratio=1.00, amount_to_add=-300.0, children=('A', 'B', 'C')),
+        dict(label='A', current_value=0100.0, optimal_ratio=1.00, amount_to_add=0000.0, children=()),
+        dict(label='B', current_value=0000.0, optimal_ratio=1.00, amount_to_add=0000.0, children=()),
+        dict(label='C', current_value=0900.0, optimal_ratio=1.00, amount_to_add=0000.0, children=()),
+    ])
+    starting_graph: nx.DiGraph = allocate.network.algorithms.create(starting_frame)
+    global_graph = allocate.solvers.treesolver.solve(starting_graph)
+
+    observed = [global_graph.nodes[n]['amount_to_add'] for n in ['A', 'B', 'C']]
+    assert np.allclose(observed, [0.0, 0.0, -300.0])
+    assert global_graph.nodes['R']['results_value'] == pytest.approx(700.0)
@@ -0,0 +1,47 @@
+"""
+Unit tests for module.
+"""
+import numpy as np
+import logging
+import pytest
+
+import allocate.solvers.bucketdata
+import allocate.solvers.withdrawal
+
+
+@pytest.mark.parametrize('amount_to_add,current_values,optimal_ratios,expected_delta', [
+    (-200, [600, 200, 200], [0.50, 0.25, 0.25], [-200.0, 0.0, 0.0]),
+    (-400, [600, 200, 200], [0.50, 0.25, 0.25], [-300.0, -50.0, -50.0]),
+    (-300, [100, 0, 900], [1.0, 1.0, 1.0], [0.0, 0.0, -300.0]),
+    (-100, [100, 100], [0.5, 0.5], [-50.0, -50.0]),
+    (0, [100, 100], [0.9, 0.1], [0.0, 0.0]),
+])
+def test_solver_solve(amount_to_add: float, current_values: list, optimal_ratios: list, expected_delta: list):
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=amount_to_add, current_values=current_values, optimal_ratios=optimal_ratios,
+        allow_withdrawal=True)
+    logging.debug('\n%s', system)
+
+    solver = allocate.solvers.withdrawal.BucketSolverWithdrawal.solve(system)
+    logging.debug('\n%s', solver)
+
+    np.testing.assert_allclose(solver.result_delta.values, expected_delta, atol=1e-9)
+    assert np.all(solver.result_total.values >= 0)
+
+
+def test_solver_solve_keeps_min_value():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=-200, current_values=[600, 200, 200], optimal_ratios=[0.50, 0.25, 0.25],
+        min_values=[500, 0, 0], allow_withdrawal=True)
+
+    solver = allocate.solvers.withdrawal.BucketSolverWithdrawal.solve(system)
+
+    np.testing.assert_allclose(solver.result_delta.values, [-100.0, -50.0, -50.0])
+
+
+def test_solver_solve_raises_on_positive_amount():
+    system = allocate.solvers.bucketdata.BucketSystem.create(
+        amount_to_add=10, current_values=[0, 0], optimal_ratios=[0.5, 0.5])
+
+    with pytest.raises(ValueError, match='positive in a withdrawal'):
+        allocate.solvers.withdrawal.BucketSolverWithdrawal.solve(system)
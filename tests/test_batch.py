@@ -0,0 +1,99 @@
+"""
+Unit tests for module.
+"""
+import pandas as pd
+import pytest
+import json
+
+import allocate.batch
+
+
+def test_write_and_tail(tmp_path):
+    tailer = allocate.batch.ResultsTailer(str(tmp_path))
+    assert tailer.poll() == 0
+
+    with allocate.batch.ResultsWriter(str(tmp_path)) as writer:
+        writer.write('a', deltas=dict(X=10.0, Y=5.0), elapsed=0.5)
+        writer.write('b', error='invalid network', elapsed=0.25)
+        assert tailer.poll() == 2
+        writer.write('c', deltas=dict(X=1.0), elapsed=0.25)
+
+    assert tailer.poll() == 1
+    assert tailer.poll() == 0
+    assert tailer.counts == {'ok': 2, 'error': 1}
+    assert tailer.total == 3
+    assert tailer.elapsed == pytest.approx(1.0)
+    assert dict(tailer.totals) == dict(X=11.0, Y=5.0)
+    assert list(tailer.errors) == [('b', 'invalid network')]
+    assert tailer.throughput >= 0.0
+
+    assert tailer.load('c') == dict(account='c', status='ok', error=None, elapsed=0.25, deltas=dict(X=1.0))
+    assert tailer.load('b')['error'] == 'invalid network'
+    assert tailer.load('missing') is None
+
+
+def test_tail_partial_lines(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    line = json.dumps(dict(account='a', status='ok', elapsed=0.0, deltas=dict(X=1.0)))
+    path.write_text(line[:10])
+    tailer = allocate.batch.ResultsTailer(str(tmp_path))
+    assert tailer.poll() == 0
+
+    path.write_text(line + '\n' + line[:5])
+    assert tailer.poll() == 1
+    assert dict(tailer.totals) == dict(X=1.0)
+
+
+def test_tail_max_lines(tmp_path):
+    with allocate.batch.ResultsWriter(str(tmp_path)) as writer:
+        for i in range(5):
+            writer.write(f'a{i}', deltas=dict(X=1.0))
+    tailer = allocate.batch.ResultsTailer(str(tmp_path), max_lines=2)
+    assert [tailer.poll() for _ in range(4)] == [2, 2, 1, 0]
+    assert tailer.load('a4')['account'] == 'a4'
+
+
+def test_tail_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    pd.DataFrame(dict(account=['a', 'b'], status=['ok', 'ok'], error=[None, None], elapsed=[0.1, 0.1],
+                      X=[1.0, 2.0], Y=[3.0, 4.0])).to_parquet(tmp_path / 'run.parquet')
+    tailer = allocate.batch.ResultsTailer(str(tmp_path))
+    assert tailer.poll() == 2
+    assert tailer.poll() == 0
+    assert dict(tailer.totals) == dict(X=3.0, Y=7.0)
+    assert tailer.load('b')['deltas'] == dict(X=2.0, Y=4.0)
+
+
+def test_tail_parquet_row_groups(tmp_path):
+    pytest.importorskip('pyarrow')
+    pd.DataFrame(dict(account=[f'a{i}' for i in range(5)], status=['ok'] * 5, error=[None] * 5,
+                      elapsed=[0.1] * 5, X=[1.0] * 5)).to_parquet(tmp_path / 'run.parquet', row_group_size=2)
+    tailer = allocate.batch.ResultsTailer(str(tmp_path), max_lines=3)
+    assert [tailer.poll() for _ in range(3)] == [3, 2, 0]
+    assert dict(tailer.totals) == dict(X=5.0)
+    assert tailer.load('a3')['account'] == 'a3'
+
+
+def test_account_index():
+    index = allocate.batch.AccountIndex()
+    for i in range(2000):
+        index.add(f'a{i}', 'run.jsonl', i)
+    assert len(index) == 2000
+    assert index.nbytes == 2048 * 16
+    assert list(index.find('a1500')) == [allocate.batch.Location(path='run.jsonl', offset=1500)]
+
+    # the newest record of an account comes first
+    index.add('a1500', 'other.jsonl', 7)
+    assert [loc.path for loc in index.find('a1500')] == ['other.jsonl', 'run.jsonl']
+
+
+def test_load_with_shared_hashes(tmp_path, monkeypatch):
+    monkeypatch.setattr(allocate.batch.AccountIndex, '_hash', staticmethod(lambda account: 0))
+    with allocate.batch.ResultsWriter(str(tmp_path)) as writer:
+        writer.write('a', deltas=dict(X=1.0))
+        writer.write('b', deltas=dict(X=2.0))
+    tailer = allocate.batch.ResultsTailer(str(tmp_path))
+    assert tailer.poll() == 2
+    assert tailer.load('a')['deltas'] == dict(X=1.0)
+    assert tailer.load('b')['deltas'] == dict(X=2.0)
+    assert tailer.load('c') is None
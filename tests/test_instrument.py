@@ -0,0 +1,79 @@
+"""
+Unit tests for module.
+"""
+import pandas as pd
+import os
+
+import allocate.solvers.graphsolver
+import allocate.network.algorithms
+import allocate.instrument
+
+from allocate.solvers.constrained import BucketSolverConstrained
+
+
+def test_stage_nesting():
+    metrics = allocate.instrument.Metrics()
+    with metrics.stage('outer'):
+        with metrics.stage('inner'):
+            pass
+        with metrics.stage('inner'):
+            pass
+    assert metrics.timers['outer'].calls == 1
+    assert metrics.timers['outer.inner'].calls == 2
+    assert metrics.timers['outer'].total >= metrics.timers['outer.inner'].total
+
+
+def test_timed_and_count():
+    metrics = allocate.instrument.Metrics()
+
+    @metrics.timed('func')
+    def func(x):
+        metrics.count('calls')
+        metrics.count('items', x)
+        return x
+
+    assert func(2) == 2
+    assert func(3) == 3
+    assert metrics.timers['func'].calls == 2
+    assert metrics.counters == dict(calls=2, items=5)
+    assert 'func' in metrics.summary()
+
+
+def test_hooks():
+    events = []
+    metrics = allocate.instrument.Metrics()
+    hook = lambda kind, name, value: events.append((kind, name))  # noqa: E731
+    metrics.add_hook(hook)
+    with metrics.stage('a'):
+        metrics.count('b')
+    metrics.remove_hook(hook)
+    metrics.count('c')
+    assert events == [(allocate.instrument.COUNT, 'b'), (allocate.instrument.STAGE, 'a')]
+
+
+def test_profile(tmp_path):
+    path = os.path.join(tmp_path, 'run.prof')
+    with allocate.instrument.profile(path) as profiler:
+        sum(range(100))
+    assert profiler is not None
+    assert os.path.exists(path)
+
+    with allocate.instrument.profile(None) as profiler:
+        assert profiler is None
+
+
+def test_pipeline_counters():
+    frame = pd.DataFrame([
+        dict(label='A', current_value=4000.0, optimal_ratio=1.00, amount_to_add=1000.0, children=('0', '1')),
+        dict(label='0', current_value=2000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+        dict(label='1', current_value=2000.0, optimal_ratio=0.50, amount_to_add=0.0000, children=()),
+    ])
+    allocate.instrument.metrics.reset()
+    graph = allocate.network.algorithms.create(frame)
+    allocate.solvers.graphsolver.solve(graph, solver=BucketSolverConstrained)
+    snapshot = allocate.instrument.metrics.snapshot()
+    assert snapshot['timers']['create']['calls'] == 1
+    assert snapshot['timers']['solve.finalize']['calls'] == 1
+    assert snapshot['counters']['parents.solved'] == 1
+    assert snapshot['counters']['solver.calls.BucketSolverConstrained'] == 1
+    assert snapshot['counters']['slsqp.nfev'] > 0
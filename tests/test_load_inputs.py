@@ -97,3 +97,17 @@ def test_load_csv(monkeypatch: MonkeyPatch, input_csv_stream, expected_load_resu
         m.setattr(builtins, 'open', input_csv_stream)
         observed_load_results = allocate.load_inputs.load_csv('input.csv')
         assert_frame_equal(observed_load_results, expected_load_results)
+
+
+def test_load_csv_optional_columns(monkeypatch: MonkeyPatch):
+    stream = make_input_stream_mock_function(r"""
+        label,optimal_ratio,current_value,amount_to_add,min_value,max_value,children
+        0,100,5500,1,,,A;B
+        A,45,1000,0,500,,
+        B,55,4500,0,,4600,
+    """)
+    with monkeypatch.context() as m:
+        m.setattr(builtins, 'open', stream)
+        observed_load_results = allocate.load_inputs.load_csv('input.csv')
+        assert observed_load_results['min_value'].tolist() == [0.0, 500.0, 0.0]
+        assert observed_load_results['max_value'].tolist() == [float('inf'), float('inf'), 4600.0]
@@ -0,0 +1,17 @@
+"""
+Unit tests for module.
+"""
+import pytest
+
+import allocate.replay
+
+from allocate.solvers.constrained import BucketSolverConstrained
+from allocate.solvers.constrained import BucketSolverSimple
+
+
+def test_get_solver():
+    assert allocate.replay.get_solver('simple') is BucketSolverSimple
+    assert allocate.replay.get_solver('allocate.solvers.constrained.BucketSolverConstrained') \
+        is BucketSolverConstrained
+    with pytest.raises(ValueError, match='unknown solver!'):
+        allocate.replay.get_solver('missing')
@@ -1,6 +1,8 @@
 """
 Unit tests for module.
 """
+import numpy as np
+import decimal
 import pytest
 
 import allocate.utilities
@@ -15,3 +17,42 @@ import allocate.utilities
 def test_moneyfmt(values: list, decimals: int, width: int, expected_str: str):
     observed_str = allocate.utilities.moneyfmt(*values, width=width, decimals=decimals)
     assert observed_str == expected_str
+
+
+@pytest.mark.parametrize('values,decimals,width,expected_str', [
+    ([-1234.5, 0.015, 2.675, 0.125], 2, 1, '-1,234.50, 0.01, 2.67, 0.13'),
+    ([-0.001], 2, 1, '-0.00'),
+    ([1.5, 2.5], 0, 1, '2, 3'),
+    ([1e20], 2, 1, '100,000,000,000,000,000,000.00'),
+])
+def test_moneyfmt_matches_decimal(values: list, decimals: int, width: int, expected_str: str):
+    observed_str = allocate.utilities.moneyfmt(*values, width=width, decimals=decimals)
+    assert observed_str == expected_str
+
+
+def test_moneyfmt_array_matches_decimal():
+    values = np.concatenate([np.arange(-10, 10, 0.005), np.random.default_rng(0).uniform(-1e6, 1e6, 1000)])
+    cent = decimal.Decimal('0.01')
+    expected = ['{:>12,}'.format(decimal.Decimal(v).quantize(cent, decimal.ROUND_HALF_UP)) for v in values]
+    assert allocate.utilities.moneyfmt_array(values) == expected
+
+
+@pytest.mark.parametrize('values,total,expected', [
+    ([33.333, 33.333, 33.334], None, [3333, 3333, 3334]),
+    ([100 / 3, 100 / 3, 100 / 3], 10000, [3334, 3333, 3333]),
+    ([0.004, 0.004, 0.002], 1, [1, 0, 0]),
+    ([-100 / 3, -100 / 3, -100 / 3], -10000, [-3333, -3333, -3334]),
+    ([1.0, 2.0], 500, [200, 300]),
+    ([], 0, []),
+])
+def test_round_cents(values: list, total: int, expected: list):
+    observed = allocate.utilities.round_cents(values, total=total)
+    assert observed.dtype == np.int64
+    assert observed.tolist() == expected
+
+
+def test_round_cents_raises():
+    with pytest.raises(ValueError, match='no values'):
+        allocate.utilities.round_cents([], total=1)
+    with pytest.raises(ValueError, match='not finite'):
+        allocate.utilities.round_cents([float('nan')])